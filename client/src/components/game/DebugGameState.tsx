@@ -27,11 +27,13 @@ function DebugGameState() {
         <Col xs={24} md={12}>
           <pre style={{ fontSize: '0.7rem' }}>{JSON.stringify(game, cardStringifyReplacer, 2)}</pre>
         </Col>
-        <Col xs={24} md={12}>
-          <pre style={{ fontSize: '0.7rem' }}>
-            {JSON.stringify(fullStateDoNotUse, cardStringifyReplacer, 2)}
-          </pre>
-        </Col>
+        {fullStateDoNotUse && (
+          <Col xs={24} md={12}>
+            <pre style={{ fontSize: '0.7rem' }}>
+              {JSON.stringify(fullStateDoNotUse, cardStringifyReplacer, 2)}
+            </pre>
+          </Col>
+        )}
       </Row>
     </Typography.Paragraph>
   );
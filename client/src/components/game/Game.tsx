@@ -5,14 +5,22 @@ import { Button, Select, Typography, message } from 'antd';
 import { GameName, CreateGameRequest } from '../../../generated_types/api';
 import {
   GameErrorMessage,
+  GameEventMessage,
+  GameStateDeltaMessage,
   GameStateMessage,
   PlayersMessage,
 } from '../../../generated_types/websocket';
-import { getGame, loadGameState } from '../../data/gameSlice';
+import {
+  getGame,
+  loadGameEvent,
+  loadGameState,
+  receiveGameStateDelta,
+} from '../../data/gameSlice';
 import { loadPlayers } from '../../data/playerSlice';
 import { useAppDispatch, useAppSelector } from '../../data/reduxHooks';
 import GameSocket from '../../game/GameSocket';
 import useConnectedGameSocket from '../../game/useConnectedGameSocket';
+import { EncodedMessage, decodeMessage } from '../../game/wireFormat';
 import ensurePlayerWithCookie from '../ensurePlayerWithCookie';
 
 import DebugGameState from './DebugGameState';
@@ -29,14 +37,22 @@ function Game({ gameId }: Props) {
     GameSocket.onReconnect(namespace, () => {
       socket.emit('join_game', gameId);
     });
-    GameSocket.onNamespaced(namespace, 'players', (playersMessage: PlayersMessage) => {
-      dispatch(loadPlayers(playersMessage));
+    GameSocket.onNamespaced(namespace, 'players', (payload: EncodedMessage) => {
+      dispatch(loadPlayers(decodeMessage<PlayersMessage>(payload)));
+    });
+    GameSocket.onNamespaced(namespace, 'game_state', (payload: EncodedMessage) => {
+      dispatch(loadGameState(decodeMessage<GameStateMessage>(payload)));
+    });
+    GameSocket.onNamespaced(namespace, 'game_state_delta', (payload: EncodedMessage) => {
+      if (!dispatch(receiveGameStateDelta(decodeMessage<GameStateDeltaMessage>(payload)))) {
+        socket.emit('resync_game_state');
+      }
     });
-    GameSocket.onNamespaced(namespace, 'game_state', (gameStateMessage: GameStateMessage) => {
-      dispatch(loadGameState(gameStateMessage));
+    GameSocket.onNamespaced(namespace, 'game_event', (payload: EncodedMessage) => {
+      dispatch(loadGameEvent(decodeMessage<GameEventMessage>(payload)));
     });
-    GameSocket.onNamespaced(namespace, 'invalid_input', (error: GameErrorMessage) => {
-      message.error(error.errorMessage);
+    GameSocket.onNamespaced(namespace, 'invalid_input', (payload: EncodedMessage) => {
+      message.error(decodeMessage<GameErrorMessage>(payload).errorMessage);
     });
   });
 
@@ -28,6 +28,9 @@ function JudgementGameBidding({ game }: Props) {
   const breakpoints = Grid.useBreakpoint();
 
   const [bidAmount, setBidAmount] = useState(0);
+  const minBid = game.legalMoves?.minBid ?? null;
+  const maxBid = game.legalMoves?.maxBid ?? null;
+  const canBid = minBid !== null && maxBid !== null && bidAmount >= minBid && bidAmount <= maxBid;
 
   const reorderCards = useCallback(
     (fromIndex: number, toIndex: number) => {
@@ -40,11 +43,11 @@ function JudgementGameBidding({ game }: Props) {
     [dispatch, socket],
   );
   const bidHands = useCallback(() => {
-    if (!socket) return;
+    if (!socket || !canBid) return;
 
     const action: JudgementBidHandsAction = { actionType: 'BID_HANDS', numHands: bidAmount };
     socket.emit('game_input', action);
-  }, [socket, bidAmount]);
+  }, [socket, canBid, bidAmount]);
 
   return (
     <DndContext sensors={sensors}>
@@ -80,7 +83,7 @@ function JudgementGameBidding({ game }: Props) {
                   }}
                 />
               </div>
-              <Button type="primary" block={true} disabled={bidAmount === null} onClick={bidHands}>
+              <Button type="primary" block={true} disabled={!canBid} onClick={bidHands}>
                 Bid hands
               </Button>
             </Space>
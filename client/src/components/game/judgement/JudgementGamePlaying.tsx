@@ -8,8 +8,8 @@ import {
   JudgementOrderCardsAction,
   JudgementPlayCardAction,
 } from '../../../../generated_types/judgement';
-import { optimisticallyReorderCards } from '../../../data/gameSlice';
-import { useAppDispatch } from '../../../data/reduxHooks';
+import { getLastCompletedTrick, optimisticallyReorderCards } from '../../../data/gameSlice';
+import { useAppDispatch, useAppSelector } from '../../../data/reduxHooks';
 import useConnectedGameSocket from '../../../game/useConnectedGameSocket';
 import useConfiguredSensors from '../../../utils/useConfiguredSensors';
 import Card, { CardType } from '../Card';
@@ -25,8 +25,14 @@ function JudgementGamePlaying({ game }: Props) {
   const dispatch = useAppDispatch();
   const sensors = useConfiguredSensors();
   const socket = useConnectedGameSocket();
+  const lastCompletedTrick = useAppSelector(getLastCompletedTrick);
 
   const [selectedCard, setSelectedCard] = useState<CardType | null>(null);
+  const canPlaySelectedCard =
+    selectedCard !== null &&
+    !!game.legalMoves?.cards.some(
+      (card) => card.suit === selectedCard.suit && card.rank === selectedCard.rank,
+    );
 
   const reorderCards = useCallback(
     (fromIndex: number, toIndex: number) => {
@@ -40,13 +46,13 @@ function JudgementGamePlaying({ game }: Props) {
   );
 
   const playCard = useCallback(() => {
-    if (!socket || !selectedCard) return;
+    if (!socket || !selectedCard || !canPlaySelectedCard) return;
 
     const card = `${selectedCard.suit}${selectedCard.rank}`;
     const action: JudgementPlayCardAction = { actionType: 'PLAY_CARD', card };
     socket.emit('game_input', action);
     setSelectedCard(null);
-  }, [socket, selectedCard]);
+  }, [socket, selectedCard, canPlaySelectedCard]);
 
   return (
     <DndContext sensors={sensors}>
@@ -61,12 +67,20 @@ function JudgementGamePlaying({ game }: Props) {
               <Card key={index} card={value} style={{ width: 100 }} />
             ))}
           </Space>
+          {lastCompletedTrick && lastCompletedTrick.roundIndex === game.currentRound && (
+            <Space direction="horizontal" size="large">
+              Last trick:
+              {lastCompletedTrick.pile.map((value, index) => (
+                <Card key={index} card={value} style={{ width: 60 }} />
+              ))}
+            </Space>
+          )}
           <Hand
             cards={game.playerState.hand}
             onReorderCards={reorderCards}
             onClick={(card) => setSelectedCard(card)}
           />
-          <Button disabled={!selectedCard} onClick={playCard}>
+          <Button disabled={!canPlaySelectedCard} onClick={playCard}>
             Play card
           </Button>
         </Space>
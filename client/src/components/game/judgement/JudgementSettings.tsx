@@ -58,6 +58,13 @@ function JudgementSettings({ game: { settings } }: Props) {
           >
             Update settings
           </Button>
+          <Button
+            onClick={() => {
+              socket?.emit('add_bot');
+            }}
+          >
+            Add bot
+          </Button>
           <Button
             type="primary"
             onClick={() => {
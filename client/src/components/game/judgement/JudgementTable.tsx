@@ -47,7 +47,15 @@ function JudgementTable({ game, canPlayCards }: Props) {
   useDndMonitor({
     onDragEnd(event) {
       const activeData = event.active.data.current;
-      if (socket && event.over?.id === DROPPABLE_TABLE_ID && isCardDraggableData(activeData)) {
+      if (
+        socket &&
+        event.over?.id === DROPPABLE_TABLE_ID &&
+        isCardDraggableData(activeData) &&
+        'legalMoves' in game &&
+        game.legalMoves?.cards.some(
+          (card) => card.suit === activeData.card.suit && card.rank === activeData.card.rank,
+        )
+      ) {
         const action: JudgementPlayCardAction = {
           actionType: 'PLAY_CARD',
           card: `${activeData.card.suit}${activeData.card.rank}`,
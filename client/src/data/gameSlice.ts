@@ -1,9 +1,25 @@
-import { PayloadAction, createAsyncThunk, createSelector, createSlice } from '@reduxjs/toolkit';
+import {
+  PayloadAction,
+  ThunkAction,
+  UnknownAction,
+  createAsyncThunk,
+  createSelector,
+  createSlice,
+} from '@reduxjs/toolkit';
 
-import { JudgementGameState, JudgementSpectatorGameState } from '../../generated_types/judgement';
+import {
+  JudgementGameState,
+  JudgementSpectatorGameState,
+  JudgementTrickCompletedEvent,
+} from '../../generated_types/judgement';
 import { CreateGameRequest } from '../../generated_types/api';
 import { GameIdResponse } from '../../generated_types/api';
-import { ConcreteGameState, GameStateMessage } from '../../generated_types/websocket';
+import {
+  ConcreteGameState,
+  GameEventMessage,
+  GameStateDeltaMessage,
+  GameStateMessage,
+} from '../../generated_types/websocket';
 import { fetchAPI } from '../api/client';
 
 import { RootState } from './store';
@@ -11,9 +27,17 @@ import { GameName } from '../../generated_types/api';
 
 type GameState = ConcreteGameState | null;
 
-const initialState = null as GameState;
+interface GameSliceState {
+  state: GameState;
+  version: number | null;
+  lastCompletedTrick: JudgementTrickCompletedEvent | null;
+}
 
-export const getGame = (state: RootState): GameState => state.game;
+const initialState: GameSliceState = { state: null, version: null, lastCompletedTrick: null };
+
+export const getGame = (state: RootState): GameState => state.game.state;
+export const getLastCompletedTrick = (state: RootState): JudgementTrickCompletedEvent | null =>
+  state.game.lastCompletedTrick;
 
 export const createGame = createAsyncThunk<string, { gameName: GameName }, { state: RootState }>(
   'game/createGame',
@@ -30,26 +54,63 @@ const gameSlice = createSlice({
   name: 'game',
   initialState,
   reducers: {
-    loadGameState(_, { payload }: PayloadAction<GameStateMessage>) {
-      return payload.state ?? null;
+    loadGameState(state, { payload }: PayloadAction<GameStateMessage>) {
+      state.state = payload.state ?? null;
+      state.version = payload.version;
+    },
+    loadGameEvent(state, { payload: { event } }: PayloadAction<GameEventMessage>) {
+      if (event.eventType === 'TRICK_COMPLETED') {
+        state.lastCompletedTrick = event;
+      }
+    },
+    applyGameStateDelta(state, { payload }: PayloadAction<GameStateDeltaMessage>) {
+      for (const { path, value } of payload.changes) {
+        if (path.length === 0) {
+          state.state = value as ConcreteGameState;
+          continue;
+        }
+
+        let target = state.state as unknown as Record<string, unknown>;
+        for (const key of path.slice(0, -1)) {
+          target = target[key] as Record<string, unknown>;
+        }
+        target[path[path.length - 1]] = value;
+      }
+      state.version = payload.version;
     },
     optimisticallyReorderCards(
       state,
       { payload: { fromIndex, toIndex } }: PayloadAction<{ fromIndex: number; toIndex: number }>,
     ) {
-      if (fromIndex === toIndex || state === null || state.playerType === 'SPECTATOR') {
+      const game = state.state;
+      if (fromIndex === toIndex || game === null || game.playerType === 'SPECTATOR') {
         return;
       }
 
-      const movedCard = state.playerState.hand.splice(fromIndex, 1)[0];
-      state.playerState.hand.splice(toIndex, 0, movedCard);
+      const movedCard = game.playerState.hand.splice(fromIndex, 1)[0];
+      game.playerState.hand.splice(toIndex, 0, movedCard);
     },
     resetGameState() {
-      return null;
+      return initialState;
     },
   },
 });
 
-export const { loadGameState, optimisticallyReorderCards, resetGameState } = gameSlice.actions;
+export const { loadGameState, loadGameEvent, optimisticallyReorderCards, resetGameState } =
+  gameSlice.actions;
+
+// Returns false when the delta doesn't apply to the version we have, in which case the
+// caller should ask the server to resync
+export const receiveGameStateDelta =
+  (delta: GameStateDeltaMessage): ThunkAction<boolean, RootState, unknown, UnknownAction> =>
+  (dispatch, getState) => {
+    const { state, version } = getState().game;
+    if (state === null || version !== delta.baseVersion) {
+      return false;
+    }
+
+    dispatch(gameSlice.actions.applyGameStateDelta(delta));
+    return true;
+  };
 
 export default gameSlice.reducer;
@@ -2,9 +2,12 @@ import Cookies from 'js-cookie';
 import { Socket } from 'socket.io-client';
 import { v4 as uuid } from 'uuid';
 
+import { ConnectAuth } from '../../generated_types/websocket';
 import { buildSocket } from '../api/client';
 import { PLAYER_AUTH_ID_COOKIE } from '../constants';
 
+import { WIRE_FORMAT } from './wireFormat';
+
 class BiMap<K, V> {
   private readonly map: Map<K, V>;
   private readonly reverseMap: Map<V, K>;
@@ -87,7 +90,11 @@ class GameSocket {
     resetConnectionAttempts?: () => void,
   ): Socket {
     const socket = buildSocket({
-      auth: (auth) => auth({ player_auth_id: Cookies.get(PLAYER_AUTH_ID_COOKIE) }),
+      auth: (auth) =>
+        auth({
+          playerAuthId: Cookies.get(PLAYER_AUTH_ID_COOKIE),
+          wireFormat: WIRE_FORMAT,
+        } satisfies Partial<ConnectAuth>),
       autoConnect: false,
     });
     this.socket = socket;
@@ -0,0 +1,33 @@
+import { describe, expect, it } from 'vitest';
+
+import { decodeMessage } from './wireFormat';
+
+describe('decodeMessage', () => {
+  it('parses JSON messages', () => {
+    expect(decodeMessage('{"version":1,"changes":[]}')).toEqual({ version: 1, changes: [] });
+  });
+
+  it('decodes msgpack messages with packed cards', () => {
+    // server.utils.msgpack_encoder.pack({"hand": [CK, DA], "bid": None, "score": -3, "version": 300})
+    const bytes = new Uint8Array([
+      132, 164, 104, 97, 110, 100, 146, 212, 1, 51, 212, 1, 0, 163, 98, 105, 100, 192, 165, 115, 99,
+      111, 114, 101, 253, 167, 118, 101, 114, 115, 105, 111, 110, 205, 1, 44,
+    ]);
+
+    const expected = {
+      hand: [
+        { suit: 'C', rank: 13 },
+        { suit: 'D', rank: 1 },
+      ],
+      bid: null,
+      score: -3,
+      version: 300,
+    };
+    expect(decodeMessage(bytes)).toEqual(expected);
+    expect(decodeMessage(bytes.buffer)).toEqual(expected);
+  });
+
+  it('rejects unknown extensions', () => {
+    expect(() => decodeMessage(new Uint8Array([212, 2, 0]))).toThrow();
+  });
+});
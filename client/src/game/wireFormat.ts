@@ -0,0 +1,168 @@
+import { Card } from '../../generated_types/judgement';
+import { WireFormat } from '../../generated_types/websocket';
+
+export const WIRE_FORMAT: WireFormat = import.meta.env.VITE_APP_WIRE_FORMAT ?? 'JSON';
+
+// Matches server.utils.msgpack_encoder - cards are packed as a one byte card face
+const CARD_EXT_CODE = 1;
+const SUITS: Card['suit'][] = ['D', 'S', 'H', 'C'];
+const NUM_RANKS = 13;
+
+const decodeCard = (face: number): Card => ({
+  suit: SUITS[Math.floor(face / NUM_RANKS)],
+  rank: (face % NUM_RANKS) + 1,
+});
+
+const textDecoder = new TextDecoder();
+
+// Only covers what the server sends, i.e. the msgpack types that JSON-like data packs into
+// plus the card extension
+class MsgpackDecoder {
+  private readonly bytes: Uint8Array;
+  private readonly view: DataView;
+  private offset: number;
+
+  constructor(bytes: Uint8Array) {
+    this.bytes = bytes;
+    this.view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+    this.offset = 0;
+  }
+
+  decode(): unknown {
+    const value = this.decodeValue();
+    if (this.offset !== this.bytes.byteLength) {
+      throw new Error('Unexpected trailing bytes in message');
+    }
+
+    return value;
+  }
+
+  private decodeValue(): unknown {
+    const type = this.readUint8();
+
+    if (type <= 0x7f) {
+      return type;
+    } else if (type <= 0x8f) {
+      return this.decodeMap(type & 0x0f);
+    } else if (type <= 0x9f) {
+      return this.decodeArray(type & 0x0f);
+    } else if (type <= 0xbf) {
+      return this.decodeString(type & 0x1f);
+    } else if (type >= 0xe0) {
+      return type - 0x100;
+    }
+
+    switch (type) {
+      case 0xc0:
+        return null;
+      case 0xc2:
+        return false;
+      case 0xc3:
+        return true;
+      case 0xca:
+        return this.read(4, (offset) => this.view.getFloat32(offset));
+      case 0xcb:
+        return this.read(8, (offset) => this.view.getFloat64(offset));
+      case 0xcc:
+        return this.readUint8();
+      case 0xcd:
+        return this.readUint16();
+      case 0xce:
+        return this.readUint32();
+      case 0xcf:
+        return Number(this.read(8, (offset) => this.view.getBigUint64(offset)));
+      case 0xd0:
+        return this.read(1, (offset) => this.view.getInt8(offset));
+      case 0xd1:
+        return this.read(2, (offset) => this.view.getInt16(offset));
+      case 0xd2:
+        return this.read(4, (offset) => this.view.getInt32(offset));
+      case 0xd3:
+        return Number(this.read(8, (offset) => this.view.getBigInt64(offset)));
+      case 0xd4:
+        return this.decodeCardExt();
+      case 0xd9:
+        return this.decodeString(this.readUint8());
+      case 0xda:
+        return this.decodeString(this.readUint16());
+      case 0xdb:
+        return this.decodeString(this.readUint32());
+      case 0xdc:
+        return this.decodeArray(this.readUint16());
+      case 0xdd:
+        return this.decodeArray(this.readUint32());
+      case 0xde:
+        return this.decodeMap(this.readUint16());
+      case 0xdf:
+        return this.decodeMap(this.readUint32());
+      default:
+        throw new Error(`Unsupported msgpack type: 0x${type.toString(16)}`);
+    }
+  }
+
+  private read<T>(size: number, reader: (offset: number) => T): T {
+    const value = reader(this.offset);
+    this.offset += size;
+    return value;
+  }
+
+  private readUint8(): number {
+    return this.read(1, (offset) => this.view.getUint8(offset));
+  }
+
+  private readUint16(): number {
+    return this.read(2, (offset) => this.view.getUint16(offset));
+  }
+
+  private readUint32(): number {
+    return this.read(4, (offset) => this.view.getUint32(offset));
+  }
+
+  private decodeString(length: number): string {
+    const value = textDecoder.decode(this.bytes.subarray(this.offset, this.offset + length));
+    this.offset += length;
+    return value;
+  }
+
+  private decodeArray(length: number): unknown[] {
+    const array = new Array(length);
+    for (let i = 0; i < length; i++) {
+      array[i] = this.decodeValue();
+    }
+    return array;
+  }
+
+  private decodeMap(size: number): Record<string, unknown> {
+    const map: Record<string, unknown> = {};
+    for (let i = 0; i < size; i++) {
+      const key = this.decodeValue();
+      if (typeof key !== 'string' && typeof key !== 'number') {
+        throw new Error('Unsupported msgpack map key');
+      }
+      map[key] = this.decodeValue();
+    }
+    return map;
+  }
+
+  // Cards are the only extension, and always fit in a fixext 1
+  private decodeCardExt(): Card {
+    const code = this.read(1, (offset) => this.view.getInt8(offset));
+    if (code !== CARD_EXT_CODE) {
+      throw new Error(`Unsupported msgpack extension: ${code}`);
+    }
+    return decodeCard(this.readUint8());
+  }
+}
+
+export type EncodedMessage = string | ArrayBuffer | Uint8Array;
+
+// Messages come in as JSON strings or as msgpack binary frames depending on the wire
+// format that was negotiated when connecting, but decode to the same generated types
+export const decodeMessage = <T>(message: EncodedMessage): T => {
+  if (typeof message === 'string') {
+    return JSON.parse(message) as T;
+  }
+
+  const bytes = message instanceof Uint8Array ? message : new Uint8Array(message);
+  return new MsgpackDecoder(bytes).decode() as T;
+};
@@ -8,6 +8,7 @@ interface ImportMetaEnv {
 
   readonly VITE_APP_API_HOST?: string;
   readonly VITE_APP_API_ROOT?: string;
+  readonly VITE_APP_WIRE_FORMAT?: 'JSON' | 'MSGPACK';
 }
 
 interface ImportMeta {
@@ -3,3 +3,36 @@ CREATE TABLE players(
   auth_id TEXT UNIQUE NOT NULL,
   name TEXT NOT NULL
 );
+
+-- Completed games, written in batches by server.data.game_history. Player ids aren't
+-- foreign keys since bots play under negative ids that have no players row.
+CREATE TABLE games(
+  id UUID PRIMARY KEY,
+  game_id TEXT NOT NULL,
+  game_name TEXT NOT NULL,
+  seed NUMERIC(20) NOT NULL,
+  num_decks INTEGER NOT NULL,
+  num_rounds INTEGER NOT NULL,
+  completed_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE TABLE game_players(
+  game_id UUID NOT NULL REFERENCES games(id),
+  seat INTEGER NOT NULL,
+  player_id INTEGER NOT NULL,
+  score INTEGER NOT NULL,
+  PRIMARY KEY (game_id, seat)
+);
+
+CREATE INDEX game_players_player_id ON game_players(player_id);
+
+CREATE TABLE game_rounds(
+  game_id UUID NOT NULL REFERENCES games(id),
+  round_index INTEGER NOT NULL,
+  player_id INTEGER NOT NULL,
+  trump_suit TEXT NOT NULL,
+  bid INTEGER,
+  won_tricks INTEGER NOT NULL,
+  score INTEGER NOT NULL,
+  PRIMARY KEY (game_id, round_index, player_id)
+);
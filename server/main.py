@@ -3,7 +3,13 @@ import json
 import uvicorn
 
 from server.app import app
+from server.data import shard_manager
 
 if __name__ == "__main__":
     with open("logging.config.json", encoding="utf-8") as config:
-        uvicorn.run(app, log_config=json.load(config))
+        log_config = json.load(config)
+
+    if shard_manager.is_sharded():
+        shard_manager.serve_shards(8000, log_config)
+    else:
+        uvicorn.run(app, log_config=log_config)
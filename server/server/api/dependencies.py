@@ -24,32 +24,32 @@ def get_player_cookies(
     return (player_auth_id, player_name)
 
 
-def get_or_create_player(
+async def get_or_create_player(
     response: Response,
     player_cookies: Annotated[tuple[str | None, str | None], Depends(get_player_cookies)],
 ) -> Player:
     player_auth_id, player_name = player_cookies
-    if player_auth_id is None or not player_manager.player_exists_by_auth(player_auth_id):
-        if player_name is None:
-            raise HTTPException(
-                status_code=403, detail="No player identifier was provided"
-            )
-        player, player_auth_id = player_manager.create_player(player_name)
-        set_player_cookies(response, player_auth_id, player_name)
-    else:
-        player = player_manager.get_player_by_auth(player_auth_id)
-        set_player_cookies(response, player_auth_id, player.name)
+    if player_auth_id is not None:
+        player = await player_manager.get_maybe_player_by_auth(player_auth_id)
+        if player is not None:
+            set_player_cookies(response, player_auth_id, player.name)
+            return player
+
+    if player_name is None:
+        raise HTTPException(status_code=403, detail="No player identifier was provided")
+    player, player_auth_id = await player_manager.create_player(player_name)
+    set_player_cookies(response, player_auth_id, player_name)
 
     return player
 
 
-def get_player(
+async def get_player(
     player_auth_id: Annotated[str | None, Cookie(alias="player_auth_id")] = None,
 ) -> Player:
     if player_auth_id is None:
         raise HTTPException(status_code=403, detail="Missing player cookie")
 
     try:
-        return player_manager.get_player_by_auth(player_auth_id)
+        return await player_manager.get_player_by_auth(player_auth_id)
     except ValueError:
         raise HTTPException(status_code=403, detail="Invalid player cookie") from None
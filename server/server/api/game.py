@@ -3,7 +3,7 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, Path
 
 from server.api.dependencies import get_or_create_player
-from server.data import game_manager
+from server.data import game_manager, shard_manager
 from server.models.api import CreateGameRequest, GameIdResponse, GameResponse
 from server.models.player import Player
 
@@ -12,13 +12,17 @@ router = APIRouter(prefix="/games", tags=["games"])
 
 @router.get("/{game_id}/exists")
 async def does_game_exist(game_id: Annotated[str, Path(alias="game_id")]) -> bool:
-    return game_manager.game_exists(game_id)
+    return await game_manager.has_game(game_id)
+
+
+@shard_manager.on_game_shard
+async def _get_game_response(game_id: str) -> GameResponse:
+    return GameResponse.from_game(game_manager.get_game(game_id))
 
 
 @router.get("/{game_id}")
 async def get_game(game_id: Annotated[str, Path(alias="game_id")]) -> GameResponse:
-    game = game_manager.get_game(game_id)
-    return GameResponse.from_game(game)
+    return await _get_game_response(game_id)
 
 
 @router.post("/create")
@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+
+from server.utils import metrics
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("")
+async def get_metrics() -> dict[str, object]:
+    return metrics.get_metrics()
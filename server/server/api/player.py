@@ -19,4 +19,6 @@ async def ensure_player() -> None:
 async def set_name(
     request: PlayerNameModel, player: Annotated[Player, Depends(get_player)]
 ) -> None:
-    player_manager.set_player_name(player.player_id, player_name=request.player_name)
+    await player_manager.set_player_name(
+        player.player_id, player_name=request.player_name
+    )
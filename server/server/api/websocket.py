@@ -2,6 +2,7 @@ import functools
 import inspect
 from typing import Any, Awaitable, Callable, TypeVar, cast
 
+from pydantic import ValidationError
 from socketio.exceptions import (  # pylint: disable=redefined-builtin
     ConnectionRefusedError,
 )
@@ -9,26 +10,41 @@ from socketio.exceptions import (  # pylint: disable=redefined-builtin
 from server.data import connection_manager, game_manager, player_manager, socket_messager
 from server.game.core import GameError
 from server.models.player import Player
+from server.models.websocket import ConnectAuth
 from server.sio_app import sio
 
 Fn = TypeVar("Fn", bound=Callable[..., Awaitable[None]])
 
 
 def require_player(socket_handler: Fn) -> Fn:
+    # Worked out up front since the wrapper runs for every event the handler gets
+    player_argname = next(
+        (
+            argname
+            for argname, annotation in inspect.getfullargspec(
+                socket_handler
+            ).annotations.items()
+            if annotation == Player
+        ),
+        None,
+    )
+
     @functools.wraps(socket_handler)
     async def wrapper(client_id: str, *args: Any, **kwargs: Any) -> None:
         player_id = await connection_manager.get_maybe_player_id_for_client(client_id)
 
-        if player_id is None or not player_manager.player_exists(player_id):
+        if player_id is None:
+            await sio.disconnect(client_id)
+            return
+
+        try:
+            player = await player_manager.get_player(player_id)
+        except ValueError:
             await sio.disconnect(client_id)
             return
 
-        for argname, annotation in inspect.getfullargspec(
-            socket_handler
-        ).annotations.items():
-            if annotation == Player:
-                kwargs[argname] = player_manager.get_player(player_id)
-                break
+        if player_argname is not None:
+            kwargs[player_argname] = player
 
         await socket_handler(client_id, *args, **kwargs)
 
@@ -38,26 +54,35 @@ def require_player(socket_handler: Fn) -> Fn:
 
 @sio.on("connect")
 async def connect(client_id: str, _environ: dict, auth: dict) -> None:
-    player_auth_id = None if auth is None else str(auth["player_auth_id"])
-    if player_auth_id is None:
-        raise ConnectionRefusedError("Unknown player")
+    try:
+        connect_auth = ConnectAuth.model_validate(auth)
+    except ValidationError as err:
+        raise ConnectionRefusedError("Unknown player") from err
 
     try:
-        player = player_manager.get_player_by_auth(player_auth_id)
+        player = await player_manager.get_player_by_auth(connect_auth.player_auth_id)
     except ValueError as err:
         raise ConnectionRefusedError("Unknown player") from err
 
-    await connection_manager.connect_client(client_id, player.player_id)
+    await connection_manager.connect_client(
+        client_id, player.player_id, connect_auth.wire_format
+    )
 
 
 @sio.on("join_game")
 @require_player
 async def handle_join_game(client_id: str, game_id: str) -> None:
-    await connection_manager.connect_client_to_game(client_id, game_id)
-
     player_id = await connection_manager.get_player_id_for_client(client_id)
-    game = game_manager.get_game(game_id)
-    game.add_player(player_id)
+    player_type = await game_manager.join_game(game_id, player_id)
+
+    await connection_manager.connect_client_to_game(client_id, game_id, player_type)
+
+    await game_manager.send_game_state_snapshot(
+        game_id,
+        player_id,
+        client_id,
+        await connection_manager.get_wire_format_for_client(client_id),
+    )
 
     # await socket_messager.emit_room(room)
     # await socket_messager.emit_players(
@@ -68,9 +93,8 @@ async def handle_join_game(client_id: str, game_id: str) -> None:
 @sio.on("leave_game")
 @require_player
 async def handle_leave_game(client_id: str, game_id: str) -> None:
-    game = game_manager.get_game(game_id)
     player_id = await connection_manager.get_player_id_for_client(client_id)
-    game.remove_player(player_id)
+    await game_manager.leave_game(game_id, player_id)
 
     # await socket_messager.emit_room(room_manager.get_room(game_id))
 
@@ -83,22 +107,49 @@ async def handle_start_game(client_id: str) -> None:
     # await socket_messager.emit_room(room_manager.get_room(game_id))
 
 
+@sio.on("add_bot")
+@require_player
+async def handle_add_bot(client_id: str, player: Player) -> None:
+    game_id = await connection_manager.get_game_id_for_client(client_id)
+
+    try:
+        await game_manager.add_bot(game_id, player.player_id)
+    except GameError as error:
+        await socket_messager.emit_error(error, client_id)
+
+
 @sio.on("game_input")
 @require_player
 async def handle_game_input(
     client_id: str, action: dict[str, Any], player: Player
 ) -> None:
     game_id = await connection_manager.get_game_id_for_client(client_id)
-    game = game_manager.get_game(game_id)
 
     try:
-        await game.process_raw_input(player.player_id, action)
+        await game_manager.process_input(game_id, player.player_id, action)
     except GameError as error:
         await socket_messager.emit_error(error, client_id)
-        return
+
+
+@sio.on("resync_game_state")
+@require_player
+async def handle_resync_game_state(client_id: str, player: Player) -> None:
+    game_id = await connection_manager.get_game_id_for_client(client_id)
+
+    await game_manager.send_game_state_snapshot(
+        game_id,
+        player.player_id,
+        client_id,
+        await connection_manager.get_wire_format_for_client(client_id),
+    )
 
 
 @sio.on("disconnect")
-async def disconnect(_client_id: str) -> None:
+async def disconnect(client_id: str) -> None:
     # connection_manager.disconnect_player_client(client_id)
-    pass
+    player_id = await connection_manager.get_maybe_player_id_for_client(client_id)
+    game_id = await connection_manager.get_maybe_game_id_for_client(client_id)
+    if player_id is None or game_id is None:
+        return
+
+    await game_manager.take_over_player(game_id, player_id)
@@ -1,14 +1,42 @@
 import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from socketio import ASGIApp
 from starlette.middleware.errors import ServerErrorMiddleware
 
-from server.api import game, player
+from server.api import game, metrics, player
+from server.data import (
+    db,
+    game_history,
+    game_log,
+    game_manager,
+    game_snapshots,
+    shard_manager,
+)
 from server.sio_app import sio
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    # Other shards can relay calls for our games before we've relayed any of our own
+    await db.open_pool()
+    game_log.start()
+    await game_manager.restore_games()
+    game_manager.start_evicting_games()
+    await shard_manager.start()
+    yield
+    shard_manager.stop()
+    game_manager.stop_evicting_games()
+    await game_snapshots.stop()
+    await game_log.stop()
+    await game_history.stop()
+    await db.close_pool()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 if "CORS_ALLOWED_ORIGIN" in os.environ:
@@ -26,4 +54,5 @@ if "CORS_ALLOWED_ORIGIN" in os.environ:
 
 app.include_router(player.router)
 app.include_router(game.router)
+app.include_router(metrics.router)
 app.mount("/ws", ASGIApp(sio, socketio_path="/ws/socket.io"))
@@ -0,0 +1,202 @@
+import asyncio
+import functools
+import itertools
+import logging
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from server.data import game_actor
+from server.game.bots import JudgementBotView, decide_bot_action
+from server.game.core import Game, GameError
+from server.game.judgement import JudgementGame
+from server.models.game import GamePlayerType, GameStatus
+from server.models.judgement import JudgementAction
+
+logger = logging.getLogger(__name__)
+
+BOT_DECISION_SECONDS = float(os.environ.get("BOT_DECISION_SECONDS", "0.5"))
+BOT_WORKERS = int(os.environ.get("BOT_WORKERS", "1"))
+# Players in games restored on startup have this long to reconnect before bots take over
+# their seats
+RESTORED_PLAYER_GRACE_SECONDS = float(
+    os.environ.get("RESTORED_PLAYER_GRACE_SECONDS", "30")
+)
+
+# Bots don't have database rows, so they count down from -1 to stay clear of player ids
+_bot_ids = itertools.count(-1, -1)
+
+# game id -> ids of the seats in that game that a bot is playing. A player can be away
+# from several games at once, so their id can be under more than one game.
+_bot_seats: dict[str, set[int]] = {}
+# game id -> the task playing the bots' turns in that game, if they're playing
+_bot_tasks: dict[str, asyncio.Task] = {}
+# game id -> players in a restored game who haven't rejoined it yet, and the timer for
+# handing their seats to bots
+_absent_players: dict[str, set[int]] = {}
+_grace_timers: dict[str, asyncio.TimerHandle] = {}
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=BOT_WORKERS)
+    return _executor
+
+
+def is_bot_controlled(game_id: str, player_id: int) -> bool:
+    return player_id in _bot_seats.get(game_id, ())
+
+
+def add_bot(game: Game, requesting_player_id: int) -> int:
+    if not isinstance(game, JudgementGame):
+        raise GameError("This game doesn't support bots")
+    if not game.is_host(requesting_player_id):
+        raise GameError("Only the host may add bots!")
+    if game.status != GameStatus.NOT_STARTED:
+        raise GameError("Cannot add bots after the game has already started!")
+
+    bot_id = next(_bot_ids)
+    game.add_player(bot_id)
+    _bot_seats.setdefault(game.game_id, set()).add(bot_id)
+
+    return bot_id
+
+
+def take_over_player(game: Game, player_id: int) -> None:
+    if (
+        game.status != GameStatus.IN_PROGRESS
+        or not game.is_in_game(player_id)
+        or game.players[player_id].player_type != GamePlayerType.PLAYER
+    ):
+        return
+
+    _bot_seats.setdefault(game.game_id, set()).add(player_id)
+    schedule_bot_turns(game)
+
+
+# Bots keep their seats in restored games, and new bots are numbered past them so that
+# no bot id is ever in two games. Players in games under way keep their seats while their
+# clients reconnect, and any who haven't rejoined once the grace period is up have their
+# seats played by bots, the same as if they'd disconnected.
+def restore_game(game: Game) -> None:
+    global _bot_ids
+    bot_ids = [player_id for player_id in game.players if player_id < 0]
+    if len(bot_ids) > 0:
+        next_bot_id = next(_bot_ids)
+        _bot_ids = itertools.count(min(next_bot_id, min(bot_ids) - 1), -1)
+        _bot_seats.setdefault(game.game_id, set()).update(bot_ids)
+
+    if game.status == GameStatus.IN_PROGRESS:
+        absent_players = {
+            player_id
+            for player_id, player in game.players.items()
+            if player_id >= 0 and player.player_type == GamePlayerType.PLAYER
+        }
+        if len(absent_players) > 0:
+            _absent_players[game.game_id] = absent_players
+            _grace_timers[game.game_id] = asyncio.get_running_loop().call_later(
+                RESTORED_PLAYER_GRACE_SECONDS, take_over_absent_players, game
+            )
+    schedule_bot_turns(game)
+
+
+def take_over_absent_players(game: Game) -> None:
+    _grace_timers.pop(game.game_id, None)
+    for player_id in _absent_players.pop(game.game_id, ()):
+        take_over_player(game, player_id)
+
+
+# Also counts as the player being back for a restored game
+def release_player(game: Game, player_id: int) -> None:
+    absent_players = _absent_players.get(game.game_id)
+    if absent_players is not None:
+        absent_players.discard(player_id)
+
+    if player_id < 0 or not is_bot_controlled(game.game_id, player_id):
+        return
+
+    seats = _bot_seats[game.game_id]
+    seats.discard(player_id)
+    if len(seats) == 0:
+        del _bot_seats[game.game_id]
+
+
+# Stops a bot that's still deciding, or a grace period that's still running, from
+# playing into the game once it's gone
+def remove_game(game_id: str) -> None:
+    _bot_seats.pop(game_id, None)
+    _absent_players.pop(game_id, None)
+    grace_timer = _grace_timers.pop(game_id, None)
+    if grace_timer is not None:
+        grace_timer.cancel()
+    task = _bot_tasks.pop(game_id, None)
+    if task is not None:
+        task.cancel()
+
+
+def get_bot_turn(game: JudgementGame) -> int | None:
+    if game.status != GameStatus.IN_PROGRESS:
+        return None
+
+    player_id = game.get_current_player_id()
+    return player_id if is_bot_controlled(game.game_id, player_id) else None
+
+
+def schedule_bot_turns(game: Game) -> None:
+    if (
+        not isinstance(game, JudgementGame)
+        or game.game_id in _bot_tasks
+        or get_bot_turn(game) is None
+    ):
+        return
+
+    _bot_tasks[game.game_id] = asyncio.create_task(run_bot_turns(game))
+
+
+def get_turn(game: JudgementGame) -> tuple[int, int, int, str]:
+    return (game.current_round, game.current_trick, game.current_turn_index, game.phase)
+
+
+def play_bot_action(
+    player_id: int, turn: tuple[int, int, int, str], action: JudgementAction, game: Game
+) -> bool:
+    # The seat may have been handed back to its player while the bot was thinking
+    if (
+        not isinstance(game, JudgementGame)
+        or get_turn(game) != turn
+        or not is_bot_controlled(game.game_id, player_id)
+    ):
+        return False
+
+    game.apply_input(player_id, action)
+    return True
+
+
+async def run_bot_turns(game: JudgementGame) -> None:
+    try:
+        loop = asyncio.get_running_loop()
+        while (player_id := get_bot_turn(game)) is not None:
+            turn = get_turn(game)
+            action = await loop.run_in_executor(
+                get_executor(),
+                decide_bot_action,
+                JudgementBotView(game, player_id),
+                random.getrandbits(64),
+                BOT_DECISION_SECONDS,
+            )
+
+            try:
+                await game_actor.submit(
+                    game, functools.partial(play_bot_action, player_id, turn, action)
+                )
+            except GameError:
+                logger.exception(
+                    "Bot %s made an invalid move in %s", player_id, game.game_id
+                )
+                return
+    finally:
+        if _bot_tasks.get(game.game_id) is asyncio.current_task():
+            del _bot_tasks[game.game_id]
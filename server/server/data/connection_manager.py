@@ -1,5 +1,7 @@
 from typing import Any
 
+from server.models.game import GamePlayerType
+from server.models.websocket import WireFormat
 from server.sio_app import sio
 
 
@@ -8,11 +10,16 @@ def get_websocket_room_id(
     client_id: str | None = None,
     game_id: str | None = None,
     player_id: int | None = None,
+    player_type: GamePlayerType | None = None,
 ) -> str:
     if client_id is not None:
         return client_id
 
     if game_id is not None:
+        if player_type == GamePlayerType.PLAYER:
+            return f"game/{game_id}/players"
+        if player_type == GamePlayerType.SPECTATOR:
+            return f"game/{game_id}/spectators"
         if player_id is not None:
             return f"game/{game_id}/{player_id}"
         return f"game/{game_id}"
@@ -23,6 +30,20 @@ def get_websocket_room_id(
     raise TypeError("No client id, player id, or game id was provided")
 
 
+# Clients only join the rooms for their own wire format, so that anything sent to a room
+# has to be sent once per format that's in use
+def get_wire_format_room_id(room_id: str, wire_format: WireFormat) -> str:
+    if wire_format == WireFormat.JSON:
+        return room_id
+
+    return f"{room_id}:{wire_format.value.lower()}"
+
+
+# Only knows about clients that are connected to this server
+def room_has_clients(room_id: str) -> bool:
+    return next(sio.manager.get_participants("/", room_id), None) is not None
+
+
 async def get_client_session(client_id: str) -> dict[str, Any]:
     return await sio.get_session(client_id)
 
@@ -37,6 +58,11 @@ async def get_maybe_game_id_for_client(client_id: str) -> str | None:
     return session.get("game_id")
 
 
+async def get_wire_format_for_client(client_id: str) -> WireFormat:
+    session = await get_client_session(client_id)
+    return session.get("wire_format", WireFormat.JSON)
+
+
 async def get_player_id_for_client(client_id: str) -> int:
     player_id = await get_maybe_player_id_for_client(client_id)
     if player_id is None:
@@ -51,18 +77,36 @@ async def get_game_id_for_client(client_id: str) -> str:
     return game_id
 
 
-async def connect_client(client_id: str, player_id: int) -> None:
-    await sio.enter_room(client_id, get_websocket_room_id(player_id=player_id))
+async def _enter_room(client_id: str, room_id: str) -> None:
+    wire_format = await get_wire_format_for_client(client_id)
+    await sio.enter_room(client_id, get_wire_format_room_id(room_id, wire_format))
+
+
+async def _leave_room(client_id: str, room_id: str) -> None:
+    wire_format = await get_wire_format_for_client(client_id)
+    await sio.leave_room(client_id, get_wire_format_room_id(room_id, wire_format))
+
+
+async def connect_client(
+    client_id: str, player_id: int, wire_format: WireFormat = WireFormat.JSON
+) -> None:
     async with sio.session(client_id) as session:
         session["player_id"] = player_id
+        session["wire_format"] = wire_format
+    await _enter_room(client_id, get_websocket_room_id(player_id=player_id))
 
 
-async def connect_client_to_game(client_id: str, game_id: str) -> None:
+async def connect_client_to_game(
+    client_id: str, game_id: str, player_type: GamePlayerType
+) -> None:
     player_id = await get_player_id_for_client(client_id)
     async with sio.session(client_id) as session:
         session["game_id"] = game_id
-    await sio.enter_room(client_id, get_websocket_room_id(game_id=game_id))
-    await sio.enter_room(
+    await _enter_room(client_id, get_websocket_room_id(game_id=game_id))
+    await _enter_room(
+        client_id, get_websocket_room_id(game_id=game_id, player_type=player_type)
+    )
+    await _enter_room(
         client_id, get_websocket_room_id(game_id=game_id, player_id=player_id)
     )
 
@@ -72,7 +116,11 @@ async def disconnect_client_from_game(client_id: str) -> None:
     game_id = await get_game_id_for_client(client_id)
     async with sio.session(client_id) as session:
         del session["game_id"]
-    await sio.leave_room(client_id, get_websocket_room_id(game_id=game_id))
-    await sio.leave_room(
+    await _leave_room(client_id, get_websocket_room_id(game_id=game_id))
+    for player_type in GamePlayerType:
+        await _leave_room(
+            client_id, get_websocket_room_id(game_id=game_id, player_type=player_type)
+        )
+    await _leave_room(
         client_id, get_websocket_room_id(game_id=game_id, player_id=player_id)
     )
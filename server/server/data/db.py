@@ -1,12 +1,30 @@
-import functools
 import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
 
-import psycopg
-from psycopg import Connection, Cursor
+from psycopg import AsyncConnection, AsyncCursor
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import AsyncConnectionPool
 
+from server.utils import metrics
 
-@functools.lru_cache(maxsize=1)
-def get_db_connection() -> Connection:
+# Each server process keeps at least DB_POOL_MIN_SIZE connections open and opens up to
+# DB_POOL_MAX_SIZE under load. A query waits at most DB_POOL_TIMEOUT_SECONDS for a free
+# connection before failing.
+DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_TIMEOUT_SECONDS = float(os.environ.get("DB_POOL_TIMEOUT_SECONDS", "10"))
+# How long the pool keeps trying to reconnect after losing the database before giving up
+DB_RECONNECT_TIMEOUT_SECONDS = float(
+    os.environ.get("DB_RECONNECT_TIMEOUT_SECONDS", "300")
+)
+DATABASE_HOST = os.environ.get("DATABASE_HOST", "database")
+
+_pool: AsyncConnectionPool | None = None
+
+
+def get_conninfo() -> str:
     if "POSTGRES_PASSWORD_FILE" in os.environ:
         postgres_password_file = os.environ.get("POSTGRES_PASSWORD_FILE")
         if postgres_password_file is None:
@@ -14,29 +32,72 @@ def get_db_connection() -> Connection:
 
         with open(postgres_password_file, encoding="utf-8") as pass_file:
             postgres_password = pass_file.readline().strip()
-            conn = psycopg.connect(
-                host="database",
+            return make_conninfo(
+                host=DATABASE_HOST,
                 dbname=os.environ.get("POSTGRES_DB"),
                 user="postgres",
                 password=postgres_password,
             )
-    else:
-        conn = psycopg.connect(
-            host="database", dbname=os.environ.get("POSTGRES_DB"), user="postgres"
+
+    return make_conninfo(
+        host=DATABASE_HOST, dbname=os.environ.get("POSTGRES_DB"), user="postgres"
+    )
+
+
+# Counts every statement that goes to the database, where an executemany counts once
+# since it's sent as a single pipeline
+class MeteredCursor(AsyncCursor):
+    async def execute(self, *args: Any, **kwargs: Any) -> "MeteredCursor":
+        metrics.observe("db_round_trips", 1)
+        await super().execute(*args, **kwargs)
+        return self
+
+    async def executemany(self, *args: Any, **kwargs: Any) -> None:
+        metrics.observe("db_round_trips", 1)
+        await super().executemany(*args, **kwargs)
+
+
+async def _configure_connection(conn: AsyncConnection) -> None:
+    await conn.set_autocommit(True)
+    # Every query is prepared on the server the first time a connection runs it, which
+    # is fine since player_manager only has a handful of them
+    conn.prepare_threshold = 0
+    conn.cursor_factory = MeteredCursor
+
+
+def get_pool() -> AsyncConnectionPool:
+    global _pool
+    if _pool is None:
+        # Connections are checked before they're handed out so that one that the
+        # database dropped is replaced instead of failing a query, and the pool keeps
+        # reconnecting in the background if the database goes away entirely
+        _pool = AsyncConnectionPool(
+            get_conninfo(),
+            min_size=DB_POOL_MIN_SIZE,
+            max_size=DB_POOL_MAX_SIZE,
+            open=False,
+            configure=_configure_connection,
+            check=AsyncConnectionPool.check_connection,
+            timeout=DB_POOL_TIMEOUT_SECONDS,
+            reconnect_timeout=DB_RECONNECT_TIMEOUT_SECONDS,
+            name="players",
         )
+    return _pool
+
 
-    conn.autocommit = True
-    return conn
+# Doesn't wait for the database, so that the server can start before it's reachable
+async def open_pool() -> None:
+    await get_pool().open()
 
 
-def get_cursor() -> Cursor:
-    db_connection = get_db_connection()
+async def close_pool() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+    _pool = None
 
-    try:
-        cur = db_connection.cursor()
-    except psycopg.InterfaceError:
-        get_db_connection.cache_clear()
-        db_connection = get_db_connection()
-        cur = db_connection.cursor()
 
-    return cur
+@asynccontextmanager
+async def get_cursor() -> AsyncIterator[AsyncCursor]:
+    async with get_pool().connection() as conn, conn.cursor() as cur:
+        yield cur
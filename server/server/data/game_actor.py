@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import os
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+from server.data import game_history, game_log, game_snapshots, socket_messager
+from server.game.core import Game, GameError
+from server.models.game import GameStatus
+from server.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Past this many queued actions a game rejects new ones instead of falling further behind
+GAME_MAILBOX_SIZE = int(os.environ.get("GAME_MAILBOX_SIZE", "256"))
+
+T = TypeVar("T")
+
+# An action, the future for its result, and whether it only runs once every change before
+# it has been sent out
+Mail = tuple[Callable[[Game], Any], asyncio.Future, bool]
+
+
+# Runs everything that changes a game one at a time in arrival order, so that no two
+# transitions can interleave at an await. Whatever arrives while a batch is being sent
+# out is drained as the next batch, which only sends a single state update.
+class GameActor:
+    game: Game
+    mailbox: asyncio.Queue[Mail]
+    task: asyncio.Task | None
+    recorded: bool
+
+    def __init__(self, game: Game, mailbox_size: int = GAME_MAILBOX_SIZE) -> None:
+        self.game = game
+        self.mailbox = asyncio.Queue(mailbox_size)
+        self.task = None
+        self.recorded = False
+
+    def submit(
+        self, action: Callable[[Game], T], after_flush: bool = False
+    ) -> asyncio.Future[T]:
+        future: asyncio.Future[T] = asyncio.get_running_loop().create_future()
+        try:
+            self.mailbox.put_nowait((action, future, after_flush))
+        except asyncio.QueueFull as error:
+            metrics.observe("game_mailbox_rejections", 1)
+            raise GameError("The game is too busy right now, try again") from error
+
+        metrics.observe("game_mailbox_depth", self.mailbox.qsize())
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+        return future
+
+    async def run(self) -> None:
+        while True:
+            batch = [await self.mailbox.get()]
+            while not self.mailbox.empty():
+                batch.append(self.mailbox.get_nowait())
+
+            metrics.observe("game_mailbox_batch_size", len(batch))
+            for action, future, after_flush in batch:
+                if not after_flush:
+                    self.run_action(action, future)
+
+            game_log.append(self.game, self.game.drain_log_entries())
+            try:
+                await socket_messager.flush_game_state(self.game)
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Failed to send state for %s", self.game.game_id)
+            game_snapshots.mark_dirty(self.game)
+
+            for action, future, after_flush in batch:
+                if after_flush:
+                    self.run_action(action, future)
+
+            if self.game.status == GameStatus.COMPLETE and not self.recorded:
+                self.recorded = True
+                # Handed off without waiting, so the database never holds up the game
+                try:
+                    game_history.record_game(self.game)
+                except Exception:  # pylint: disable=broad-exception-caught
+                    logger.exception("Failed to record %s", self.game.game_id)
+
+    def run_action(self, action: Callable[[Game], Any], future: asyncio.Future) -> None:
+        if future.cancelled():
+            return
+
+        try:
+            future.set_result(action(self.game))
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            if not isinstance(error, GameError):
+                logger.exception("Failed to process an action in %s", self.game.game_id)
+            # Leave this frame out of the traceback that goes back to the sender, since
+            # anything that clears the traceback's frames would otherwise close the
+            # actor's coroutine along with them
+            traceback = error.__traceback__
+            future.set_exception(
+                error.with_traceback(None if traceback is None else traceback.tb_next)
+            )
+
+    def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+
+        while not self.mailbox.empty():
+            _, future, _ = self.mailbox.get_nowait()
+            future.cancel()
+
+
+_game_actors: dict[str, GameActor] = {}
+
+
+# Every game in play gets an actor up front. Once a game has been removed nothing can
+# change it, even whatever was still holding on to it, like a bot that was thinking.
+def add_game(game: Game) -> None:
+    remove_game(game.game_id)
+    _game_actors[game.game_id] = GameActor(game)
+
+
+def get_game_actor(game: Game) -> GameActor:
+    game_actor = _game_actors.get(game.game_id)
+    # Ids are reused, so the actor under this id may belong to a newer game
+    if game_actor is None or game_actor.game is not game:
+        raise GameError("This game is no longer running")
+
+    return game_actor
+
+
+# Raises GameError if the action does, if the game has been removed, or if the game's
+# mailbox is full
+async def submit(game: Game, action: Callable[[Game], T]) -> T:
+    return await get_game_actor(game).submit(action)
+
+
+# Runs read once every action submitted before it has been processed and its changes sent
+# out, e.g. to build a snapshot that lines up with the next update a client will get
+async def submit_after_flush(game: Game, read: Callable[[Game], T]) -> T:
+    return await get_game_actor(game).submit(read, after_flush=True)
+
+
+def remove_game(game_id: str) -> None:
+    game_actor = _game_actors.pop(game_id, None)
+    if game_actor is not None:
+        game_actor.stop()
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import os
+import resource
+import time
+from collections.abc import Callable, Collection
+
+from server.game.core import Game
+from server.models.game import GameStatus
+from server.utils import metrics
+from server.utils.timer_wheel import TimerWheel
+
+logger = logging.getLogger(__name__)
+
+# Games are dropped once nothing has happened in them for the TTL of their status, e.g.
+# tables that never started or that everyone walked away from part way through
+GAME_NOT_STARTED_TTL_SECONDS = float(
+    os.environ.get("GAME_NOT_STARTED_TTL_SECONDS", "1800")
+)
+GAME_IN_PROGRESS_TTL_SECONDS = float(
+    os.environ.get("GAME_IN_PROGRESS_TTL_SECONDS", "3600")
+)
+GAME_COMPLETE_TTL_SECONDS = float(os.environ.get("GAME_COMPLETE_TTL_SECONDS", "600"))
+# How often idle games are looked for, which is also how late they can be dropped
+GAME_SWEEP_INTERVAL_SECONDS = float(os.environ.get("GAME_SWEEP_INTERVAL_SECONDS", "10"))
+
+DEFAULT_TTL_SECONDS = {
+    GameStatus.NOT_STARTED: GAME_NOT_STARTED_TTL_SECONDS,
+    GameStatus.IN_PROGRESS: GAME_IN_PROGRESS_TTL_SECONDS,
+    GameStatus.COMPLETE: GAME_COMPLETE_TTL_SECONDS,
+}
+
+# Enough slots to cover an hour at the default interval, past which games just come up
+# for a check once per trip around the wheel
+WHEEL_SLOTS = 360
+
+
+def get_resident_memory_bytes() -> int:
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Peak rather than current usage, but it's all that's available everywhere
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# Tracks when each game was last touched and drops the ones that have sat idle for too
+# long. Rather than a timer per game, one sweeper goes through a timer wheel every
+# interval, and only the games whose deadlines have come up are looked at.
+class GameEvictor:
+    ttl_seconds: dict[GameStatus, float]
+    get_game: Callable[[str], Game | None]
+    evict_game: Callable[[Game], None]
+    _clock: Callable[[], float]
+
+    _wheel: TimerWheel[str]
+    _last_touched: dict[str, float]
+    # When each game is due in the wheel, which is never later than its real deadline
+    _deadlines: dict[str, float]
+    task: asyncio.Task | None
+
+    def __init__(
+        self,
+        get_game: Callable[[str], Game | None],
+        evict_game: Callable[[Game], None],
+        ttl_seconds: dict[GameStatus, float] = DEFAULT_TTL_SECONDS,
+        sweep_interval_seconds: float = GAME_SWEEP_INTERVAL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.get_game = get_game
+        self.evict_game = evict_game
+        self._clock = clock
+
+        self._wheel = TimerWheel(sweep_interval_seconds, WHEEL_SLOTS, clock)
+        self._last_touched = {}
+        self._deadlines = {}
+        self.task = None
+
+    def get_deadline(self, game: Game) -> float:
+        return self._last_touched[game.game_id] + self.ttl_seconds[game.status]
+
+    # Later deadlines are picked up when the earlier one comes up, so only a deadline
+    # that moved up (e.g. a game that just finished) has to be scheduled again
+    def touch(self, game: Game) -> None:
+        self._last_touched[game.game_id] = self._clock()
+        deadline = self.get_deadline(game)
+        if deadline < self._deadlines.get(game.game_id, float("inf")):
+            self._schedule(game.game_id, deadline)
+
+    def _schedule(self, game_id: str, deadline: float) -> None:
+        self._deadlines[game_id] = deadline
+        self._wheel.schedule(game_id, deadline)
+
+    def forget(self, game_id: str) -> None:
+        self._last_touched.pop(game_id, None)
+        self._deadlines.pop(game_id, None)
+
+    def sweep(self) -> list[Game]:
+        now = self._clock()
+        evicted_games: list[Game] = []
+        for game_id in self._wheel.collect():
+            game = self.get_game(game_id)
+            if game is None or game_id not in self._last_touched:
+                continue
+
+            deadline = self.get_deadline(game)
+            if deadline > now:
+                self._schedule(game_id, deadline)
+                continue
+
+            evicted_games.append(game)
+            metrics.observe(f"games_evicted_{game.status.value.lower()}", 1)
+            try:
+                self.evict_game(game)
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Failed to evict %s", game_id)
+            self.forget(game_id)
+
+        return evicted_games
+
+    def set_gauges(self, games: Collection[Game]) -> None:
+        game_counts = dict.fromkeys(GameStatus, 0)
+        for game in games:
+            game_counts[game.status] += 1
+        for status, game_count in game_counts.items():
+            metrics.set_gauge(f"games_{status.value.lower()}", game_count)
+        metrics.set_gauge("process_resident_bytes", get_resident_memory_bytes())
+
+    def start(self, get_games: Callable[[], Collection[Game]]) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(self.run(get_games))
+
+    async def run(self, get_games: Callable[[], Collection[Game]]) -> None:
+        while True:
+            await asyncio.sleep(self._wheel.tick_seconds)
+            evicted_games = self.sweep()
+            if len(evicted_games) > 0:
+                logger.info("Evicted %s idle games", len(evicted_games))
+            self.set_gauges(get_games())
+
+    def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+        self.task = None
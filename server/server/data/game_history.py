@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import UTC, datetime
+from typing import Any
+
+import psycopg
+
+from server.game.core import Game
+from server.game.judgement import JudgementGame
+from server.models.game import GameName
+from server.utils import metrics
+
+from . import db
+
+logger = logging.getLogger(__name__)
+
+# Completed games waiting to be written. Once it's full, games that finish are dropped
+# rather than holding up the actors of the games that finish them.
+GAME_HISTORY_QUEUE_SIZE = int(os.environ.get("GAME_HISTORY_QUEUE_SIZE", "1024"))
+# Games written together in one transaction
+GAME_HISTORY_BATCH_SIZE = int(os.environ.get("GAME_HISTORY_BATCH_SIZE", "100"))
+# Attempts at writing a batch while the database is unavailable, and the longest wait
+# between two of them
+GAME_HISTORY_MAX_ATTEMPTS = int(os.environ.get("GAME_HISTORY_MAX_ATTEMPTS", "10"))
+GAME_HISTORY_MAX_RETRY_SECONDS = float(
+    os.environ.get("GAME_HISTORY_MAX_RETRY_SECONDS", "30")
+)
+
+GAMES_COPY = (
+    "COPY games (id, game_id, game_name, seed, num_decks, num_rounds, completed_at) "
+    "FROM STDIN"
+)
+GAME_PLAYERS_COPY = "COPY game_players (game_id, seat, player_id, score) FROM STDIN"
+GAME_ROUNDS_COPY = (
+    "COPY game_rounds (game_id, round_index, player_id, trump_suit, bid, won_tricks, "
+    "score) FROM STDIN"
+)
+
+
+# Everything that's written for one game, copied out of the game when it finished so that
+# the game itself can go away before it's written
+class GameRecord:
+    game_row: tuple[Any, ...]
+    player_rows: list[tuple[Any, ...]]
+    round_rows: list[tuple[Any, ...]]
+
+    def __init__(
+        self,
+        game_row: tuple[Any, ...],
+        player_rows: list[tuple[Any, ...]],
+        round_rows: list[tuple[Any, ...]],
+    ) -> None:
+        self.game_row = game_row
+        self.player_rows = player_rows
+        self.round_rows = round_rows
+
+
+def build_game_record(game: JudgementGame) -> GameRecord:
+    # Generated here so that every table can be copied without reading back ids
+    record_id = uuid.uuid4()
+    game_row = (
+        record_id,
+        game.game_id,
+        GameName.JUDGEMENT.value,
+        game.seed,
+        game.settings.num_decks,
+        game.settings.num_rounds,
+        datetime.now(UTC),
+    )
+    player_rows: list[tuple[Any, ...]] = [
+        (record_id, seat, player_id, game.player_states[player_id].score)
+        for seat, player_id in enumerate(game.ordered_player_ids)
+    ]
+    round_rows: list[tuple[Any, ...]] = [
+        (
+            record_id,
+            round_result.round_index,
+            player_id,
+            round_result.trump_suit.value,
+            round_result.bids.get(player_id),
+            round_result.won_tricks.get(player_id, 0),
+            round_result.round_scores.get(player_id, 0),
+        )
+        for round_result in game.round_results
+        for player_id in game.ordered_player_ids
+    ]
+
+    return GameRecord(game_row, player_rows, round_rows)
+
+
+# Writes completed games in the background, batching every game that finished since the
+# last write into one COPY per table. A batch that fails because the database is
+# unavailable is retried with backoff, while games that finish in the meantime queue up
+# behind it. One that fails any other way, or runs out of attempts, is logged and
+# dropped so that it doesn't hold up the rest.
+class GameHistoryWriter:
+    queue: asyncio.Queue[GameRecord]
+    batch_size: int
+    min_retry_seconds: float
+    max_attempts: int
+    task: asyncio.Task | None
+
+    def __init__(
+        self,
+        queue_size: int = GAME_HISTORY_QUEUE_SIZE,
+        batch_size: int = GAME_HISTORY_BATCH_SIZE,
+        min_retry_seconds: float = 0.5,
+        max_attempts: int = GAME_HISTORY_MAX_ATTEMPTS,
+    ) -> None:
+        self.queue = asyncio.Queue(queue_size)
+        self.batch_size = batch_size
+        self.min_retry_seconds = min_retry_seconds
+        self.max_attempts = max_attempts
+        self.task = None
+
+    def record(self, game_record: GameRecord) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+        try:
+            self.queue.put_nowait(game_record)
+        except asyncio.QueueFull:
+            metrics.observe("game_history_queue_full", 1)
+            logger.error(
+                "Dropped completed game %s since the history queue is full",
+                game_record.game_row[1],
+            )
+            return
+        metrics.set_gauge("game_history_queue_depth", self.queue.qsize())
+
+    async def run(self) -> None:
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            await self.write(batch)
+            for _ in batch:
+                self.queue.task_done()
+            metrics.set_gauge("game_history_queue_depth", self.queue.qsize())
+
+    async def write(self, batch: list[GameRecord]) -> None:
+        retry_seconds = self.min_retry_seconds
+        attempt = 1
+        while True:
+            try:
+                with metrics.time_block("game_history_write_seconds"):
+                    await write_game_records(batch)
+                metrics.observe("game_history_batch_size", len(batch))
+                return
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                metrics.observe("game_history_write_failures", 1)
+                if (
+                    isinstance(error, psycopg.OperationalError)
+                    and attempt < self.max_attempts
+                ):
+                    logger.exception(
+                        "Failed to write %s games, retrying in %.1fs",
+                        len(batch),
+                        retry_seconds,
+                    )
+                    await asyncio.sleep(retry_seconds)
+                    retry_seconds = min(retry_seconds * 2, GAME_HISTORY_MAX_RETRY_SECONDS)
+                    attempt += 1
+                    continue
+
+                metrics.observe("game_history_dropped_games", len(batch))
+                logger.exception(
+                    "Dropped %s completed games that couldn't be written: %s",
+                    len(batch),
+                    [game_record.game_row for game_record in batch],
+                )
+                return
+
+    # Gives whatever is queued up to timeout_seconds to be written before stopping
+    async def stop(self, timeout_seconds: float) -> None:
+        if self.task is None:
+            return
+
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout_seconds)
+        except TimeoutError:
+            logger.error(
+                "Dropped %s completed games that weren't written", self.queue.qsize()
+            )
+        self.task.cancel()
+        self.task = None
+
+
+async def write_game_records(game_records: list[GameRecord]) -> None:
+    async with (
+        db.get_pool().connection() as conn,
+        conn.transaction(),
+        conn.cursor() as cur,
+    ):
+        async with cur.copy(GAMES_COPY) as copy:
+            for game_record in game_records:
+                await copy.write_row(game_record.game_row)
+        async with cur.copy(GAME_PLAYERS_COPY) as copy:
+            for game_record in game_records:
+                for player_row in game_record.player_rows:
+                    await copy.write_row(player_row)
+        async with cur.copy(GAME_ROUNDS_COPY) as copy:
+            for game_record in game_records:
+                for round_row in game_record.round_rows:
+                    await copy.write_row(round_row)
+
+
+_writer = GameHistoryWriter()
+
+
+# Only finished Judgement games have anything to record
+def record_game(game: Game) -> None:
+    if isinstance(game, JudgementGame):
+        _writer.record(build_game_record(game))
+
+
+async def stop(timeout_seconds: float = 5) -> None:
+    await _writer.stop(timeout_seconds)
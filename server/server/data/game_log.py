@@ -0,0 +1,324 @@
+import argparse
+import asyncio
+import glob
+import json
+import logging
+import os
+import sys
+from collections.abc import Iterator
+from typing import Any, cast
+
+import msgpack
+
+from server.game.core import Game, GameLogEntry, GameLogEntryType
+from server.game.decks import get_deal_seed
+from server.game.judgement import JudgementGame
+from server.models.game import GameName, GamePlayerType
+from server.utils import metrics
+from server.utils.debug_encoder import dump_class
+
+logger = logging.getLogger(__name__)
+
+# Every accepted change to a game is appended to a log file for the game in
+# GAME_LOG_DIR. Changes are written and synced to disk together every
+# GAME_LOG_FLUSH_INTERVAL_SECONDS, so a crash loses at most that much of each log.
+GAME_LOG_DIR = os.environ.get("GAME_LOG_DIR", "/tmp/judgement-game-logs")
+GAME_LOG_FLUSH_INTERVAL_SECONDS = float(
+    os.environ.get("GAME_LOG_FLUSH_INTERVAL_SECONDS", "0.25")
+)
+
+# Bumped whenever the meaning of a log entry changes
+LOG_FORMAT = 1
+
+
+# Logs are a MessagePack header, [format, game name, game id, seed], followed by one
+# MessagePack array per entry, [state version, entry type, player id, data]
+def encode_header(game: JudgementGame) -> bytes:
+    return msgpack.packb([LOG_FORMAT, GameName.JUDGEMENT.value, game.game_id, game.seed])
+
+
+def encode_entry(log_entry: GameLogEntry) -> bytes:
+    return msgpack.packb(
+        [
+            log_entry.state_version,
+            log_entry.entry_type.value,
+            log_entry.player_id,
+            log_entry.data,
+        ]
+    )
+
+
+# Game ids are reused once their games are gone, so logs are also keyed by seed
+def get_log_path(log_dir: str, game_id: str, seed: int) -> str:
+    return os.path.join(log_dir, f"{game_id}-{seed:016x}.log")
+
+
+def find_log_paths(game_id: str, log_dir: str = GAME_LOG_DIR) -> list[str]:
+    return sorted(
+        glob.glob(os.path.join(glob.escape(log_dir), f"{glob.escape(game_id)}-*.log")),
+        key=os.path.getmtime,
+    )
+
+
+def read_records(path: str) -> Iterator[tuple[int, Any]]:
+    with open(path, "rb") as log_file:
+        unpacker = msgpack.Unpacker(log_file)
+        for record in unpacker:
+            yield unpacker.tell(), record
+
+
+# A crash part way through a write can leave the end of a log cut off, which is dropped
+# before anything more is appended to it
+def truncate_partial_record(path: str) -> None:
+    complete_length = 0
+    for record_end, _ in read_records(path):
+        complete_length = record_end
+
+    if complete_length < os.path.getsize(path):
+        logger.warning("Dropping the partial last entry of %s", path)
+        os.truncate(path, complete_length)
+
+
+def write_logs(
+    pending_logs: dict[str, tuple[bytes, list[bytes]]], new_paths: set[str]
+) -> None:
+    created_log_dirs: set[str] = set()
+    for path, (header, records) in pending_logs.items():
+        if path in new_paths and os.path.exists(path):
+            truncate_partial_record(path)
+
+        created = not os.path.exists(path)
+        with open(path, "ab") as log_file:
+            if created:
+                log_file.write(header)
+            log_file.write(b"".join(records))
+            log_file.flush()
+            os.fsync(log_file.fileno())
+        if created:
+            created_log_dirs.add(os.path.dirname(path))
+
+    # New files also need their directory entries synced to survive a crash
+    for log_dir in created_log_dirs:
+        dir_fd = os.open(log_dir, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+# Entries are encoded as games hand them off and buffered per log, then every interval
+# all the buffered entries are appended and synced from a worker thread in one go
+class GameLogWriter:
+    log_dir: str
+    flush_interval_seconds: float
+
+    # log path -> header and encoded entries waiting to be written
+    pending_logs: dict[str, tuple[bytes, list[bytes]]]
+    # Logs that have been written to by this process
+    written_paths: set[str]
+    task: asyncio.Task | None
+
+    def __init__(
+        self,
+        log_dir: str,
+        flush_interval_seconds: float = GAME_LOG_FLUSH_INTERVAL_SECONDS,
+    ) -> None:
+        self.log_dir = log_dir
+        self.flush_interval_seconds = flush_interval_seconds
+
+        self.pending_logs = {}
+        self.written_paths = set()
+        self.task = None
+
+    def append(self, game: Game, log_entries: list[GameLogEntry]) -> None:
+        if not isinstance(game, JudgementGame) or len(log_entries) == 0:
+            return
+
+        path = get_log_path(self.log_dir, game.game_id, game.seed)
+        if path not in self.pending_logs:
+            self.pending_logs[path] = (encode_header(game), [])
+        self.pending_logs[path][1].extend(map(encode_entry, log_entries))
+
+    def start(self) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            try:
+                await self.flush()
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Failed to write game logs")
+
+    async def flush(self) -> None:
+        if len(self.pending_logs) == 0:
+            return
+
+        pending_logs, self.pending_logs = self.pending_logs, {}
+        new_paths = pending_logs.keys() - self.written_paths
+        try:
+            with metrics.time_block("game_log_flush_seconds"):
+                await asyncio.to_thread(write_logs, pending_logs, new_paths)
+        except Exception:
+            # Logs that did get written are written again, which replaying treats the
+            # same as a game that was restored from before them
+            for path, (header, records) in self.pending_logs.items():
+                pending_logs.setdefault(path, (header, []))[1].extend(records)
+            self.pending_logs = pending_logs
+            raise
+
+        self.written_paths |= new_paths
+        metrics.observe("game_log_flush_games", len(pending_logs))
+        metrics.observe(
+            "game_log_flush_entries",
+            sum(len(records) for _, records in pending_logs.values()),
+        )
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        await self.flush()
+
+
+class GameLog:
+    game_name: GameName
+    game_id: str
+    seed: int
+    entries: list[GameLogEntry]
+
+    def __init__(
+        self, game_name: GameName, game_id: str, seed: int, entries: list[GameLogEntry]
+    ) -> None:
+        self.game_name = game_name
+        self.game_id = game_id
+        self.seed = seed
+        self.entries = entries
+
+
+def read_game_log(path: str) -> GameLog:
+    records = (record for _, record in read_records(path))
+    log_format, game_name, game_id, seed = next(records)
+    if log_format != LOG_FORMAT:
+        raise ValueError(f"Unsupported game log format: {log_format}")
+
+    entries: list[GameLogEntry] = []
+    last_state_version = -1
+    for state_version, entry_type, player_id, data in records:
+        log_entry = GameLogEntry(
+            state_version, GameLogEntryType(entry_type), player_id, data
+        )
+
+        # A game that's restored from a snapshot taken before the end of its log logs
+        # the versions after the snapshot again, which replace the ones that were lost
+        if state_version <= last_state_version and entry_type != GameLogEntryType.DEAL:
+            entries = [
+                kept_entry
+                for kept_entry in entries
+                if kept_entry.state_version < state_version
+            ]
+        entries.append(log_entry)
+        last_state_version = state_version
+
+    return GameLog(GameName(game_name), game_id, seed, entries)
+
+
+def apply_entry(game: JudgementGame, log_entry: GameLogEntry) -> None:
+    if log_entry.entry_type == GameLogEntryType.DEAL:
+        round_index, deal_seed = log_entry.data
+        if (
+            game.current_round != round_index
+            or get_deal_seed(game.seed, round_index) != deal_seed
+        ):
+            raise ValueError(f"Round {round_index} was dealt differently")
+        return
+
+    player_id = cast(int, log_entry.player_id)
+    if log_entry.entry_type == GameLogEntryType.ADD_PLAYER:
+        game.add_player(player_id, GamePlayerType(log_entry.data))
+    elif log_entry.entry_type == GameLogEntryType.REMOVE_PLAYER:
+        game.remove_player(player_id)
+    elif log_entry.entry_type == GameLogEntryType.START_GAME:
+        game.start_game()
+    elif log_entry.entry_type == GameLogEntryType.INPUT:
+        game.process_raw_input(player_id, log_entry.data)
+
+    if game.state_version != log_entry.state_version:
+        raise ValueError(
+            f"Replay reached version {game.state_version} instead of "
+            f"{log_entry.state_version}"
+        )
+
+
+# Rebuilds the game as it was at state_version (or at the end of its log) by running
+# every logged change through the game again
+def replay_game(game_log: GameLog, state_version: int | None = None) -> JudgementGame:
+    if game_log.game_name != GameName.JUDGEMENT:
+        raise ValueError(f"Can't replay {game_log.game_name} games")
+
+    game = JudgementGame(game_log.game_id, seed=game_log.seed)
+    for log_entry in game_log.entries:
+        if state_version is not None and log_entry.state_version > state_version:
+            break
+        apply_entry(game, log_entry)
+
+    return game
+
+
+_writer: GameLogWriter | None = None
+
+
+def append(game: Game, log_entries: list[GameLogEntry]) -> None:
+    if _writer is not None:
+        _writer.append(game, log_entries)
+
+
+# Logging is turned off by setting GAME_LOG_DIR to an empty string
+def start(log_dir: str = GAME_LOG_DIR) -> None:
+    global _writer
+    if log_dir == "" or _writer is not None:
+        return
+
+    os.makedirs(log_dir, exist_ok=True)
+    _writer = GameLogWriter(log_dir)
+    _writer.start()
+
+
+async def stop() -> None:
+    global _writer
+    if _writer is not None:
+        await _writer.stop()
+    _writer = None
+
+
+# Outputs a game as it was at a version, with every hidden card, e.g.
+# python -m server.data.game_log ABCD --version 40
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a game from its log")
+    parser.add_argument("game", help="a game id, or the path to a game log")
+    parser.add_argument("--version", type=int, help="defaults to the end of the log")
+    parser.add_argument("--log_dir", default=GAME_LOG_DIR)
+    args = parser.parse_args()
+
+    if os.path.exists(args.game):
+        path = args.game
+    else:
+        paths = find_log_paths(args.game, args.log_dir)
+        if len(paths) == 0:
+            parser.error(f"No logs for {args.game} in {args.log_dir}")
+        # The most recent game that had this id
+        path = paths[-1]
+
+    game = replay_game(read_game_log(path), args.version)
+    # Written straight to stdout rather than logged so that it can be piped, e.g. into jq
+    json.dump(
+        dump_class(game, exclude={"_debug_state_dump", "events", "log_entries"}),
+        sys.stdout,
+        indent=2,
+    )
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
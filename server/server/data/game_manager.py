@@ -1,12 +1,31 @@
+import logging
+import os
 import random
 import string
-
+from typing import Any
+
+from server.data import (
+    bot_manager,
+    game_actor,
+    game_evictor,
+    game_snapshots,
+    shard_manager,
+    socket_messager,
+)
 from server.game.core import Game
 from server.game.judgement import JudgementGame
-from server.models.game import GameName
+from server.models.game import GameName, GamePlayerType, GameStatus
+from server.models.websocket import WireFormat
 
 from . import ROOM_ID_LENGTH
 
+logger = logging.getLogger(__name__)
+
+DEBUG_GAME_STATE = os.environ.get("DEBUG_GAME_STATE", "false").lower() == "true"
+# Finished games that are evicted for sitting idle are saved to the snapshot store's
+# archive first
+ARCHIVE_EVICTED_GAMES = os.environ.get("ARCHIVE_EVICTED_GAMES", "false").lower() == "true"
+
 games: dict[str, Game] = {}
 
 
@@ -24,23 +43,135 @@ def get_game(game_id: str) -> Game:
     return games[game_id]
 
 
-def create_game(game_name: GameName) -> Game:
+# Games are only ever created by the shard that will own them, so ids are drawn until
+# one lands on this shard
+def create_game(game_name: GameName, debug_state: bool = DEBUG_GAME_STATE) -> Game:
     game_id = generate_id()
-    while game_exists(game_id):
+    while game_exists(game_id) or not shard_manager.is_local_game(game_id):
         game_id = generate_id()
 
     if game_name == GameName.JUDGEMENT:
         games[game_id] = JudgementGame(game_id)
     else:
         raise ValueError(f"Unrecognized game name ({game_name})")
+    games[game_id].debug_state = debug_state
+    games[game_id].record_events = True
+    games[game_id].record_log = True
+    game_actor.add_game(games[game_id])
+    game_snapshots.add_game(game_id)
+    _evictor.touch(games[game_id])
 
     return games[game_id]
 
 
 def delete_game(game_id: str) -> None:
     del games[game_id]
+    bot_manager.remove_game(game_id)
+    game_actor.remove_game(game_id)
+    socket_messager.forget_game(game_id)
+    game_snapshots.forget_game(game_id)
+    _evictor.forget(game_id)
+
+
+def evict_game(game: Game) -> None:
+    if ARCHIVE_EVICTED_GAMES and game.status == GameStatus.COMPLETE:
+        game_snapshots.archive_game(game)
+    delete_game(game.game_id)
+
+
+_evictor = game_evictor.GameEvictor(lambda game_id: games.get(game_id), evict_game)
+
+
+def start_evicting_games() -> None:
+    _evictor.start(games.values)
+
+
+def stop_evicting_games() -> None:
+    _evictor.stop()
+
+
+# Puts the games that were saved before the server last stopped back into play
+async def restore_games() -> None:
+    restored_games = await game_snapshots.start()
+    for game in restored_games:
+        games[game.game_id] = game
+        game_actor.add_game(game)
+        bot_manager.restore_game(game)
+        _evictor.touch(game)
+
+    if len(restored_games) > 0:
+        logger.info("Restored %s games", len(restored_games))
+
+
+# Everything below can be called from any shard and runs on the one that owns the game.
+# Anything done in a game holds off its eviction.
+
+
+@shard_manager.on_game_shard
+async def has_game(game_id: str) -> bool:
+    return game_exists(game_id)
 
 
+@shard_manager.on_game_shard
+async def join_game(game_id: str, player_id: int) -> GamePlayerType:
+    def join(game: Game) -> GamePlayerType:
+        if game.is_in_game(player_id):
+            bot_manager.release_player(game, player_id)
+        else:
+            game.add_player(player_id)
+        return game.players[player_id].player_type
+
+    game = get_game(game_id)
+    player_type = await game_actor.submit(game, join)
+    _evictor.touch(game)
+    return player_type
+
+
+@shard_manager.on_game_shard
+async def leave_game(game_id: str, player_id: int) -> None:
+    game = get_game(game_id)
+    await game_actor.submit(game, lambda game: game.remove_player(player_id))
+    _evictor.touch(game)
+
+
+@shard_manager.on_game_shard
 async def start_game(game_id: str) -> None:
     game = get_game(game_id)
-    await game.start_game()
+    await game_actor.submit(game, lambda game: game.start_game())
+    _evictor.touch(game)
+    bot_manager.schedule_bot_turns(game)
+
+
+@shard_manager.on_game_shard
+async def add_bot(game_id: str, player_id: int) -> None:
+    game = get_game(game_id)
+    await game_actor.submit(game, lambda game: bot_manager.add_bot(game, player_id))
+    _evictor.touch(game)
+
+
+@shard_manager.on_game_shard
+async def process_input(game_id: str, player_id: int, action: dict[str, Any]) -> None:
+    game = get_game(game_id)
+    await game_actor.submit(game, lambda game: game.process_raw_input(player_id, action))
+    _evictor.touch(game)
+    bot_manager.schedule_bot_turns(game)
+
+
+@shard_manager.on_game_shard
+async def take_over_player(game_id: str, player_id: int) -> None:
+    if game_exists(game_id):
+        bot_manager.take_over_player(get_game(game_id), player_id)
+
+
+@shard_manager.on_game_shard
+async def send_game_state_snapshot(
+    game_id: str, player_id: int, client_id: str, wire_format: WireFormat
+) -> None:
+    game = get_game(game_id)
+    _evictor.touch(game)
+    message = await game_actor.submit_after_flush(
+        game,
+        lambda game: socket_messager.get_game_state_snapshot_message(game, player_id),
+    )
+    if message is not None:
+        await socket_messager.emit_to_client(message, client_id, wire_format)
@@ -0,0 +1,367 @@
+import asyncio
+import gc
+import logging
+import os
+import pickle
+import sqlite3
+import time
+import zlib
+from collections.abc import Iterable
+from contextlib import suppress
+
+from server.data import shard_manager
+from server.game.core import Game
+from server.models.game import GameStatus
+from server.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Unfinished games are saved to a local SQLite file so that they can be picked back up
+# after the server restarts. Each game is saved at most once every
+# GAME_SNAPSHOT_INTERVAL_SECONDS however many actions it takes in between, so a crash
+# loses at most that much of each game.
+GAME_SNAPSHOT_PATH = os.environ.get("GAME_SNAPSHOT_PATH", "/tmp/judgement-games.sqlite3")
+GAME_SNAPSHOT_INTERVAL_SECONDS = float(
+    os.environ.get("GAME_SNAPSHOT_INTERVAL_SECONDS", "2")
+)
+
+# Bumped whenever the attributes of a game change shape, which skips older snapshots
+# rather than restoring games that the current code can't play
+SNAPSHOT_FORMAT = 3
+
+# Games encoded between each chance for other tasks to run
+SNAPSHOT_ENCODE_BATCH_SIZE = 100
+
+# Caches that are rebuilt on demand, and events and log entries that were already handed
+# off
+TRANSIENT_ATTRIBUTES = frozenset({"_debug_state_dump", "events", "log_entries"})
+
+
+# Snapshots are compressed (to about half their size) by the store, which does it off the
+# event loop
+def encode_game(game: Game) -> bytes:
+    state = {
+        name: value
+        for name, value in vars(game).items()
+        if name not in TRANSIENT_ATTRIBUTES
+    }
+    return pickle.dumps((type(game), state), pickle.HIGHEST_PROTOCOL)
+
+
+def decode_game(snapshot: bytes) -> Game:
+    game_cls, state = pickle.loads(snapshot)
+    game: Game = game_cls.__new__(game_cls)
+    game.__dict__.update(state)
+    game._debug_state_dump = None
+    game.events = []
+    game.log_entries = []
+    return game
+
+
+# Only ever used by one thread at a time: either the restore on startup or the writer
+class GameSnapshotStore:
+    path: str
+    connection: sqlite3.Connection
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        # Commits survive the process crashing without waiting on a disk flush each time
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.execute("PRAGMA busy_timeout = 5000")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS game_snapshots("
+            "game_id TEXT PRIMARY KEY, format INTEGER NOT NULL, "
+            "state_version INTEGER NOT NULL, snapshot BLOB NOT NULL)"
+        )
+        # Finished games that were kept after they were dropped. Game ids are reused, so
+        # one id can have several.
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS game_archive("
+            "game_id TEXT NOT NULL, format INTEGER NOT NULL, archived_at REAL NOT NULL, "
+            "snapshot BLOB NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS game_archive_game_id ON game_archive(game_id)"
+        )
+        self.connection.commit()
+
+    # Returns the number of bytes written
+    def write(
+        self,
+        snapshots: Iterable[tuple[str, int, bytes]],
+        deleted_game_ids: Iterable[str],
+        archived_games: Iterable[tuple[str, bytes]] = (),
+    ) -> int:
+        rows = [
+            (game_id, SNAPSHOT_FORMAT, state_version, zlib.compress(snapshot, 1))
+            for game_id, state_version, snapshot in snapshots
+        ]
+        archive_rows = [
+            (game_id, SNAPSHOT_FORMAT, time.time(), zlib.compress(snapshot, 1))
+            for game_id, snapshot in archived_games
+        ]
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO game_snapshots VALUES(?, ?, ?, ?)", rows
+            )
+            self.connection.executemany(
+                "DELETE FROM game_snapshots WHERE game_id = ?",
+                ((game_id,) for game_id in deleted_game_ids),
+            )
+            self.connection.executemany(
+                "INSERT INTO game_archive VALUES(?, ?, ?, ?)", archive_rows
+            )
+
+        return sum(len(row[3]) for row in rows + archive_rows)
+
+    def load(self) -> list[tuple[str, bytes]]:
+        rows = self.connection.execute(
+            "SELECT game_id, snapshot FROM game_snapshots WHERE format = ?",
+            (SNAPSHOT_FORMAT,),
+        ).fetchall()
+        return [(game_id, zlib.decompress(snapshot)) for game_id, snapshot in rows]
+
+    # Every archived game with this id, oldest first
+    def load_archived(self, game_id: str) -> list[bytes]:
+        rows = self.connection.execute(
+            "SELECT snapshot FROM game_archive WHERE game_id = ? AND format = ? "
+            "ORDER BY archived_at",
+            (game_id, SNAPSHOT_FORMAT),
+        ).fetchall()
+        return [zlib.decompress(snapshot) for (snapshot,) in rows]
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+# Write-behind for game snapshots. Games are marked dirty as they change, and every
+# interval the latest state of each dirty game is written in one transaction. Games that
+# finish or go away have their snapshots deleted instead.
+class GameSnapshotter:
+    store: GameSnapshotStore
+    interval_seconds: float
+
+    dirty_games: dict[str, Game]
+    deleted_game_ids: set[str]
+    forgotten_game_ids: set[str]
+    archived_games: list[tuple[str, bytes]]
+    written_versions: dict[str, int]
+    task: asyncio.Task | None
+    write_task: asyncio.Task | None
+
+    def __init__(
+        self,
+        store: GameSnapshotStore,
+        interval_seconds: float = GAME_SNAPSHOT_INTERVAL_SECONDS,
+    ) -> None:
+        self.store = store
+        self.interval_seconds = interval_seconds
+
+        self.dirty_games = {}
+        self.deleted_game_ids = set()
+        self.forgotten_game_ids = set()
+        self.archived_games = []
+        self.written_versions = {}
+        self.task = None
+        self.write_task = None
+
+    # Forgotten games stay out of the store until their id is taken by a new game
+    def add_game(self, game_id: str) -> None:
+        self.forgotten_game_ids.discard(game_id)
+
+    def mark_dirty(self, game: Game) -> None:
+        if (
+            game.game_id not in self.forgotten_game_ids
+            and self.written_versions.get(game.game_id) != game.state_version
+        ):
+            self.dirty_games[game.game_id] = game
+            self.deleted_game_ids.discard(game.game_id)
+
+    # Also covers a snapshot of the game that's being written right now
+    def forget_game(self, game_id: str) -> None:
+        self.dirty_games.pop(game_id, None)
+        self.written_versions.pop(game_id, None)
+        self.deleted_game_ids.add(game_id)
+        self.forgotten_game_ids.add(game_id)
+
+    # Encoded right away since the game is about to be dropped
+    def archive_game(self, game: Game) -> None:
+        self.archived_games.append((game.game_id, encode_game(game)))
+
+    def start(self) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.flush()
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Failed to write game snapshots")
+
+    # Games are encoded here on the event loop, between actions, a few at a time so that
+    # lots of dirty games don't hold up the games being played. Everything else happens
+    # in a worker thread.
+    async def flush(self) -> None:
+        if (
+            len(self.dirty_games) == 0
+            and len(self.deleted_game_ids) == 0
+            and len(self.archived_games) == 0
+        ):
+            return
+
+        dirty_games, self.dirty_games = self.dirty_games, {}
+        snapshots: list[tuple[str, int, bytes]] = []
+        try:
+            for i, (game_id, game) in enumerate(dirty_games.items()):
+                if i > 0 and i % SNAPSHOT_ENCODE_BATCH_SIZE == 0:
+                    await asyncio.sleep(0)
+
+                if game.status == GameStatus.COMPLETE:
+                    self.forget_game(game_id)
+                else:
+                    snapshots.append((game_id, game.state_version, encode_game(game)))
+        except BaseException:
+            self.restore_batch(dirty_games, set(), [])
+            raise
+        deleted_game_ids, self.deleted_game_ids = self.deleted_game_ids, set()
+        archived_games, self.archived_games = self.archived_games, []
+
+        # The thread can't be interrupted, so the write finishes (and either records what
+        # was written or hands the batch back) even if this flush is cancelled
+        self.write_task = asyncio.create_task(
+            self.write(dirty_games, snapshots, deleted_game_ids, archived_games)
+        )
+        await asyncio.shield(self.write_task)
+
+    async def write(
+        self,
+        dirty_games: dict[str, Game],
+        snapshots: list[tuple[str, int, bytes]],
+        deleted_game_ids: set[str],
+        archived_games: list[tuple[str, bytes]],
+    ) -> None:
+        try:
+            with metrics.time_block("game_snapshot_write_seconds"):
+                num_bytes = await asyncio.to_thread(
+                    self.store.write, snapshots, deleted_game_ids, archived_games
+                )
+        except Exception:
+            self.restore_batch(dirty_games, deleted_game_ids, archived_games)
+            raise
+
+        for game_id, state_version, _ in snapshots:
+            if game_id not in self.deleted_game_ids:
+                self.written_versions[game_id] = state_version
+        metrics.observe("game_snapshot_batch_size", len(snapshots))
+        metrics.observe("game_snapshot_batch_bytes", num_bytes)
+
+    # Puts back a batch that wasn't written. Whatever changed in the meantime is newer
+    # than the batch.
+    def restore_batch(
+        self,
+        dirty_games: dict[str, Game],
+        deleted_game_ids: set[str],
+        archived_games: list[tuple[str, bytes]],
+    ) -> None:
+        for game_id, game in dirty_games.items():
+            if game_id not in self.forgotten_game_ids:
+                self.dirty_games.setdefault(game_id, game)
+        self.deleted_game_ids |= deleted_game_ids - self.dirty_games.keys()
+        self.archived_games[:0] = archived_games
+
+    # Waits for a write that's already under way so that the final flush comes after it
+    # and the store isn't closed underneath it
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.task
+            self.task = None
+        if self.write_task is not None:
+            with suppress(Exception):
+                await self.write_task
+            self.write_task = None
+        await self.flush()
+
+
+# Each shard process decodes only the games it owns, so with several shards the games are
+# restored in parallel. Decoding creates lots of small objects that would otherwise set
+# off the garbage collector over and over (more than doubling the time it takes), and
+# none of them are garbage, so it's paused while they're created.
+def load_local_games(store: GameSnapshotStore) -> list[Game]:
+    snapshots = [
+        snapshot
+        for game_id, snapshot in store.load()
+        if shard_manager.is_local_game(game_id)
+    ]
+
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return [decode_game(snapshot) for snapshot in snapshots]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+async def load_games(store: GameSnapshotStore) -> list[Game]:
+    return await asyncio.to_thread(load_local_games, store)
+
+
+_snapshotter: GameSnapshotter | None = None
+
+
+def add_game(game_id: str) -> None:
+    if _snapshotter is not None:
+        _snapshotter.add_game(game_id)
+
+
+def mark_dirty(game: Game) -> None:
+    if _snapshotter is not None:
+        _snapshotter.mark_dirty(game)
+
+
+def forget_game(game_id: str) -> None:
+    if _snapshotter is not None:
+        _snapshotter.forget_game(game_id)
+
+
+def archive_game(game: Game) -> None:
+    if _snapshotter is not None:
+        _snapshotter.archive_game(game)
+
+
+# Opens the store and returns the unfinished games saved in it, then keeps it up to date
+# with the games that were restored and any that are created from here on. Snapshots are
+# turned off by setting GAME_SNAPSHOT_PATH to an empty string.
+async def start(path: str = GAME_SNAPSHOT_PATH) -> list[Game]:
+    global _snapshotter
+    if path == "":
+        return []
+
+    store = GameSnapshotStore(path)
+    with metrics.time_block("game_snapshot_restore_seconds"):
+        games = await load_games(store)
+
+    _snapshotter = GameSnapshotter(store)
+    for game in games:
+        _snapshotter.written_versions[game.game_id] = game.state_version
+    _snapshotter.start()
+
+    return games
+
+
+async def stop() -> None:
+    global _snapshotter
+    if _snapshotter is None:
+        return
+
+    try:
+        await _snapshotter.stop()
+    finally:
+        _snapshotter.store.close()
+        _snapshotter = None
@@ -0,0 +1,319 @@
+import functools
+import json
+from collections import deque
+from collections.abc import Callable
+from typing import Any
+
+from server.data.wire_message import WireMessage
+from server.game.core import Game
+from server.models.game import GamePlayerType
+from server.utils.state_diff import StateChange, diff_states
+
+GAME_STATE_EVENT = "game_state"
+GAME_STATE_DELTA_EVENT = "game_state_delta"
+
+PLAYER_TYPE_KEY = "playerType"
+
+
+def dump_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+def dump_changes(changes: list[StateChange]) -> list[str]:
+    return [dump_json({"path": path, "value": value}) for path, value in changes]
+
+
+# The JSON payloads are spliced together from pieces that are shared between recipients,
+# so the state and changes are only turned into data for other wire formats on demand
+def build_snapshot_message(
+    version: int, state_json: str, get_state: Callable[[], dict[str, Any]]
+) -> WireMessage:
+    return WireMessage(
+        GAME_STATE_EVENT,
+        f'{{"version":{version},"state":{state_json}}}',
+        lambda: {"version": version, "state": get_state()},
+    )
+
+
+def build_delta_message(
+    base_version: int, version: int, change_jsons: list[str], changes: list[StateChange]
+) -> WireMessage:
+    return WireMessage(
+        GAME_STATE_DELTA_EVENT,
+        (
+            f'{{"baseVersion":{base_version},"version":{version},'
+            f'"changes":[{",".join(change_jsons)}]}}'
+        ),
+        lambda: {
+            "baseVersion": base_version,
+            "version": version,
+            "changes": [{"path": path, "value": value} for path, value in changes],
+        },
+    )
+
+
+def merge_state_json(shared_state_json: str, state: dict[str, Any]) -> str:
+    state_json = dump_json(state)
+    if state_json == "{}":
+        return shared_state_json
+    if shared_state_json == "{}":
+        return state_json
+
+    return f"{shared_state_json[:-1]},{state_json[1:]}"
+
+
+def merge_states(
+    public_state: dict[str, Any], private_state: dict[str, Any]
+) -> dict[str, Any]:
+    return {**public_state, **private_state}
+
+
+class GameStateUpdate:
+    public_state: dict[str, Any]
+    public_version: int
+    # The public version spectator_message applies to, or None if it's a snapshot
+    public_base_version: int | None
+
+    # Shared by every spectator, byte for byte
+    spectator_message: WireMessage | None
+    player_messages: dict[int, WireMessage]
+
+    def __init__(self, public_state: dict[str, Any], public_version: int) -> None:
+        self.public_state = public_state
+        self.public_version = public_version
+        self.public_base_version = None
+
+        self.spectator_message = None
+        self.player_messages = {}
+
+
+# Tracks what each recipient of a game was last sent so that every update only carries
+# what changed since. The public state (i.e. the spectator view) is dumped, diffed and
+# serialized once per update no matter how many recipients there are, and only each
+# player's private state is handled per player.
+class GameStateSync:
+    public_version: int
+    public_state: dict[str, Any] | None
+    # The public state without its player type, which is what players and spectators
+    # have in common
+    shared_state_json: str
+
+    # player id -> the version and private state last sent to that player
+    private_states: dict[int, tuple[int, dict[str, Any]]]
+
+    def __init__(self) -> None:
+        self.public_version = 0
+        self.public_state = None
+        self.shared_state_json = "{}"
+
+        self.private_states = {}
+
+    def update(self, game: Game) -> GameStateUpdate:
+        public_state = game.build_public_game_state().model_dump(
+            mode="json", by_alias=True
+        )
+        public_changes = (
+            [([], public_state)]
+            if self.public_state is None
+            else diff_states(self.public_state, public_state)
+        )
+        public_delta_changes: list[StateChange] = []
+        public_change_jsons: list[str] = []
+        spectator_message: WireMessage | None = None
+        public_base_version: int | None = None
+        if len(public_changes) > 0:
+            self.shared_state_json = dump_json(
+                {
+                    key: value
+                    for key, value in public_state.items()
+                    if key != PLAYER_TYPE_KEY
+                }
+            )
+            if self.public_state is None:
+                spectator_message = build_snapshot_message(
+                    game.state_version,
+                    merge_state_json(
+                        self.shared_state_json,
+                        {PLAYER_TYPE_KEY: public_state[PLAYER_TYPE_KEY]},
+                    ),
+                    lambda: public_state,
+                )
+            else:
+                public_base_version = self.public_version
+                public_delta_changes = public_changes
+                public_change_jsons = dump_changes(public_changes)
+                spectator_message = build_delta_message(
+                    self.public_version,
+                    game.state_version,
+                    public_change_jsons,
+                    public_changes,
+                )
+            self.public_version = game.state_version
+        self.public_state = public_state
+
+        game_state_update = GameStateUpdate(public_state, self.public_version)
+        game_state_update.public_base_version = public_base_version
+        game_state_update.spectator_message = spectator_message
+
+        player_ids = {
+            player_id
+            for player_id, player in game.players.items()
+            if player.player_type == GamePlayerType.PLAYER
+        }
+        for player_id in self.private_states.keys() - player_ids:
+            del self.private_states[player_id]
+
+        for player_id in player_ids:
+            private_state = game.build_private_game_state(player_id).model_dump(
+                mode="json", by_alias=True
+            )
+
+            sent_private_state = self.private_states.get(player_id)
+            if sent_private_state is None:
+                game_state_update.player_messages[player_id] = build_snapshot_message(
+                    game.state_version,
+                    merge_state_json(self.shared_state_json, private_state),
+                    functools.partial(merge_states, public_state, private_state),
+                )
+                self.private_states[player_id] = (game.state_version, private_state)
+                continue
+
+            sent_version, sent_state = sent_private_state
+            private_changes = diff_states(sent_state, private_state)
+            if len(public_change_jsons) == 0 and len(private_changes) == 0:
+                continue
+
+            game_state_update.player_messages[player_id] = build_delta_message(
+                sent_version,
+                game.state_version,
+                public_change_jsons + dump_changes(private_changes),
+                public_delta_changes + private_changes,
+            )
+            self.private_states[player_id] = (game.state_version, private_state)
+
+        return game_state_update
+
+    # Lines up with the version that the next delta to this player will be based on, so
+    # it should only be taken right after an update
+    def get_snapshot_message(self, player_id: int) -> WireMessage | None:
+        sent_private_state = self.private_states.get(player_id)
+        if sent_private_state is None:
+            return None
+
+        version, private_state = sent_private_state
+        public_state = self.public_state
+        assert public_state is not None
+        return build_snapshot_message(
+            version,
+            merge_state_json(self.shared_state_json, private_state),
+            functools.partial(merge_states, public_state, private_state),
+        )
+
+
+class SpectatorFrame:
+    event_messages: list[WireMessage]
+    message: WireMessage | None
+
+    def __init__(
+        self, event_messages: list[WireMessage], message: WireMessage | None
+    ) -> None:
+        self.event_messages = event_messages
+        self.message = message
+
+
+# Everything spectators are sent goes out as frames to one shared room. Frames can lag
+# behind the game by a fixed delay and be spaced out by a minimum interval, in which case
+# every update that came due since the last frame is merged into one delta.
+class SpectatorFeed:
+    delay: float
+    min_frame_interval: float
+
+    version: int | None
+    state: dict[str, Any] | None
+    last_frame_time: float | None
+
+    # Updates and events that haven't gone out in a frame yet, oldest first
+    pending: deque[tuple[float, GameStateUpdate, list[WireMessage]]]
+
+    def __init__(self, delay: float = 0, min_frame_interval: float = 0) -> None:
+        self.delay = delay
+        self.min_frame_interval = min_frame_interval
+
+        self.version = None
+        self.state = None
+        self.last_frame_time = None
+
+        self.pending = deque()
+
+    def is_immediate(self) -> bool:
+        return self.delay == 0 and self.min_frame_interval == 0
+
+    def add(
+        self,
+        now: float,
+        game_state_update: GameStateUpdate,
+        event_messages: list[WireMessage],
+    ) -> None:
+        if game_state_update.spectator_message is None and len(event_messages) == 0:
+            return
+
+        self.pending.append((now, game_state_update, event_messages))
+
+    def get_next_frame_time(self) -> float | None:
+        if len(self.pending) == 0:
+            return None
+
+        next_frame_time = self.pending[0][0] + self.delay
+        if self.last_frame_time is not None:
+            next_frame_time = max(
+                next_frame_time, self.last_frame_time + self.min_frame_interval
+            )
+
+        return next_frame_time
+
+    def pop_frame(self, now: float) -> SpectatorFrame | None:
+        next_frame_time = self.get_next_frame_time()
+        if next_frame_time is None or now < next_frame_time:
+            return None
+
+        event_messages: list[WireMessage] = []
+        state_updates: list[GameStateUpdate] = []
+        while len(self.pending) > 0 and self.pending[0][0] + self.delay <= now:
+            _, game_state_update, update_event_messages = self.pending.popleft()
+            event_messages.extend(update_event_messages)
+            if game_state_update.spectator_message is not None:
+                state_updates.append(game_state_update)
+        self.last_frame_time = now
+
+        if len(state_updates) == 0:
+            return SpectatorFrame(event_messages, None)
+
+        latest_update = state_updates[-1]
+        if len(state_updates) == 1 and latest_update.public_base_version == self.version:
+            # Nothing was merged, so the update's own payload can go out as is
+            message = latest_update.spectator_message
+        elif self.state is None or self.version is None:
+            public_state = latest_update.public_state
+            message = build_snapshot_message(
+                latest_update.public_version,
+                dump_json(public_state),
+                lambda: public_state,
+            )
+        else:
+            changes = diff_states(self.state, latest_update.public_state)
+            message = build_delta_message(
+                self.version, latest_update.public_version, dump_changes(changes), changes
+            )
+
+        self.version = latest_update.public_version
+        self.state = latest_update.public_state
+
+        return SpectatorFrame(event_messages, message)
+
+    # Lines up with the version that the next frame will be based on
+    def get_snapshot_message(self) -> WireMessage | None:
+        if self.state is None or self.version is None:
+            return None
+
+        state = self.state
+        return build_snapshot_message(self.version, dump_json(state), lambda: state)
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import os
+import pickle
+import struct
+from collections.abc import AsyncIterator
+from typing import Any
+
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+logger = logging.getLogger(__name__)
+
+# Every frame is a length prefix followed by a pickled (channel, payload) pair, where the
+# payload is left pickled so that the broker never has to look inside it
+_FRAME_HEADER = struct.Struct("!I")
+_SUBSCRIBE_CHANNEL = ""
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> bytes:
+    header = await reader.readexactly(_FRAME_HEADER.size)
+    (length,) = _FRAME_HEADER.unpack(header)
+    return await reader.readexactly(length)
+
+
+def _encode_frame(frame: bytes) -> bytes:
+    return _FRAME_HEADER.pack(len(frame)) + frame
+
+
+# Stands in for a message queue between the processes on one machine. Publishers and
+# subscribers connect over a unix socket and the broker hands every published frame to
+# each connection that's subscribed to its channel, the publisher's included.
+class LocalPubSubBroker:
+    path: str
+    subscribers: dict[str, set[asyncio.StreamWriter]]
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.subscribers = {}
+
+    # Frames are unpickled at both ends, so nobody but this user may connect
+    async def start(self) -> asyncio.Server:
+        server = await asyncio.start_unix_server(self.handle_connection, self.path)
+        os.chmod(self.path, 0o600)
+        return server
+
+    async def serve_forever(self) -> None:
+        server = await self.start()
+        async with server:
+            await server.serve_forever()
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                frame = await _read_frame(reader)
+                channel, payload = pickle.loads(frame)
+                if channel == _SUBSCRIBE_CHANNEL:
+                    self.subscribers.setdefault(payload, set()).add(writer)
+                    # Echoed back so that the subscriber knows it won't miss anything
+                    # published from here on
+                    writer.write(_encode_frame(frame))
+                    await writer.drain()
+                    continue
+
+                await self.publish(channel, _encode_frame(frame))
+        except asyncio.IncompleteReadError:
+            pass
+        finally:
+            for subscribers in self.subscribers.values():
+                subscribers.discard(writer)
+            writer.close()
+
+    async def publish(self, channel: str, encoded_frame: bytes) -> None:
+        subscribers = list(self.subscribers.get(channel, ()))
+        for subscriber in subscribers:
+            subscriber.write(encoded_frame)
+        await asyncio.gather(
+            *(subscriber.drain() for subscriber in subscribers), return_exceptions=True
+        )
+
+
+# One connection to the broker per process, shared by everything that publishes or
+# subscribes in it. Connects on first use.
+class LocalPubSubClient:
+    path: str
+    writer: asyncio.StreamWriter | None
+    channels: dict[str, asyncio.Queue[Any]]
+    _subscriptions: dict[str, asyncio.Future[None]]
+    _connect_lock: asyncio.Lock
+    _read_task: asyncio.Task | None
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.writer = None
+        self.channels = {}
+        self._subscriptions = {}
+        self._connect_lock = asyncio.Lock()
+        self._read_task = None
+
+    async def connect(self) -> asyncio.StreamWriter:
+        async with self._connect_lock:
+            if self.writer is None:
+                reader, self.writer = await asyncio.open_unix_connection(self.path)
+                self._read_task = asyncio.create_task(self.read(reader))
+
+        return self.writer
+
+    async def read(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                channel, payload = pickle.loads(await _read_frame(reader))
+                if channel == _SUBSCRIBE_CHANNEL:
+                    self._subscriptions[payload].set_result(None)
+                    continue
+
+                queue = self.channels.get(channel)
+                if queue is not None:
+                    queue.put_nowait(pickle.loads(payload))
+        except asyncio.IncompleteReadError:
+            logger.error("Lost the connection to the pub/sub broker at %s", self.path)
+
+    async def send(self, channel: str, payload: Any) -> None:
+        writer = await self.connect()
+        writer.write(_encode_frame(pickle.dumps((channel, payload))))
+        await writer.drain()
+
+    # Returns once the broker has the subscription, along with the queue that the
+    # channel's messages are put on
+    async def subscribe(self, channel: str) -> asyncio.Queue[Any]:
+        subscription = self._subscriptions.get(channel)
+        if subscription is None:
+            subscription = self._subscriptions[channel] = (
+                asyncio.get_running_loop().create_future()
+            )
+            self.channels[channel] = asyncio.Queue()
+            await self.send(_SUBSCRIBE_CHANNEL, channel)
+
+        await asyncio.shield(subscription)
+        return self.channels[channel]
+
+    async def publish(self, channel: str, data: Any) -> None:
+        await self.send(channel, pickle.dumps(data))
+
+    async def listen(self, channel: str) -> AsyncIterator[Any]:
+        queue = await self.subscribe(channel)
+        while True:
+            yield await queue.get()
+
+    async def close(self) -> None:
+        if self._read_task is not None:
+            self._read_task.cancel()
+        if self.writer is not None:
+            self.writer.close()
+        self.writer = None
+        self._read_task = None
+        self.channels = {}
+        self._subscriptions = {}
+
+
+# Does what the Redis or Kafka client managers do, but through a LocalPubSubBroker, so
+# that an emit from any process reaches the clients connected to every other process
+class LocalPubSubManager(AsyncPubSubManager):
+    name = "localpubsub"
+    client: LocalPubSubClient
+
+    def __init__(
+        self,
+        client: LocalPubSubClient,
+        channel: str = "socketio",
+        write_only: bool = False,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.client = client
+
+    async def _publish(self, data: dict[str, Any]) -> None:
+        await self.client.publish(self.channel, data)
+
+    async def _listen(self) -> AsyncIterator[dict[str, Any]]:
+        async for data in self.client.listen(self.channel):
+            yield data
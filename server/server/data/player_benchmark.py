@@ -0,0 +1,159 @@
+import argparse
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+
+from fastapi import Response
+
+from server.api.dependencies import get_or_create_player
+from server.data import db, player_manager
+from server.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ScenarioResult:
+    name: str
+    num_requests: int
+    round_trips: int
+    seconds: float
+
+    def __init__(
+        self, name: str, num_requests: int, round_trips: int, seconds: float
+    ) -> None:
+        self.name = name
+        self.num_requests = num_requests
+        self.round_trips = round_trips
+        self.seconds = seconds
+
+    def __str__(self) -> str:
+        return (
+            f"{self.name:<32} {self.round_trips / self.num_requests:>8.2f} queries/request"
+            f" {self.seconds / self.num_requests * 1000:>8.3f}ms/request"
+        )
+
+
+def get_round_trips() -> int:
+    summary = metrics.summaries.get("db_round_trips")
+    return 0 if summary is None else summary.count
+
+
+async def run_scenario(
+    name: str, num_requests: int, request: Callable[[int], Awaitable[object]]
+) -> ScenarioResult:
+    start_round_trips = get_round_trips()
+    start_time = time.perf_counter()
+    for i in range(num_requests):
+        await request(i)
+
+    return ScenarioResult(
+        name,
+        num_requests,
+        get_round_trips() - start_round_trips,
+        time.perf_counter() - start_time,
+    )
+
+
+# Each scenario is one kind of request that the server handles, starting with caches
+# that are as cold as they'd be for a player's first request to a process
+async def run_benchmark(num_requests: int, table_size: int) -> list[ScenarioResult]:
+    created = await player_manager.create_players(
+        [f"benchmark-{i}" for i in range(num_requests)]
+    )
+    player_ids = [player.player_id for player, _ in created]
+    player_auth_ids = [player_auth_id for _, player_auth_id in created]
+
+    try:
+        results: list[ScenarioResult] = []
+
+        async def ensure_new_player(i: int) -> None:
+            player = await get_or_create_player(Response(), (None, f"benchmark-new-{i}"))
+            player_ids.append(player.player_id)
+
+        results.append(
+            await run_scenario(
+                "PUT /player/ensure (new)", num_requests, ensure_new_player
+            )
+        )
+
+        player_manager.clear_cache()
+        results.append(
+            await run_scenario(
+                "PUT /player/ensure (returning)",
+                num_requests,
+                lambda i: get_or_create_player(Response(), (player_auth_ids[i], None)),
+            )
+        )
+
+        player_manager.clear_cache()
+        results.append(
+            await run_scenario(
+                "connect",
+                num_requests,
+                lambda i: player_manager.get_player_by_auth(player_auth_ids[i]),
+            )
+        )
+        results.append(
+            await run_scenario(
+                "game_input",
+                num_requests,
+                lambda i: player_manager.get_player(player_ids[i]),
+            )
+        )
+
+        player_manager.clear_cache()
+        results.append(
+            await run_scenario(
+                f"get_players ({table_size} seats)",
+                num_requests // table_size,
+                lambda i: player_manager.get_players(
+                    player_ids[i * table_size : (i + 1) * table_size]
+                ),
+            )
+        )
+
+        async def create_table(i: int) -> None:
+            created = await player_manager.create_players(
+                [f"benchmark-table-{i}-{seat}" for seat in range(table_size)]
+            )
+            player_ids.extend(player.player_id for player, _ in created)
+
+        results.append(
+            await run_scenario(
+                f"create_players ({table_size} seats)",
+                num_requests // table_size,
+                create_table,
+            )
+        )
+
+        return results
+    finally:
+        async with db.get_cursor() as cur:
+            await cur.execute("DELETE FROM players WHERE id = ANY(%s)", (player_ids,))
+
+
+async def run(num_requests: int, table_size: int) -> None:
+    await db.open_pool()
+    try:
+        for result in await run_benchmark(num_requests, table_size):
+            logger.info("%s", result)
+    finally:
+        await db.close_pool()
+
+
+# Runs against a live database, e.g. the dev database with DATABASE_HOST=localhost
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Report database queries and time per request for player lookups"
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--table_size", type=int, default=4)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.requests, args.table_size))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    main()
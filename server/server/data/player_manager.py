@@ -1,74 +1,148 @@
+import os
 import uuid
 from typing import Collection, cast
 
 from server.models.player import Player
+from server.utils.ttl_cache import TTLCache
 
 from . import db
 
+# Players that were looked up recently are served from memory so that handling socket
+# events doesn't hit the database. Renames only clear the cache of the process that made
+# them, so with several shards other processes can see an old name for up to the TTL.
+PLAYER_CACHE_SIZE = int(os.environ.get("PLAYER_CACHE_SIZE", "4096"))
+PLAYER_CACHE_TTL_SECONDS = float(os.environ.get("PLAYER_CACHE_TTL_SECONDS", "300"))
 
-def player_exists_by_auth(player_auth_id: str) -> bool:
-    cur = db.get_cursor()
-    cur.execute("SELECT 1 FROM players WHERE auth_id = %s", (player_auth_id,))
+_players: TTLCache[int, Player] = TTLCache(PLAYER_CACHE_SIZE, PLAYER_CACHE_TTL_SECONDS)
+_player_ids_by_auth: TTLCache[str, int] = TTLCache(
+    PLAYER_CACHE_SIZE, PLAYER_CACHE_TTL_SECONDS
+)
 
-    return cur.fetchone() is not None
 
+def _cache_player(player: Player, player_auth_id: str | None = None) -> None:
+    _players.put(player.player_id, player)
+    if player_auth_id is not None:
+        _player_ids_by_auth.put(player_auth_id, player.player_id)
 
-def player_exists(player_id: int) -> bool:
-    cur = db.get_cursor()
-    cur.execute("SELECT 1 FROM players WHERE id = %s", (player_id,))
 
-    return cur.fetchone() is not None
+def clear_cache() -> None:
+    _players.clear()
+    _player_ids_by_auth.clear()
 
 
-def get_player_by_auth(player_auth_id: str) -> Player:
-    cur = db.get_cursor()
-    cur.execute("SELECT id, name FROM players WHERE auth_id = %s", (player_auth_id,))
-    result = cast(tuple[int, str] | None, cur.fetchone())
+# Checks for and fetches the player in one lookup
+async def get_maybe_player_by_auth(player_auth_id: str) -> Player | None:
+    cached_player_id = _player_ids_by_auth.get(player_auth_id)
+    if cached_player_id is not None:
+        cached_player = _players.get(cached_player_id)
+        if cached_player is not None:
+            return cached_player
+
+    async with db.get_cursor() as cur:
+        await cur.execute(
+            "SELECT id, name FROM players WHERE auth_id = %s", (player_auth_id,)
+        )
+        result = cast(tuple[int, str] | None, await cur.fetchone())
 
     if result is None:
-        raise ValueError(f"Invalid player auth id: {player_auth_id}")
+        return None
 
     (player_id, player_name) = result
-    return Player(player_id, player_name)
+    player = Player(player_id, player_name)
+    _cache_player(player, player_auth_id)
+    return player
+
+
+async def get_player_by_auth(player_auth_id: str) -> Player:
+    player = await get_maybe_player_by_auth(player_auth_id)
+    if player is None:
+        raise ValueError(f"Invalid player auth id: {player_auth_id}")
+
+    return player
 
 
-def get_player(player_id: int) -> Player:
-    cur = db.get_cursor()
-    cur.execute("SELECT id, name FROM players WHERE id = %s", (player_id,))
-    result = cast(tuple[int, str] | None, cur.fetchone())
+async def get_player(player_id: int) -> Player:
+    cached_player = _players.get(player_id)
+    if cached_player is not None:
+        return cached_player
+
+    async with db.get_cursor() as cur:
+        await cur.execute("SELECT id, name FROM players WHERE id = %s", (player_id,))
+        result = cast(tuple[int, str] | None, await cur.fetchone())
 
     if result is None:
         raise ValueError(f"Invalid player id: {player_id}")
 
     (player_id, player_name) = result
-    return Player(player_id, player_name)
-
+    player = Player(player_id, player_name)
+    _cache_player(player)
+    return player
 
-def get_players(player_ids: Collection[int]) -> dict[int, Player]:
-    cur = db.get_cursor()
-    cur.execute("SELECT id, name FROM players WHERE id = ANY(%s)", (list(player_ids),))
 
-    results = cast(list[tuple[int, str]], cur.fetchall())
+# Only the players that aren't cached are looked up, all in one query
+async def get_players(player_ids: Collection[int]) -> dict[int, Player]:
     players: dict[int, Player] = {}
+    uncached_player_ids: list[int] = []
+    for player_id in player_ids:
+        cached_player = _players.get(player_id)
+        if cached_player is not None:
+            players[player_id] = cached_player
+        else:
+            uncached_player_ids.append(player_id)
+
+    if len(uncached_player_ids) == 0:
+        return players
+
+    async with db.get_cursor() as cur:
+        await cur.execute(
+            "SELECT id, name FROM players WHERE id = ANY(%s)", (uncached_player_ids,)
+        )
+        results = cast(list[tuple[int, str]], await cur.fetchall())
+
     for player_id, player_name in results:
         players[player_id] = Player(player_id, player_name)
+        _cache_player(players[player_id])
 
     return players
 
 
-def create_player(player_name: str) -> tuple[Player, str]:
-    player_auth_id = str(uuid.uuid4())
-    cur = db.get_cursor()
-    cur.execute(
-        "INSERT INTO players(auth_id, name) VALUES(%s, %s) RETURNING id",
-        (player_auth_id, player_name),
-    )
-    result = cast(tuple[int], cur.fetchone())
-
-    player = Player(result[0], player_name)
-    return (player, player_auth_id)
-
-
-def set_player_name(player_id: int, player_name: str) -> None:
-    cur = db.get_cursor()
-    cur.execute("UPDATE players SET name = %s WHERE id = %s", (player_name, player_id))
+async def create_player(player_name: str) -> tuple[Player, str]:
+    (created_player,) = await create_players([player_name])
+    return created_player
+
+
+# Inserts every player in one pipeline, returning each player with their auth id in the
+# same order as the names
+async def create_players(player_names: list[str]) -> list[tuple[Player, str]]:
+    if len(player_names) == 0:
+        return []
+
+    player_auth_ids = [str(uuid.uuid4()) for _ in player_names]
+    player_ids: list[int] = []
+    async with db.get_cursor() as cur:
+        await cur.executemany(
+            "INSERT INTO players(auth_id, name) VALUES(%s, %s) RETURNING id",
+            list(zip(player_auth_ids, player_names, strict=True)),
+            returning=True,
+        )
+        async for _ in cur.results():
+            result = cast(tuple[int], await cur.fetchone())
+            player_ids.append(result[0])
+
+    created_players: list[tuple[Player, str]] = []
+    for player_id, player_name, player_auth_id in zip(
+        player_ids, player_names, player_auth_ids, strict=True
+    ):
+        player = Player(player_id, player_name)
+        _cache_player(player, player_auth_id)
+        created_players.append((player, player_auth_id))
+
+    return created_players
+
+
+async def set_player_name(player_id: int, player_name: str) -> None:
+    async with db.get_cursor() as cur:
+        await cur.execute(
+            "UPDATE players SET name = %s WHERE id = %s", (player_name, player_id)
+        )
+    _players.pop(player_id)
@@ -0,0 +1,265 @@
+import asyncio
+import functools
+import itertools
+import logging
+import multiprocessing
+import os
+import shutil
+import socket
+import tempfile
+import zlib
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar, cast
+
+from server.data.local_pubsub import LocalPubSubBroker, LocalPubSubClient
+from server.game.core import GameError
+from server.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Games can be split between this many server processes on one machine, each of which
+# owns the games whose ids hash to its index. Any process can hold any client's
+# connection, and calls that need a game are relayed to the process that owns it.
+GAME_SHARDS = int(os.environ.get("GAME_SHARDS", "1"))
+SHARD_INDEX = int(os.environ.get("SHARD_INDEX", "0"))
+# Defaults to a socket in a new private directory (see serve_shards), so that servers
+# running side by side on one machine each get their own broker
+SHARD_PUBSUB_PATH = os.environ.get("SHARD_PUBSUB_PATH", "")
+SHARD_CALL_TIMEOUT_SECONDS = float(os.environ.get("SHARD_CALL_TIMEOUT_SECONDS", "10"))
+
+Fn = TypeVar("Fn", bound=Callable[..., Awaitable[Any]])
+
+
+def is_sharded() -> bool:
+    return GAME_SHARDS > 1
+
+
+def get_shard_for_game(game_id: str, shard_count: int = GAME_SHARDS) -> int:
+    return zlib.crc32(game_id.encode()) % shard_count
+
+
+def get_shard_channel(shard_index: int) -> str:
+    return f"shard/{shard_index}"
+
+
+# Runs registered functions on the shard that owns the game they're called with. Calls
+# for a game owned by another shard are published to that shard's channel and the
+# result (or exception) is published back to the caller's.
+class ShardRelay:
+    shard_index: int
+    shard_count: int
+    client: LocalPubSubClient | None
+
+    functions: dict[str, Callable[..., Awaitable[Any]]]
+    pending_calls: dict[int, asyncio.Future]
+    _call_ids: itertools.count
+    _listen_task: asyncio.Task | None
+    _call_tasks: set[asyncio.Task]
+
+    def __init__(
+        self, shard_index: int, shard_count: int, client: LocalPubSubClient | None
+    ) -> None:
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        self.client = client
+
+        self.functions = {}
+        self.pending_calls = {}
+        self._call_ids = itertools.count()
+        self._listen_task = None
+        self._call_tasks = set()
+
+    def register(self, function: Callable[..., Awaitable[Any]], name: str) -> None:
+        self.functions[name] = function
+
+    def is_local_game(self, game_id: str) -> bool:
+        return get_shard_for_game(game_id, self.shard_count) == self.shard_index
+
+    async def call(self, name: str, game_id: str, *args: Any) -> Any:
+        if self.is_local_game(game_id):
+            return await self.functions[name](game_id, *args)
+
+        try:
+            return await self.relay_call(name, game_id, args)
+        except (TimeoutError, OSError, EOFError) as error:
+            # Handlers only expect GameErrors, which they pass on to the client
+            metrics.observe("shard_relay_failures", 1)
+            logger.warning("Failed to relay %s for %s: %r", name, game_id, error)
+            raise GameError("The game's server isn't responding, try again") from error
+
+    async def relay_call(self, name: str, game_id: str, args: tuple[Any, ...]) -> Any:
+        await self.start()
+        assert self.client is not None
+
+        call_id = next(self._call_ids)
+        future = self.pending_calls[call_id] = asyncio.get_running_loop().create_future()
+        try:
+            await self.client.publish(
+                get_shard_channel(get_shard_for_game(game_id, self.shard_count)),
+                ("call", self.shard_index, call_id, name, game_id, args),
+            )
+            metrics.observe("shard_relayed_calls", 1)
+            return await asyncio.wait_for(future, SHARD_CALL_TIMEOUT_SECONDS)
+        finally:
+            del self.pending_calls[call_id]
+
+    async def start(self) -> None:
+        if self._listen_task is not None or self.client is None:
+            return
+
+        # Subscribe before returning so that no result can arrive ahead of it
+        await self.client.subscribe(get_shard_channel(self.shard_index))
+        self._listen_task = asyncio.create_task(self.listen())
+
+    async def listen(self) -> None:
+        assert self.client is not None
+        async for message in self.client.listen(get_shard_channel(self.shard_index)):
+            if message[0] == "call":
+                task = asyncio.create_task(self.handle_call(*message[1:]))
+                self._call_tasks.add(task)
+                task.add_done_callback(self._call_tasks.discard)
+            elif message[0] == "result":
+                _, call_id, error, result = message
+                future = self.pending_calls.get(call_id)
+                if future is None or future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+    async def handle_call(
+        self,
+        caller_shard_index: int,
+        call_id: int,
+        name: str,
+        game_id: str,
+        args: tuple[Any, ...],
+    ) -> None:
+        assert self.client is not None
+
+        result: Any = None
+        error: Exception | None = None
+        try:
+            result = await self.functions[name](game_id, *args)
+        except Exception as call_error:  # pylint: disable=broad-exception-caught
+            if not isinstance(call_error, GameError):
+                logger.exception("Failed to run a relayed %s for %s", name, game_id)
+            error = call_error.with_traceback(None)
+
+        await self.client.publish(
+            get_shard_channel(caller_shard_index), ("result", call_id, error, result)
+        )
+
+    def stop(self) -> None:
+        if self._listen_task is not None:
+            self._listen_task.cancel()
+        self._listen_task = None
+
+        for future in self.pending_calls.values():
+            future.cancel()
+
+
+_pubsub_client = LocalPubSubClient(SHARD_PUBSUB_PATH)
+_relay = ShardRelay(SHARD_INDEX, GAME_SHARDS, _pubsub_client if is_sharded() else None)
+
+
+def get_pubsub_client() -> LocalPubSubClient:
+    return _pubsub_client
+
+
+def is_local_game(game_id: str) -> bool:
+    return _relay.is_local_game(game_id)
+
+
+# Wraps a coroutine function whose first argument is a game id so that it always runs
+# on the shard that owns that game. Its arguments, result and exceptions have to be
+# picklable to make it across.
+def on_game_shard(function: Fn) -> Fn:
+    name = f"{function.__module__}.{function.__qualname__}"
+    _relay.register(function, name)
+
+    @functools.wraps(function)
+    async def wrapper(game_id: str, *args: Any) -> Any:
+        return await _relay.call(name, game_id, *args)
+
+    return cast(Fn, wrapper)
+
+
+async def start() -> None:
+    await _relay.start()
+
+
+def stop() -> None:
+    _relay.stop()
+
+
+def _serve_shard(port: int, log_config: dict[str, Any] | None) -> None:
+    # Imported here so that uvicorn and the app are only loaded in the shard processes
+    import uvicorn  # pylint: disable=import-outside-toplevel
+
+    uvicorn.run("server.app:app", host="0.0.0.0", port=port, log_config=log_config)
+
+
+# Left behind by a broker that didn't shut down cleanly. One that's still listening
+# belongs to another server, which is never taken over.
+def remove_stale_socket(path: str) -> None:
+    if not os.path.exists(path):
+        return
+
+    with socket.socket(socket.AF_UNIX) as probe:
+        try:
+            probe.connect(path)
+        except ConnectionRefusedError:
+            os.remove(path)
+            return
+
+    raise RuntimeError(f"Another server's pub/sub broker is already at {path}")
+
+
+# Runs the pub/sub broker in this process and one server process per shard, listening on
+# consecutive ports from base_port. Connections have to stick to one shard for as long
+# as they last (e.g. with an ip_hash upstream in front of them), but can be spread across
+# shards without regard to which games they join.
+def serve_shards(base_port: int, log_config: dict[str, Any] | None = None) -> None:
+    context = multiprocessing.get_context("spawn")
+
+    pubsub_directory: str | None = None
+    pubsub_path = SHARD_PUBSUB_PATH
+    if pubsub_path == "":
+        # Anyone who can connect to the broker can run code in the servers, so the
+        # socket goes in a directory that only this user can get into
+        pubsub_directory = tempfile.mkdtemp(prefix="judgement-")
+        pubsub_path = os.path.join(pubsub_directory, "pubsub.sock")
+    # Spawned processes read the path from the environment on import too
+    os.environ["SHARD_PUBSUB_PATH"] = pubsub_path
+
+    async def serve() -> None:
+        remove_stale_socket(pubsub_path)
+        server = await LocalPubSubBroker(pubsub_path).start()
+
+        processes = []
+        for shard_index in range(GAME_SHARDS):
+            # Spawned processes read their shard index from the environment on import
+            os.environ["SHARD_INDEX"] = str(shard_index)
+            process = context.Process(
+                target=_serve_shard, args=(base_port + shard_index, log_config)
+            )
+            process.start()
+            processes.append(process)
+        logger.info("Started %s game shards", GAME_SHARDS)
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
+
+    try:
+        asyncio.run(serve())
+    finally:
+        if pubsub_directory is not None:
+            shutil.rmtree(pubsub_directory, ignore_errors=True)
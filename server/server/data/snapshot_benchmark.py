@@ -0,0 +1,80 @@
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from random import Random
+
+from server.data.game_snapshots import GameSnapshotStore, GameSnapshotter, load_games
+from server.game.judgement import JudgementGame
+from server.game.simulation import RandomPolicy, create_headless_game
+from server.models.judgement import JudgementPhase
+
+logger = logging.getLogger(__name__)
+
+
+# Games part way through, with every seat filled and a random amount played
+def create_games(num_games: int, num_players: int, rand: Random) -> list[JudgementGame]:
+    games: list[JudgementGame] = []
+    for i in range(num_games):
+        game = create_headless_game(num_players, rand=rand, game_id=f"BENCH{i}")
+        game.start_game()
+
+        policy = RandomPolicy(rand)
+        for _ in range(rand.randrange(200)):
+            player_id = game.get_current_player_id()
+            if game.phase == JudgementPhase.BIDDING:
+                game.bid(player_id, policy.choose_bid(game, player_id))
+            else:
+                game.play_card(player_id, policy.choose_card(game, player_id))
+        games.append(game)
+
+    return games
+
+
+async def run(num_games: int, num_players: int) -> None:
+    games = create_games(num_games, num_players, Random(0))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "games.sqlite3")
+        store = GameSnapshotStore(path)
+        try:
+            snapshotter = GameSnapshotter(store)
+            for game in games:
+                snapshotter.mark_dirty(game)
+
+            start_time = time.perf_counter()
+            await snapshotter.flush()
+            logger.info(
+                "Wrote %s games (%.1fKB) in %.3fs",
+                num_games,
+                os.path.getsize(path) / 1024,
+                time.perf_counter() - start_time,
+            )
+
+            start_time = time.perf_counter()
+            restored_games = await load_games(store)
+            logger.info(
+                "Restored %s games in %.3fs",
+                len(restored_games),
+                time.perf_counter() - start_time,
+            )
+        finally:
+            store.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Report how long it takes to save and restore game snapshots"
+    )
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--players", type=int, default=4)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.games, args.players))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    main()
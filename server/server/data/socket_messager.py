@@ -1,37 +1,252 @@
+import asyncio
+import logging
+import os
+import time
 from typing import Iterable, Union, cast
 
-from server.data import connection_manager
+from server.data import connection_manager, shard_manager
+from server.data.game_state_sync import GameStateSync, SpectatorFeed
+from server.data.wire_message import WireMessage
 from server.game.core import Game, GameError
+from server.models.game import GamePlayerType
 from server.models.player import Player
 from server.models.websocket import (
-    ConcreteGameState,
+    ConcreteGameEvent,
     GameErrorMessage,
-    GameStateMessage,
+    GameEventMessage,
     PlayersMessage,
+    WireFormat,
 )
 from server.sio_app import sio
+from server.utils import metrics
 
+logger = logging.getLogger(__name__)
 
-async def emit_error(error: GameError, recipient: str) -> None:
-    await sio.emit(
-        "invalid_input",
-        GameErrorMessage(error_message=error.message).model_dump_json(by_alias=True),
-        to=recipient,
+# Bounds how many sends are in flight at once across every game
+FAN_OUT_CONCURRENCY = int(os.environ.get("FAN_OUT_CONCURRENCY", "64"))
+# A send that takes longer than this is dropped so that it can't hold up the rest of
+# the table's updates
+FAN_OUT_TIMEOUT_SECONDS = float(os.environ.get("FAN_OUT_TIMEOUT_SECONDS", "5"))
+
+# Spectators can be held back from the live game, and have their updates merged so that
+# they get at most this many per second (0 sends every update as it happens)
+SPECTATOR_DELAY_SECONDS = float(os.environ.get("SPECTATOR_DELAY_SECONDS", "0"))
+SPECTATOR_MAX_UPDATES_PER_SECOND = float(
+    os.environ.get("SPECTATOR_MAX_UPDATES_PER_SECOND", "0")
+)
+
+_fan_out_semaphore = asyncio.Semaphore(FAN_OUT_CONCURRENCY)
+
+_game_state_syncs: dict[str, GameStateSync] = {}
+_spectator_feeds: dict[str, SpectatorFeed] = {}
+# Sends delayed or rate limited spectator frames once they come due
+_spectator_frame_tasks: dict[str, asyncio.Task] = {}
+
+# Keeps one game's flushes from interleaving so that every room gets deltas in order
+_flush_locks: dict[str, asyncio.Lock] = {}
+
+
+async def emit_error(error: GameError, client_id: str) -> None:
+    await emit_to_client(
+        WireMessage.from_model(
+            "invalid_input", GameErrorMessage(error_message=error.message)
+        ),
+        client_id,
     )
 
 
-async def emit_game_state(game: Game) -> None:
-    game_states = game.build_game_states(set(game.players.keys()))
-    for player_id in game.players.keys():
-        await sio.emit(
-            "game_state",
-            GameStateMessage(
-                state=cast(ConcreteGameState, game_states[player_id])
-            ).model_dump_json(by_alias=True),
-            to=connection_manager.get_websocket_room_id(
-                game_id=game.game_id, player_id=player_id
-            ),
+# The client's wire format has to be given when it may be connected to another shard,
+# since its session is only available on the shard that it's connected to
+async def emit_to_client(
+    message: WireMessage, client_id: str, wire_format: WireFormat | None = None
+) -> None:
+    if wire_format is None:
+        wire_format = await connection_manager.get_wire_format_for_client(client_id)
+    await sio.emit(message.event, message.get_payload(wire_format), to=client_id)
+
+
+# Sends the message to the room once per wire format that its clients use
+async def emit_to_room(message: WireMessage, room_id: str) -> None:
+    for wire_format, format_room_id in _get_wire_format_room_ids(room_id):
+        await sio.emit(message.event, message.get_payload(wire_format), to=format_room_id)
+
+
+def _get_wire_format_room_ids(room_id: str) -> list[tuple[WireFormat, str]]:
+    # JSON is always sent, which also covers recipients that aren't rooms of ours
+    wire_format_room_ids = [(WireFormat.JSON, room_id)]
+    for wire_format in WireFormat:
+        format_room_id = connection_manager.get_wire_format_room_id(room_id, wire_format)
+        # Rooms on other shards can't be seen from here, so every format is sent
+        if format_room_id != room_id and (
+            shard_manager.is_sharded()
+            or connection_manager.room_has_clients(format_room_id)
+        ):
+            wire_format_room_ids.append((wire_format, format_room_id))
+
+    return wire_format_room_ids
+
+
+def _get_flush_lock(game_id: str) -> asyncio.Lock:
+    flush_lock = _flush_locks.get(game_id)
+    if flush_lock is None:
+        flush_lock = _flush_locks[game_id] = asyncio.Lock()
+
+    return flush_lock
+
+
+def _get_spectator_feed(game_id: str) -> SpectatorFeed:
+    spectator_feed = _spectator_feeds.get(game_id)
+    if spectator_feed is None:
+        spectator_feed = _spectator_feeds[game_id] = SpectatorFeed(
+            SPECTATOR_DELAY_SECONDS,
+            0
+            if SPECTATOR_MAX_UPDATES_PER_SECOND <= 0
+            else 1 / SPECTATOR_MAX_UPDATES_PER_SECOND,
+        )
+
+    return spectator_feed
+
+
+async def flush_game_state(game: Game) -> None:
+    async with _get_flush_lock(game.game_id):
+        event_messages = [
+            WireMessage.from_model(
+                "game_event", GameEventMessage(event=cast(ConcreteGameEvent, event))
+            )
+            for event in game.drain_events()
+        ]
+        players_room_id = connection_manager.get_websocket_room_id(
+            game_id=game.game_id, player_type=GamePlayerType.PLAYER
         )
+        for event_message in event_messages:
+            await emit_to_room(event_message, players_room_id)
+
+        await _emit_game_state_update(game, event_messages)
+
+
+async def _emit_game_state_update(game: Game, event_messages: list[WireMessage]) -> None:
+    game_state_sync = _game_state_syncs.get(game.game_id)
+    if game_state_sync is None:
+        game_state_sync = _game_state_syncs[game.game_id] = GameStateSync()
+
+    game_state_update = game_state_sync.update(game)
+
+    room_messages: list[tuple[WireMessage, str]] = []
+    for player_id, message in game_state_update.player_messages.items():
+        room_id = connection_manager.get_websocket_room_id(
+            game_id=game.game_id, player_id=player_id
+        )
+        room_messages.append((message, room_id))
+
+    await fan_out(room_messages)
+
+    spectator_feed = _get_spectator_feed(game.game_id)
+    spectator_feed.add(
+        asyncio.get_running_loop().time(), game_state_update, event_messages
+    )
+    if spectator_feed.is_immediate():
+        await _emit_spectator_frame(game.game_id, spectator_feed)
+    elif game.game_id not in _spectator_frame_tasks:
+        _spectator_frame_tasks[game.game_id] = asyncio.create_task(
+            _run_spectator_frames(game.game_id)
+        )
+
+
+async def _run_spectator_frames(game_id: str) -> None:
+    try:
+        while True:
+            spectator_feed = _spectator_feeds.get(game_id)
+            if spectator_feed is None:
+                return
+
+            next_frame_time = spectator_feed.get_next_frame_time()
+            if next_frame_time is None:
+                return
+
+            await asyncio.sleep(next_frame_time - asyncio.get_running_loop().time())
+            async with _get_flush_lock(game_id):
+                await _emit_spectator_frame(game_id, spectator_feed)
+    finally:
+        if _spectator_frame_tasks.get(game_id) is asyncio.current_task():
+            del _spectator_frame_tasks[game_id]
+
+
+# Every spectator is in the same room, so each frame is a single broadcast however many
+# people are watching
+async def _emit_spectator_frame(game_id: str, spectator_feed: SpectatorFeed) -> None:
+    frame = spectator_feed.pop_frame(asyncio.get_running_loop().time())
+    if frame is None:
+        return
+
+    spectators_room_id = connection_manager.get_websocket_room_id(
+        game_id=game_id, player_type=GamePlayerType.SPECTATOR
+    )
+    for event_message in frame.event_messages:
+        await emit_to_room(event_message, spectators_room_id)
+
+    if frame.message is not None:
+        await fan_out([(frame.message, spectators_room_id)])
+
+
+async def fan_out(room_messages: list[tuple[WireMessage, str]]) -> None:
+    sends = [
+        (message.event, message.get_payload(wire_format), format_room_id)
+        for message, room_id in room_messages
+        for wire_format, format_room_id in _get_wire_format_room_ids(room_id)
+    ]
+    if len(sends) == 0:
+        return
+
+    start_time = time.perf_counter()
+    await asyncio.gather(
+        *(
+            _emit_with_timeout(event, payload, room_id)
+            for event, payload, room_id in sends
+        )
+    )
+    fan_out_seconds = time.perf_counter() - start_time
+
+    metrics.observe("emit_fan_out_seconds", fan_out_seconds)
+    metrics.observe("emit_fan_out_recipients", len(sends))
+    logger.debug("Sent %s messages in %.2fms", len(sends), fan_out_seconds * 1000)
+
+
+async def _emit_with_timeout(event: str, payload: str | bytes, room_id: str) -> None:
+    async with _fan_out_semaphore:
+        try:
+            await asyncio.wait_for(
+                sio.emit(event, payload, to=room_id), FAN_OUT_TIMEOUT_SECONDS
+            )
+        except TimeoutError:
+            # The recipient will find a gap in its versions and resync
+            metrics.observe("emit_fan_out_timeouts", 1)
+            logger.warning("Timed out sending %s to %s", event, room_id)
+
+
+# Only lines up with the version the next delta to the recipient's room will be based on
+# once every change to the game has been sent out, so this is built under the game's actor
+# (see game_actor.submit_after_flush)
+def get_game_state_snapshot_message(game: Game, player_id: int) -> WireMessage | None:
+    game_player = game.players.get(player_id)
+    if game_player is not None and game_player.player_type == GamePlayerType.PLAYER:
+        game_state_sync = _game_state_syncs.get(game.game_id)
+        return (
+            None
+            if game_state_sync is None
+            else game_state_sync.get_snapshot_message(player_id)
+        )
+
+    return _get_spectator_feed(game.game_id).get_snapshot_message()
+
+
+def forget_game(game_id: str) -> None:
+    _game_state_syncs.pop(game_id, None)
+    _spectator_feeds.pop(game_id, None)
+    _flush_locks.pop(game_id, None)
+
+    spectator_frame_task = _spectator_frame_tasks.pop(game_id, None)
+    if spectator_frame_task is not None:
+        spectator_frame_task.cancel()
 
 
 async def emit_players(
@@ -42,8 +257,6 @@ async def emit_players(
         if player.name is not None:
             player_names[player.player_id] = player.name
 
-    await sio.emit(
-        "players",
-        PlayersMessage(player_names=player_names).model_dump_json(by_alias=True),
-        to=recipient,
-    )
+    message = WireMessage.from_model("players", PlayersMessage(player_names=player_names))
+    for room_id in [recipient] if isinstance(recipient, str) else recipient:
+        await emit_to_room(message, room_id)
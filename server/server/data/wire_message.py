@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any
+
+from server.models.camel_model import CamelModel
+from server.models.websocket import WireFormat
+from server.utils import msgpack_encoder
+
+
+# An event and its payload, encoded at most once per wire format no matter how many
+# rooms it's sent to. The JSON payload is always built up front since that's what most
+# connections use, while the data for any other format is only built when it's needed.
+class WireMessage:
+    event: str
+    json_payload: str
+    _build_data: Callable[[], Any]
+    _msgpack_payload: bytes | None
+
+    def __init__(
+        self, event: str, json_payload: str, build_data: Callable[[], Any]
+    ) -> None:
+        self.event = event
+        self.json_payload = json_payload
+        self._build_data = build_data
+        self._msgpack_payload = None
+
+    @staticmethod
+    def from_model(event: str, model: CamelModel) -> WireMessage:
+        return WireMessage(
+            event,
+            model.model_dump_json(by_alias=True),
+            lambda: model.model_dump(mode="json", by_alias=True),
+        )
+
+    def get_payload(self, wire_format: WireFormat) -> str | bytes:
+        if wire_format == WireFormat.MSGPACK:
+            if self._msgpack_payload is None:
+                self._msgpack_payload = msgpack_encoder.pack(self._build_data())
+            return self._msgpack_payload
+
+        return self.json_payload
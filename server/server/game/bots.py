@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+import time
+from random import Random
+
+from server.models.game import GameStatus
+from server.models.judgement import (
+    JudgementAction,
+    JudgementBidHandsAction,
+    JudgementPhase,
+    JudgementPlayCardAction,
+    JudgementSettings,
+)
+
+from .card import (
+    NUM_CARDS_IN_DECK,
+    Suit,
+    card_id_to_str,
+    get_card_face,
+    get_card_suit_index,
+)
+from .core import Game
+from .hand import Hand
+from .judgement import JudgementGame, JudgementPlayer, compute_winning_card
+
+
+# Everything a player at the table can legitimately know, which is all that's sent to a
+# bot worker process
+class JudgementBotView:
+    player_id: int
+    ordered_player_ids: list[int]
+
+    num_decks: int
+    trump_suit: Suit
+    made_bid_bonus: int
+    last_duplicate_wins: bool
+
+    phase: JudgementPhase
+    num_tricks: int
+    current_trick: int
+    start_player_index: int
+    current_turn_index: int
+
+    hand: list[int]
+    legal_cards: list[int]
+    pile: list[int]
+    played_cards: list[int]
+
+    bids: dict[int, int | None]
+    won_tricks: dict[int, int]
+    hand_sizes: dict[int, int]
+    void_suits: dict[int, int]
+
+    def __init__(self, game: JudgementGame, player_id: int) -> None:
+        self.player_id = player_id
+        self.ordered_player_ids = list(game.ordered_player_ids)
+
+        self.num_decks = game.settings.num_decks
+        self.trump_suit = game.get_trump()
+        self.made_bid_bonus = game.made_bid_bonus
+        self.last_duplicate_wins = game.last_duplicate_wins
+
+        self.phase = game.phase
+        self.num_tricks = game.get_num_tricks_for_round()
+        self.current_trick = game.current_trick
+        self.start_player_index = game.start_player_index
+        self.current_turn_index = game.current_turn_index
+
+        self.hand = list(game.player_states[player_id].hand)
+        self.legal_cards = list(game.get_playable_cards(player_id))
+        self.pile = list(game.pile)
+        self.played_cards = [*game.discard_pile, *game.pile]
+
+        self.bids = {}
+        self.won_tricks = {}
+        self.hand_sizes = {}
+        self.void_suits = {}
+        for other_player_id, player_state in game.player_states.items():
+            self.bids[other_player_id] = player_state.current_bid
+            self.won_tricks[other_player_id] = player_state.current_won_tricks
+            self.hand_sizes[other_player_id] = len(player_state.hand)
+            self.void_suits[other_player_id] = player_state.void_suits
+
+
+# A single round of Judgement with every hand known, built from one guess at the hidden
+# hands. It skips the normal constructor so that sampling and copying stay cheap.
+class RolloutGame(JudgementGame):
+    num_tricks: int
+
+    def get_num_tricks_for_round(self) -> int:
+        return self.num_tricks
+
+    def copy(self) -> RolloutGame:
+        game = RolloutGame.__new__(RolloutGame)
+        game.__dict__.update(self.__dict__)
+
+        game.pile = self.pile.copy()
+        game.discard_pile = []
+        game.round_results = []
+        game.player_states = {}
+        for player_id, player_state in self.player_states.items():
+            player_state_copy = JudgementPlayer.__new__(JudgementPlayer)
+            player_state_copy.__dict__.update(player_state.__dict__)
+            player_state_copy.hand = player_state.hand.copy()
+            game.player_states[player_id] = player_state_copy
+
+        return game
+
+    @staticmethod
+    def from_view(view: JudgementBotView, hands: dict[int, list[int]]) -> RolloutGame:
+        # Skips the JudgementGame constructor, which validates settings and builds a deck
+        # that rollouts don't need, but sets up everything Game methods rely on
+        game = RolloutGame.__new__(RolloutGame)
+        Game.__init__(game, JudgementAction, "ROLLOUT")
+
+        game.status = GameStatus.IN_PROGRESS
+        game.seed = 0
+
+        game.trump_order = [view.trump_suit]
+        game.made_bid_bonus = view.made_bid_bonus
+        game.last_duplicate_wins = view.last_duplicate_wins
+
+        # Rollouts only cover the round being decided, so it's always the final round
+        game.settings = JudgementSettings.model_construct(
+            num_decks=view.num_decks, num_rounds=1
+        )
+        game.num_tricks = view.num_tricks
+        game.ordered_player_ids = view.ordered_player_ids
+
+        # Bidding doesn't change how cards are played, so rollouts from a bid start at
+        # the first trick
+        game.phase = JudgementPhase.PLAYING
+        game.current_round = 0
+        game.current_trick = view.current_trick
+        game.start_player_index = view.start_player_index
+        game.current_turn_index = (
+            view.start_player_index
+            if view.phase == JudgementPhase.BIDDING
+            else view.current_turn_index
+        )
+
+        game.pile = list(view.pile)
+        game.discard_pile = []
+        game.winning_pile_index = (
+            compute_winning_card(game.pile, view.trump_suit, view.last_duplicate_wins)
+            if len(game.pile) > 0
+            else None
+        )
+        game.round_results = []
+
+        game.player_states = {}
+        for player_id in view.ordered_player_ids:
+            player_state = JudgementPlayer()
+            player_state.current_bid = view.bids[player_id]
+            player_state.current_won_tricks = view.won_tricks[player_id]
+            player_state.void_suits = view.void_suits[player_id]
+            player_state.hand = Hand(hands[player_id])
+            game.player_states[player_id] = player_state
+
+        game.update_legal_moves()
+
+        return game
+
+
+def sample_hidden_hands(view: JudgementBotView, rand: Random) -> dict[int, list[int]]:
+    known_cards = {*view.hand, *view.played_cards}
+    unknown_cards = [
+        card
+        for card in range(view.num_decks * NUM_CARDS_IN_DECK)
+        if card not in known_cards
+    ]
+    rand.shuffle(unknown_cards)
+
+    hands = {view.player_id: view.hand}
+    other_player_ids = sorted(
+        (
+            player_id
+            for player_id in view.ordered_player_ids
+            if player_id != view.player_id
+        ),
+        key=lambda player_id: view.void_suits[player_id].bit_count(),
+        reverse=True,
+    )
+    for player_id in other_player_ids:
+        hand_size = view.hand_sizes[player_id]
+        void_suits = view.void_suits[player_id]
+
+        hand: list[int] = []
+        remaining_cards: list[int] = []
+        for card in unknown_cards:
+            if len(hand) < hand_size and not void_suits >> get_card_suit_index(card) & 1:
+                hand.append(card)
+            else:
+                remaining_cards.append(card)
+
+        # Fall back to ignoring voids when earlier players took every card that fits
+        missing_cards = hand_size - len(hand)
+        if missing_cards > 0:
+            hand.extend(remaining_cards[:missing_cards])
+            remaining_cards = remaining_cards[missing_cards:]
+
+        hands[player_id] = hand
+        unknown_cards = remaining_cards
+
+    return hands
+
+
+def play_out_round(game: RolloutGame, rand: Random) -> None:
+    while game.status == GameStatus.IN_PROGRESS:
+        player_id = game.ordered_player_ids[game.current_turn_index]
+        game.play_card(player_id, rand.choice(game.get_playable_cards(player_id)))
+
+
+def get_round_utility(game: RolloutGame, player_id: int) -> float:
+    round_result = game.round_results[-1]
+    bid = round_result.bids[player_id]
+    won_tricks = round_result.won_tricks[player_id]
+    if bid is None:
+        return 0
+
+    # Missing a bid scores nothing either way, so prefer missing by less
+    return game.score_round(bid, won_tricks) - abs(bid - won_tricks)
+
+
+def choose_bid(
+    view: JudgementBotView,
+    rand: Random,
+    time_budget: float,
+    max_rollouts: int | None = None,
+) -> int:
+    deadline = time.perf_counter() + time_budget
+    won_trick_counts = [0] * (view.num_tricks + 1)
+
+    num_rollouts = 0
+    game: RolloutGame | None = None
+    while game is None or (
+        time.perf_counter() < deadline
+        and (max_rollouts is None or num_rollouts < max_rollouts)
+    ):
+        game = RolloutGame.from_view(view, sample_hidden_hands(view, rand))
+        play_out_round(game, rand)
+        won_trick_counts[game.round_results[-1].won_tricks[view.player_id]] += 1
+        num_rollouts += 1
+
+    return max(
+        range(view.num_tricks + 1),
+        key=lambda bid: won_trick_counts[bid] * game.score_round(bid, bid),
+    )
+
+
+def choose_card(
+    view: JudgementBotView,
+    rand: Random,
+    time_budget: float,
+    max_rollouts: int | None = None,
+) -> int:
+    # Duplicate cards from multiple decks always play out the same way
+    candidate_cards = list(
+        {get_card_face(card): card for card in view.legal_cards}.values()
+    )
+
+    if len(candidate_cards) == 1:
+        return candidate_cards[0]
+
+    deadline = time.perf_counter() + time_budget
+    total_utilities = [0.0] * len(candidate_cards)
+
+    num_rollouts = 0
+    while num_rollouts == 0 or (
+        time.perf_counter() < deadline
+        and (max_rollouts is None or num_rollouts < max_rollouts)
+    ):
+        determinized_game = RolloutGame.from_view(view, sample_hidden_hands(view, rand))
+        for index, card in enumerate(candidate_cards):
+            game = determinized_game.copy()
+            game.play_card(view.player_id, card)
+            play_out_round(game, rand)
+            total_utilities[index] += get_round_utility(game, view.player_id)
+        num_rollouts += 1
+
+    best_index = max(range(len(candidate_cards)), key=total_utilities.__getitem__)
+    return candidate_cards[best_index]
+
+
+def decide_bot_action(
+    view: JudgementBotView, seed: int, time_budget: float
+) -> JudgementAction:
+    rand = Random(seed)
+
+    if view.phase == JudgementPhase.BIDDING:
+        return JudgementBidHandsAction(num_hands=choose_bid(view, rand, time_budget))
+
+    card = choose_card(view, rand, time_budget)
+    return JudgementPlayCardAction(card=card_id_to_str(card))
+
+
+class MonteCarloPolicy:
+    rand: Random
+    time_budget: float
+    max_rollouts: int | None
+
+    def __init__(
+        self,
+        rand: Random | None = None,
+        time_budget: float = 0.05,
+        max_rollouts: int | None = None,
+    ) -> None:
+        self.rand = Random() if rand is None else rand
+        self.time_budget = time_budget
+        self.max_rollouts = max_rollouts
+
+    def choose_bid(self, game: JudgementGame, player_id: int) -> int:
+        return choose_bid(
+            JudgementBotView(game, player_id),
+            self.rand,
+            self.time_budget,
+            self.max_rollouts,
+        )
+
+    def choose_card(self, game: JudgementGame, player_id: int) -> int:
+        return choose_card(
+            JudgementBotView(game, player_id),
+            self.rand,
+            self.time_budget,
+            self.max_rollouts,
+        )
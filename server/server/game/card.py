@@ -14,6 +14,54 @@ class Suit(str, Enum):
     CLUBS = "C"
 
 
+SUITS = list(Suit)
+SUIT_INDICES = {suit: index for index, suit in enumerate(SUITS)}
+
+NUM_RANKS = 13
+NUM_CARDS_IN_DECK = len(SUITS) * NUM_RANKS
+
+# Ranks indexed by rank - 1 with aces high, used to compare card ids without building
+# a Card
+ACE_HIGH_RANKS = [14, *range(2, NUM_RANKS + 1)]
+
+
+# Card ids pack a card into a small int: deck_index * 52 + suit_index * 13 + (rank - 1)
+def encode_card(suit: Suit, rank: int, deck_index: int = 0) -> int:
+    if rank < 1 or rank > NUM_RANKS:
+        raise ValueError("Card rank is out of bounds", rank)
+
+    return deck_index * NUM_CARDS_IN_DECK + SUIT_INDICES[suit] * NUM_RANKS + rank - 1
+
+
+# Strips the deck index from a card id so that duplicate cards compare equal
+def get_card_face(card_id: int) -> int:
+    return card_id % NUM_CARDS_IN_DECK
+
+
+def get_card_suit_index(card_id: int) -> int:
+    return card_id % NUM_CARDS_IN_DECK // NUM_RANKS
+
+
+def get_card_suit(card_id: int) -> Suit:
+    return SUITS[get_card_suit_index(card_id)]
+
+
+def get_card_rank(card_id: int) -> int:
+    return card_id % NUM_RANKS + 1
+
+
+def get_card_deck_index(card_id: int) -> int:
+    return card_id // NUM_CARDS_IN_DECK
+
+
+def compare_card_ranks(card_id: int, other_card_id: int) -> int:
+    return ACE_HIGH_RANKS[card_id % NUM_RANKS] - ACE_HIGH_RANKS[other_card_id % NUM_RANKS]
+
+
+def card_id_to_str(card_id: int) -> str:
+    return Card.to_str(get_card_suit(card_id), get_card_rank(card_id))
+
+
 class Card(BaseModel):
     suit: Suit
     rank: Annotated[int, Field(ge=1, le=13)]
@@ -27,6 +75,13 @@ class Card(BaseModel):
 
         return rank1 - rank2
 
+    def to_id(self, deck_index: int = 0) -> int:
+        return encode_card(self.suit, self.rank, deck_index)
+
+    @staticmethod
+    def from_id(card_id: int) -> Card:
+        return CARDS_BY_FACE[get_card_face(card_id)]
+
     @staticmethod
     def from_str(card_string: str) -> Card:
         if len(card_string) < 2 or 3 < len(card_string):
@@ -71,3 +126,7 @@ class Card(BaseModel):
 
     def __str__(self) -> str:
         return Card.to_str(self.suit, self.rank)
+
+
+# Cards are frozen, so every card id maps onto one shared instance at the wire boundary
+CARDS_BY_FACE = [Card(suit=suit, rank=rank) for suit in SUITS for rank in range(1, 14)]
@@ -1,10 +1,12 @@
 from abc import ABC, abstractmethod
+from enum import IntEnum
 from typing import Any, Generic, Mapping, Type, TypeVar
 
 from pydantic import ValidationError
 
 from server.models.camel_model import CamelModel
 from server.models.game import GamePlayer, GamePlayerType, GameState, GameStatus
+from server.utils.debug_encoder import dump_class
 
 
 class GameError(Exception):
@@ -18,6 +20,36 @@ class GameError(Exception):
 Action = TypeVar("Action", bound=CamelModel)
 
 
+class GameLogEntryType(IntEnum):
+    ADD_PLAYER = 0
+    REMOVE_PLAYER = 1
+    START_GAME = 2
+    INPUT = 3
+    # Doesn't change the game, but notes the seed that a round was dealt from
+    DEAL = 4
+
+
+# One accepted change to a game, which together with the ones before it is enough to
+# replay the game up to its state_version (see server.data.game_log)
+class GameLogEntry:
+    state_version: int
+    entry_type: GameLogEntryType
+    player_id: int | None
+    data: Any
+
+    def __init__(
+        self,
+        state_version: int,
+        entry_type: GameLogEntryType,
+        player_id: int | None = None,
+        data: Any = None,
+    ) -> None:
+        self.state_version = state_version
+        self.entry_type = entry_type
+        self.player_id = player_id
+        self.data = data
+
+
 class Game(Generic[Action], ABC):
     _action_cls: Type[Action]
 
@@ -26,6 +58,23 @@ class Game(Generic[Action], ABC):
     status: GameStatus
     players: dict[int, GamePlayer]
 
+    # Bumped on every change that clients can see
+    state_version: int
+
+    # Dumps of the whole game include every hidden card, so they're only built for games
+    # that ask for them
+    debug_state: bool
+    _debug_state_dump: tuple[int, dict[str, Any]] | None
+
+    # Typed events for things that happen part way through an action (e.g. a trick
+    # ending), collected only for games that have someone to send them to
+    record_events: bool
+    events: list[CamelModel]
+
+    # Every accepted change, collected only for games that are being logged
+    record_log: bool
+    log_entries: list[GameLogEntry]
+
     def __init__(self, action_cls: Type[Action], game_id: str) -> None:
         self._action_cls = action_cls
 
@@ -34,9 +83,62 @@ class Game(Generic[Action], ABC):
         self.status = GameStatus.NOT_STARTED
         self.players = {}
 
+        self.state_version = 0
+
+        self.debug_state = False
+        self._debug_state_dump = None
+
+        self.record_events = False
+        self.events = []
+
+        self.record_log = False
+        self.log_entries = []
+
     @abstractmethod
     def build_game_states(self, player_ids: set[int]) -> Mapping[int, GameState]: ...
 
+    # What every spectator sees, which is also the part of every player's state that
+    # they all share
+    @abstractmethod
+    def build_public_game_state(self) -> GameState: ...
+
+    # Merged over the public game state to build a player's state
+    @abstractmethod
+    def build_private_game_state(self, player_id: int) -> CamelModel: ...
+
+    def get_debug_state(self) -> dict[str, Any] | None:
+        if not self.debug_state:
+            return None
+
+        if (
+            self._debug_state_dump is None
+            or self._debug_state_dump[0] != self.state_version
+        ):
+            self._debug_state_dump = (
+                self.state_version,
+                dump_class(self, exclude={"_debug_state_dump", "events"}),
+            )
+
+        return self._debug_state_dump[1]
+
+    def drain_events(self) -> list[CamelModel]:
+        events = self.events
+        self.events = []
+        return events
+
+    def drain_log_entries(self) -> list[GameLogEntry]:
+        log_entries = self.log_entries
+        self.log_entries = []
+        return log_entries
+
+    def log(
+        self, entry_type: GameLogEntryType, player_id: int | None = None, data: Any = None
+    ) -> None:
+        if self.record_log:
+            self.log_entries.append(
+                GameLogEntry(self.state_version, entry_type, player_id, data)
+            )
+
     def is_in_game(self, player_id: int) -> bool:
         return player_id in self.players
 
@@ -45,6 +147,8 @@ class Game(Generic[Action], ABC):
     ) -> None:
         game_player = GamePlayer(player_id=player_id, player_type=player_type)
         self.players[player_id] = game_player
+        self.state_version += 1
+        self.log(GameLogEntryType.ADD_PLAYER, player_id, player_type.value)
 
     def remove_player(self, player_id: int) -> GamePlayer:
         if player_id not in self.players:
@@ -52,18 +156,20 @@ class Game(Generic[Action], ABC):
 
         player = self.players[player_id]
         del self.players[player_id]
+        self.state_version += 1
+        self.log(GameLogEntryType.REMOVE_PLAYER, player_id)
 
         return player
 
-    async def start_game(self) -> None:
+    def start_game(self) -> None:
         if self.status == GameStatus.IN_PROGRESS:
             raise GameError("Game has already started")
 
         self.status = GameStatus.IN_PROGRESS
+        self.state_version += 1
+        self.log(GameLogEntryType.START_GAME)
 
-    async def process_raw_input(
-        self, player_id: int, raw_game_input: dict[str, Any]
-    ) -> None:
+    def process_raw_input(self, player_id: int, raw_game_input: dict[str, Any]) -> None:
         try:
             parsed_action = self._action_cls.model_validate(raw_game_input)
         except ValidationError as error:
@@ -72,7 +178,27 @@ class Game(Generic[Action], ABC):
                 f"(input: {raw_game_input})"
             ) from error
 
-        await self.process_input(player_id, parsed_action)
+        self.apply_input(player_id, parsed_action)
+
+    def apply_input(self, player_id: int, game_input: Action) -> None:
+        log_position = len(self.log_entries)
+        self.process_input(player_id, game_input)
+        self.state_version += 1
+
+        if self.record_log:
+            # Anything logged while processing the input (e.g. a new round's deal) is
+            # part of the same change, so it's logged after the input at its version
+            for log_entry in self.log_entries[log_position:]:
+                log_entry.state_version = self.state_version
+            self.log_entries.insert(
+                log_position,
+                GameLogEntry(
+                    self.state_version,
+                    GameLogEntryType.INPUT,
+                    player_id,
+                    game_input.model_dump(mode="json"),
+                ),
+            )
 
     @abstractmethod
-    async def process_input(self, player_id: int, game_input: Action) -> None: ...
+    def process_input(self, player_id: int, game_input: Action) -> None: ...
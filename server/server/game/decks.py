@@ -1,82 +1,130 @@
 from __future__ import annotations
 
-from collections import Counter, deque
+import hashlib
+from collections import deque
 from collections.abc import Iterable, Sequence
 from random import Random
-from typing import Counter as CounterType
 
-from .card import Card, Suit
+from .card import NUM_CARDS_IN_DECK, card_id_to_str
 
-NUM_CARDS_IN_DECK = 52
+SEED_MASK = (1 << 64) - 1
 
 
+# Deals are keyed by (game seed, round) rather than by a running Random, so any round's
+# deal can be regenerated from the game seed alone
+def get_deal_seed(game_seed: int, round_index: int) -> int:
+    digest = hashlib.blake2b(
+        (game_seed & SEED_MASK).to_bytes(8, "little")
+        + (round_index & SEED_MASK).to_bytes(8, "little"),
+        digest_size=8,
+    ).digest()
+    return int.from_bytes(digest, "little")
+
+
+def shuffle_batch(num_decks: int, seeds: Iterable[int]) -> list[list[int]]:
+    rand = Random()
+    ordered_cards = list(range(num_decks * NUM_CARDS_IN_DECK))
+
+    shuffled_decks: list[list[int]] = []
+    for seed in seeds:
+        rand.seed(seed)
+        cards = ordered_cards.copy()
+        rand.shuffle(cards)
+        shuffled_decks.append(cards)
+
+    return shuffled_decks
+
+
+def deal_from_seed(
+    num_decks: int, seed: int, num_hands: int, num_cards: int
+) -> list[list[int]]:
+    cards = shuffle_batch(num_decks, [seed])[0]
+    return [
+        cards[index * num_cards : (index + 1) * num_cards] for index in range(num_hands)
+    ]
+
+
+# A deque so that cards come off the top and go back on either end in O(k)
 class Decks:
-    cards: deque[Card]
+    cards: deque[int]
     num_decks: int
 
-    _drawn_card_counts: CounterType[str]
+    # Indexed by card id - every card id is unique across decks, so this is 1 while a card
+    # is out of the deck and 0 while it's in it
+    _drawn_card_counts: bytearray
 
     def __init__(self, num_decks: int = 1) -> None:
-        self.cards = deque(maxlen=num_decks * NUM_CARDS_IN_DECK)
+        self.cards = deque(range(num_decks * NUM_CARDS_IN_DECK))
         self.num_decks = num_decks
 
-        for _ in range(num_decks):
-            for suit in Suit:
-                for number in range(1, 14):
-                    self.cards.append(Card(suit=suit, rank=number))
+        self._drawn_card_counts = bytearray(num_decks * NUM_CARDS_IN_DECK)
 
-        self._drawn_card_counts = Counter([])
+    def reset(self) -> None:
+        if len(self.cards) != self.num_decks * NUM_CARDS_IN_DECK:
+            raise ValueError(
+                f"Cannot reset the deck while cards are drawn - cards in deck: {len(self.cards)}"
+            )
+
+        self.cards = deque(range(self.num_decks * NUM_CARDS_IN_DECK))
 
     def shuffle(self, rand: Random | None = None) -> None:
         if rand is None:
             rand = Random()
 
-        shuffle_index = len(self.cards) - 1
-
-        while shuffle_index > 0:
-            rand_index = rand.randint(0, shuffle_index)
-            temp = self.cards[shuffle_index]
-            self.cards[shuffle_index] = self.cards[rand_index]
-            self.cards[rand_index] = temp
-            shuffle_index -= 1
+        # Shuffled as a list, which indexes in O(1), so a seed deals the same cards as
+        # it does through shuffle_batch
+        cards = list(self.cards)
+        rand.shuffle(cards)
+        self.cards = deque(cards)
 
-    def draw(self, count: int = 1) -> deque[Card]:
+    def draw(self, count: int = 1) -> list[int]:
         if len(self.cards) < count:
             raise ValueError(
                 f"Not enough cards left in the deck to draw - cards in deck: {len(self.cards)}"
             )
 
-        drawn_cards: deque[Card] = deque()
-        for _ in range(count):
-            drawn_cards.append(self.cards.popleft())
+        drawn_cards = [self.cards.popleft() for _ in range(count)]
 
-        self._drawn_card_counts.update(map(str, drawn_cards))
+        for card in drawn_cards:
+            self._drawn_card_counts[card] = 1
 
         return drawn_cards
 
-    def replace_bottom(self, cards: Sequence[Card]) -> None:
-        self._compute_card_counts(cards)
+    def deal(self, num_hands: int, count: int) -> list[list[int]]:
+        drawn_cards = self.draw(num_hands * count)
+        return [
+            drawn_cards[index * count : (index + 1) * count] for index in range(num_hands)
+        ]
+
+    def replace_bottom(self, cards: Sequence[int]) -> None:
+        self._return_cards(cards)
         self.cards.extend(cards)
 
-    def replace(self, cards: Sequence[Card]) -> None:
-        self._compute_card_counts(cards)
+    def replace(self, cards: Sequence[int]) -> None:
+        self._return_cards(cards)
         self.cards.extendleft(reversed(cards))
 
-    def _compute_card_counts(
-        self, new_cards: Iterable[Card], validate: bool = True
-    ) -> None:
-        updated_counter = Counter(map(str, new_cards))
-        updated_counter.subtract(self._drawn_card_counts)
+    def _return_cards(self, cards: Sequence[int]) -> None:
+        drawn_card_counts = self._drawn_card_counts
+        num_cards = len(drawn_card_counts)
+
+        returned_cards: list[int] = []
+        invalid_cards: list[int] = []
+        for card in cards:
+            if 0 <= card < num_cards and drawn_card_counts[card]:
+                drawn_card_counts[card] = 0
+                returned_cards.append(card)
+            else:
+                invalid_cards.append(card)
 
-        if validate:
-            invalid_cards = list(updated_counter.elements())
-            if len(invalid_cards) != 0:
-                raise ValueError(
-                    "Invalid card insertion - the following cards do not belong in this deck: "
-                    f"[{', '.join(map(str, invalid_cards))}]"
-                )
+        if len(invalid_cards) != 0:
+            for card in returned_cards:
+                drawn_card_counts[card] = 1
 
-        self._drawn_card_counts = -updated_counter
+            raise ValueError(
+                "Invalid card insertion - the following cards do not belong in this deck: "
+                f"[{', '.join(map(card_id_to_str, invalid_cards))}]"
+            )
 
     def __str__(self) -> str:
-        return f"[{', '.join(map(str, self.cards))}]"
+        return f"[{', '.join(map(card_id_to_str, self.cards))}]"
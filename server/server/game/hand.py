@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterable, Iterator
+
+from .card import NUM_CARDS_IN_DECK, NUM_RANKS, SUITS, card_id_to_str
+
+# Left in the slot of a card that was removed until the slots are next compacted
+_REMOVED = -1
+
+
+class Hand:
+    # Card ids in display order. Removing a card leaves a gap behind instead of shifting
+    # every card after it, and the gaps are closed once they're half of the slots or the
+    # order is read.
+    _slots: list[int]
+    # Card id -> index of its slot
+    _slot_indices: dict[int, int]
+    # Copies of each card face held, for multi-deck games
+    _face_counts: array
+    # Per-suit bitmasks with bit (rank - 1) set while the hand holds that card face
+    _suit_masks: list[int]
+
+    def __init__(self, cards: Iterable[int] = ()) -> None:
+        self._slots = []
+        self._slot_indices = {}
+
+        self._face_counts = array("H", [0]) * NUM_CARDS_IN_DECK
+        self._suit_masks = [0] * len(SUITS)
+
+        self.extend(cards)
+
+    @property
+    def cards(self) -> list[int]:
+        if len(self._slots) != len(self._slot_indices):
+            self._compact()
+        return self._slots
+
+    def add(self, card_id: int) -> None:
+        face = card_id % NUM_CARDS_IN_DECK
+        self._face_counts[face] += 1
+        self._suit_masks[face // NUM_RANKS] |= 1 << (face % NUM_RANKS)
+        self._slot_indices[card_id] = len(self._slots)
+        self._slots.append(card_id)
+
+    def extend(self, card_ids: Iterable[int]) -> None:
+        for card_id in card_ids:
+            self.add(card_id)
+
+    def has_card(self, face: int) -> bool:
+        return self._face_counts[face % NUM_CARDS_IN_DECK] > 0
+
+    def has_suit(self, suit_index: int) -> bool:
+        return self._suit_masks[suit_index] != 0
+
+    def get_suit_mask(self, suit_index: int) -> int:
+        return self._suit_masks[suit_index]
+
+    def remove(self, face: int) -> int:
+        face %= NUM_CARDS_IN_DECK
+        if self._face_counts[face] == 0:
+            raise ValueError(f"Card is not in hand: {card_id_to_str(face)}")
+
+        self._face_counts[face] -= 1
+        if self._face_counts[face] == 0:
+            self._suit_masks[face // NUM_RANKS] &= ~(1 << (face % NUM_RANKS))
+
+        # Copies of a face are one deck's worth of ids apart, and one of them is held
+        card_id = face
+        while card_id not in self._slot_indices:
+            card_id += NUM_CARDS_IN_DECK
+        self._slots[self._slot_indices.pop(card_id)] = _REMOVED
+        if 2 * len(self._slot_indices) < len(self._slots):
+            self._compact()
+
+        return card_id
+
+    # The card ends up at to_index, the same as the client's optimistic reorder
+    def move(self, from_index: int, to_index: int) -> None:
+        cards = self.cards
+        cards.insert(to_index, cards.pop(from_index))
+        for index in range(min(from_index, to_index), max(from_index, to_index) + 1):
+            self._slot_indices[cards[index]] = index
+
+    def clear(self) -> None:
+        self._slots = []
+        self._slot_indices = {}
+        self._face_counts = array("H", [0]) * NUM_CARDS_IN_DECK
+        self._suit_masks = [0] * len(SUITS)
+
+    def copy(self) -> Hand:
+        hand = Hand.__new__(Hand)
+        hand._slots = self._slots.copy()
+        hand._slot_indices = self._slot_indices.copy()
+        hand._face_counts = self._face_counts[:]
+        hand._suit_masks = self._suit_masks.copy()
+
+        return hand
+
+    def _compact(self) -> None:
+        self._slots = [card_id for card_id in self._slots if card_id != _REMOVED]
+        self._slot_indices = {card_id: index for index, card_id in enumerate(self._slots)}
+
+    def __len__(self) -> int:
+        return len(self._slot_indices)
+
+    def __iter__(self) -> Iterator[int]:
+        return (card_id for card_id in self._slots if card_id != _REMOVED)
+
+    def __str__(self) -> str:
+        return f"[{', '.join(map(card_id_to_str, self))}]"
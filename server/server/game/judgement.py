@@ -1,26 +1,37 @@
 import logging
 import math
-from typing import Mapping
+from random import Random
+from typing import Mapping, Sequence
 
-from server.data import socket_messager
 from server.models.game import GameName, GamePlayer, GamePlayerType, GameState, GameStatus
 from server.models.judgement import (
     JudgementAction,
     JudgementBidHandsAction,
     JudgementGameState,
+    JudgementLegalMoves,
     JudgementOrderCardsAction,
     JudgementPhase,
     JudgementPlayCardAction,
     JudgementPlayerState,
+    JudgementPrivateGameState,
     JudgementSettings,
     JudgementSpectatorGameState,
+    JudgementTrickCompletedEvent,
     JudgementUpdateSettingsAction,
 )
-from server.utils.debug_encoder import dump_class
 
-from .card import Card, Suit
-from .core import Game, GameError
-from .decks import Decks
+from .card import (
+    SUIT_INDICES,
+    Card,
+    Suit,
+    card_id_to_str,
+    compare_card_ranks,
+    get_card_face,
+    get_card_suit_index,
+)
+from .core import Game, GameError, GameLogEntryType
+from .decks import Decks, get_deal_seed
+from .hand import Hand
 
 logger = logging.getLogger(__name__)
 
@@ -28,54 +39,138 @@ logger = logging.getLogger(__name__)
 TRUMP_ORDER = [Suit.SPADES, Suit.DIAMONDS, Suit.CLUBS, Suit.HEARTS]
 
 
+def beats_winning_card(
+    card: int,
+    winning_card: int,
+    trick_suit_index: int,
+    trump_suit_index: int,
+    last_duplicate_wins: bool = False,
+) -> bool:
+    face = get_card_face(card)
+    winning_face = get_card_face(winning_card)
+    if face == winning_face:
+        return last_duplicate_wins
+
+    suit_index = get_card_suit_index(face)
+    winning_suit_index = get_card_suit_index(winning_face)
+    if suit_index == trump_suit_index:
+        return (
+            winning_suit_index != trump_suit_index
+            or compare_card_ranks(face, winning_face) > 0
+        )
+    if suit_index == trick_suit_index:
+        return (
+            winning_suit_index != trump_suit_index
+            and compare_card_ranks(face, winning_face) > 0
+        )
+
+    return False
+
+
 def compute_winning_card(
-    pile: list[Card], trump_suit: Suit, last_duplicate_wins: bool = False
+    pile: Sequence[int], trump_suit: Suit, last_duplicate_wins: bool = False
 ) -> int:
     if len(pile) == 0:
         raise ValueError("Can't find the winner of an empty pile!")
 
+    trump_suit_index = SUIT_INDICES[trump_suit]
+    trick_suit_index = get_card_suit_index(pile[0])
+
     winning_index = 0
-    trick_suit = pile[0].suit
-    for i, card in enumerate(pile[1:]):
-        index = i + 1
-        if card == pile[winning_index]:
-            if last_duplicate_wins:
-                winning_index = index
-        elif card.suit == trump_suit:
-            if (
-                pile[winning_index].suit != trump_suit
-                or card.compare_rank(pile[winning_index]) > 0
-            ):
-                winning_index = index
-        elif card.suit == trick_suit:
-            if (
-                pile[winning_index].suit != trump_suit
-                and card.compare_rank(pile[winning_index]) > 0
-            ):
-                winning_index = index
-
-    logger.info("%s %s", winning_index, pile)
+    for index in range(1, len(pile)):
+        if beats_winning_card(
+            pile[index],
+            pile[winning_index],
+            trick_suit_index,
+            trump_suit_index,
+            last_duplicate_wins,
+        ):
+            winning_index = index
+
     return winning_index
 
 
+class JudgementPlayer:
+    score: int
+    current_won_tricks: int
+    current_bid: int | None
+
+    hand: Hand
+    # Bitmask of suit indices this player has shown they're out of this round
+    void_suits: int
+
+    def __init__(self) -> None:
+        self.score = 0
+        self.current_won_tricks = 0
+        self.current_bid = None
+
+        self.hand = Hand()
+        self.void_suits = 0
+
+    def to_player_state(self) -> JudgementPlayerState:
+        return JudgementPlayerState(
+            score=self.score,
+            current_won_tricks=self.current_won_tricks,
+            current_bid=self.current_bid,
+            hand=[Card.from_id(card_id) for card_id in self.hand.cards],
+        )
+
+
+class JudgementRoundResult:
+    round_index: int
+    trump_suit: Suit
+    bids: dict[int, int | None]
+    won_tricks: dict[int, int]
+    round_scores: dict[int, int]
+
+    def __init__(
+        self,
+        round_index: int,
+        trump_suit: Suit,
+        bids: dict[int, int | None],
+        won_tricks: dict[int, int],
+        round_scores: dict[int, int],
+    ) -> None:
+        self.round_index = round_index
+        self.trump_suit = trump_suit
+        self.bids = bids
+        self.won_tricks = won_tricks
+        self.round_scores = round_scores
+
+
 class JudgementGame(Game[JudgementAction]):
+    trump_order: Sequence[Suit] = TRUMP_ORDER
+    made_bid_bonus: int = 10
+    last_duplicate_wins: bool = False
+
     phase: JudgementPhase
     settings: JudgementSettings
 
     ordered_player_ids: list[int]
 
     decks: Decks
-    pile: list[Card]
-    discard_pile: list[Card]
+    pile: list[int]
+    discard_pile: list[int]
+    winning_pile_index: int | None
 
     current_round: int
     current_trick: int
     start_player_index: int
     current_turn_index: int
 
-    player_states: dict[int, JudgementPlayerState]
+    player_states: dict[int, JudgementPlayer]
+    round_results: list[JudgementRoundResult]
+
+    # The current player's legal moves, recomputed whenever the turn changes
+    legal_cards: list[int]
+    legal_bids: range
+
+    # Every round's deal is derived from this, see decks.get_deal_seed
+    seed: int
 
-    def __init__(self, game_id: str) -> None:
+    def __init__(
+        self, game_id: str, rand: Random | None = None, seed: int | None = None
+    ) -> None:
         super().__init__(JudgementAction, game_id)
 
         self.phase = JudgementPhase.NOT_STARTED
@@ -86,6 +181,7 @@ class JudgementGame(Game[JudgementAction]):
         self.decks = Decks()
         self.pile = []
         self.discard_pile = []
+        self.winning_pile_index = None
 
         self.current_round = 0
         self.current_trick = 0
@@ -93,53 +189,78 @@ class JudgementGame(Game[JudgementAction]):
         self.current_turn_index = 0
 
         self.player_states = {}
+        self.round_results = []
+
+        self.legal_cards = []
+        self.legal_bids = range(0)
+
+        if seed is None:
+            seed = (Random() if rand is None else rand).getrandbits(64)
+        self.seed = seed
+
+    def build_public_game_state(self) -> JudgementSpectatorGameState:
+        return JudgementSpectatorGameState(
+            player_type=GamePlayerType.SPECTATOR,
+            game_name=GameName.JUDGEMENT,
+            status=self.status,
+            players=self.players,
+            ordered_player_ids=self.ordered_player_ids,
+            settings=self.settings,
+            phase=self.phase,
+            pile=[Card.from_id(card_id) for card_id in self.pile],
+            current_round=self.current_round,
+            current_trick=self.current_trick,
+            start_player_index=self.start_player_index,
+            current_turn_index=self.current_turn_index,
+            winning_player_index=self.get_winning_player_index(),
+            full_state_do_not_use=self.get_debug_state(),
+        )
+
+    def build_private_game_state(self, player_id: int) -> JudgementPrivateGameState:
+        return JudgementPrivateGameState(
+            player_type=GamePlayerType.PLAYER,
+            player_state=self.player_states[player_id].to_player_state(),
+            legal_moves=self.build_legal_moves(player_id),
+        )
 
     def build_game_states(self, player_ids: set[int]) -> Mapping[int, GameState]:
         game_states: dict[int, GameState] = {}
+        public_game_state = self.build_public_game_state()
 
         for player_id in player_ids:
             if self.players[player_id].player_type == GamePlayerType.PLAYER:
-                game_states[player_id] = JudgementGameState(
-                    player_type=GamePlayerType.PLAYER,
-                    game_name=GameName.JUDGEMENT,
-                    status=self.status,
-                    players=self.players,
-                    ordered_player_ids=self.ordered_player_ids,
-                    settings=self.settings,
-                    phase=self.phase,
-                    pile=self.pile,
-                    current_round=self.current_round,
-                    current_trick=self.current_trick,
-                    start_player_index=self.start_player_index,
-                    current_turn_index=self.current_turn_index,
-                    player_state=self.player_states[player_id],
-                    full_state_do_not_use=dump_class(self),
+                game_states[player_id] = JudgementGameState.model_construct(
+                    **{
+                        **dict(public_game_state),
+                        **dict(self.build_private_game_state(player_id)),
+                    }
                 )
             elif self.players[player_id].player_type == GamePlayerType.SPECTATOR:
-                game_states[player_id] = JudgementSpectatorGameState(
-                    player_type=GamePlayerType.SPECTATOR,
-                    game_name=GameName.JUDGEMENT,
-                    status=self.status,
-                    players=self.players,
-                    ordered_player_ids=self.ordered_player_ids,
-                    settings=self.settings,
-                    phase=self.phase,
-                    pile=self.pile,
-                    current_round=self.current_round,
-                    current_trick=self.current_trick,
-                    start_player_index=self.start_player_index,
-                    current_turn_index=self.current_turn_index,
-                    full_state_do_not_use=dump_class(self),
-                )
+                game_states[player_id] = public_game_state
 
         return game_states
 
-    async def start_game(self) -> None:
-        await super().start_game()
+    def build_legal_moves(self, player_id: int) -> JudgementLegalMoves | None:
+        if (
+            self.status != GameStatus.IN_PROGRESS
+            or self.get_current_player_id() != player_id
+        ):
+            return None
+
+        if self.phase == JudgementPhase.BIDDING:
+            return JudgementLegalMoves(
+                cards=[], min_bid=self.legal_bids.start, max_bid=self.legal_bids.stop - 1
+            )
+
+        legal_faces = dict.fromkeys(map(get_card_face, self.legal_cards))
+        return JudgementLegalMoves(cards=[Card.from_id(face) for face in legal_faces])
+
+    def start_game(self) -> None:
+        super().start_game()
 
         self.decks = Decks(num_decks=self.settings.num_decks)
 
-        await self.start_round()
+        self.start_round()
 
     def add_player(
         self, player_id: int, player_type: GamePlayerType = GamePlayerType.PLAYER
@@ -151,9 +272,7 @@ class JudgementGame(Game[JudgementAction]):
 
         if player_type == GamePlayerType.PLAYER:
             self.ordered_player_ids.append(player_id)
-            self.player_states[player_id] = JudgementPlayerState(
-                score=0, current_won_tricks=0, hand=[]
-            )
+            self.player_states[player_id] = JudgementPlayer()
 
             max_rounds = math.floor(
                 self.settings.num_decks * 52 / len(self.ordered_player_ids)
@@ -177,19 +296,17 @@ class JudgementGame(Game[JudgementAction]):
             len(self.ordered_player_ids) > 0 and self.ordered_player_ids[0] == player_id
         )
 
-    async def process_input(self, player_id: int, game_input: JudgementAction) -> None:
-        logger.debug("player_id: %s, action: %s", player_id, repr(game_input))
+    def process_input(self, player_id: int, game_input: JudgementAction) -> None:
+        logger.debug("player_id: %s, action: %r", player_id, game_input)
 
         if isinstance(game_input, JudgementUpdateSettingsAction):
             self.handle_update_settings_action(player_id, game_input)
         elif isinstance(game_input, JudgementOrderCardsAction):
-            await self.handle_order_cards_action(player_id, game_input)
+            self.handle_order_cards_action(player_id, game_input)
         elif isinstance(game_input, JudgementBidHandsAction):
-            await self.handle_bid_action(player_id, game_input)
+            self.handle_bid_action(player_id, game_input)
         elif isinstance(game_input, JudgementPlayCardAction):
-            await self.handle_play_card_action(player_id, game_input)
-
-        await socket_messager.emit_game_state(self)
+            self.handle_play_card_action(player_id, game_input)
 
     def handle_update_settings_action(
         self, player_id: int, action: JudgementUpdateSettingsAction
@@ -205,62 +322,69 @@ class JudgementGame(Game[JudgementAction]):
         if action.num_rounds is not None:
             self.settings.num_rounds = action.num_rounds
 
-    async def handle_order_cards_action(
+    def handle_order_cards_action(
         self, player_id: int, action: JudgementOrderCardsAction
     ) -> None:
-        player_hand = self.player_states[player_id].hand
-        moved_card = player_hand.pop(action.from_index)
-        if action.to_index == len(player_hand) - 1:
-            player_hand.append(moved_card)
-        else:
-            player_hand.insert(action.to_index, moved_card)
+        self.player_states[player_id].hand.move(action.from_index, action.to_index)
 
-        await socket_messager.emit_game_state(self)
+    def handle_bid_action(self, player_id: int, action: JudgementBidHandsAction) -> None:
+        self.bid(player_id, action.num_hands)
 
-    async def handle_bid_action(
-        self, player_id: int, action: JudgementBidHandsAction
+    def handle_play_card_action(
+        self, player_id: int, action: JudgementPlayCardAction
     ) -> None:
+        self.play_card(player_id, action.get_card().to_id())
+
+    def bid(self, player_id: int, num_hands: int) -> None:
         self.assert_phase(JudgementPhase.BIDDING)
         self.assert_turn(player_id)
-        self.player_states[player_id].current_bid = action.num_hands
-
-        if self.current_turn_index < len(self.ordered_player_ids) - 1:
-            self.current_turn_index += 1
+        if num_hands not in self.legal_bids:
+            raise GameError(f"Invalid bid: {num_hands}")
+        self.player_states[player_id].current_bid = num_hands
+
+        next_turn_index = (self.current_turn_index + 1) % len(self.ordered_player_ids)
+        if next_turn_index != self.start_player_index:
+            self.current_turn_index = next_turn_index
+            self.update_legal_moves()
         else:
             self.phase = JudgementPhase.PLAYING
-            self.start_trick()
+            self.start_trick(self.start_player_index)
 
-    async def handle_play_card_action(
-        self, player_id: int, action: JudgementPlayCardAction
-    ) -> None:
+    def play_card(self, player_id: int, face: int) -> None:
         self.assert_phase(JudgementPhase.PLAYING)
         self.assert_turn(player_id)
 
-        card = action.get_card()
-        if card not in self.player_states[player_id].hand:
-            raise GameError(f"Missing card from hand: {str(card)}")
-
-        if (
-            len(self.pile) > 0
-            and card.suit != self.pile[0].suit
-            and any(
-                card.suit == self.pile[0].suit
-                for card in self.player_states[player_id].hand
-            )
-        ):
-            raise GameError(f"Cannot play non-matching suit: {str(card)}")
-
-        self.player_states[player_id].hand.remove(card)
+        player_hand = self.player_states[player_id].hand
+        if not player_hand.has_card(face):
+            raise GameError(f"Missing card from hand: {card_id_to_str(face)}")
+
+        if len(self.pile) > 0:
+            trick_suit_index = get_card_suit_index(self.pile[0])
+            if get_card_suit_index(face) != trick_suit_index:
+                if player_hand.has_suit(trick_suit_index):
+                    raise GameError(
+                        f"Cannot play non-matching suit: {card_id_to_str(face)}"
+                    )
+                self.player_states[player_id].void_suits |= 1 << trick_suit_index
+
+        card = player_hand.remove(face)
         self.pile.append(card)
+        if self.winning_pile_index is None or beats_winning_card(
+            card,
+            self.pile[self.winning_pile_index],
+            get_card_suit_index(self.pile[0]),
+            SUIT_INDICES[self.get_trump()],
+            self.last_duplicate_wins,
+        ):
+            self.winning_pile_index = len(self.pile) - 1
 
         if len(self.pile) < len(self.ordered_player_ids):
             self.current_turn_index = (self.current_turn_index + 1) % len(
                 self.ordered_player_ids
             )
+            self.update_legal_moves()
         else:
-            await self.end_trick()
-
-        await socket_messager.emit_game_state(self)
+            self.end_trick()
 
     def assert_phase(self, phase: JudgementPhase) -> None:
         if self.phase != phase:
@@ -274,65 +398,148 @@ class JudgementGame(Game[JudgementAction]):
         return self.settings.num_rounds - self.current_round
 
     def get_trump(self) -> Suit:
-        return TRUMP_ORDER[self.current_round % 4]
+        return self.trump_order[self.current_round % len(self.trump_order)]
+
+    def get_winning_player_index(self) -> int | None:
+        if self.winning_pile_index is None:
+            return None
+
+        return (self.start_player_index + self.winning_pile_index) % len(
+            self.ordered_player_ids
+        )
+
+    def get_current_player_id(self) -> int:
+        return self.ordered_player_ids[self.current_turn_index]
+
+    def get_playable_cards(self, player_id: int) -> list[int]:
+        if (
+            self.phase == JudgementPhase.PLAYING
+            and player_id == self.get_current_player_id()
+        ):
+            # A copy, so that callers can't change the cached legal moves
+            return self.legal_cards.copy()
+
+        return self.compute_playable_cards(player_id)
+
+    def compute_playable_cards(self, player_id: int) -> list[int]:
+        player_hand = self.player_states[player_id].hand
+        if len(self.pile) == 0:
+            return list(player_hand)
+
+        trick_suit_index = get_card_suit_index(self.pile[0])
+        if not player_hand.has_suit(trick_suit_index):
+            return list(player_hand)
+
+        return [
+            card for card in player_hand if get_card_suit_index(card) == trick_suit_index
+        ]
+
+    def update_legal_moves(self) -> None:
+        if self.status != GameStatus.IN_PROGRESS:
+            self.legal_cards = []
+            self.legal_bids = range(0)
+        elif self.phase == JudgementPhase.BIDDING:
+            self.legal_cards = []
+            self.legal_bids = range(self.get_num_tricks_for_round() + 1)
+        else:
+            self.legal_cards = self.compute_playable_cards(self.get_current_player_id())
+            self.legal_bids = range(0)
 
     def deal(self) -> None:
-        num_cards_to_deal = self.get_num_tricks_for_round()
+        hands = self.decks.deal(
+            len(self.ordered_player_ids), self.get_num_tricks_for_round()
+        )
 
-        for player_state in self.player_states.values():
-            player_state.hand.extend(self.decks.draw(num_cards_to_deal))
+        for player_id, hand in zip(self.ordered_player_ids, hands, strict=True):
+            self.player_states[player_id].hand.extend(hand)
 
-    async def start_round(self) -> None:
+    def start_round(self) -> None:
         self.current_trick = 0
         self.start_player_index = self.current_round % len(self.ordered_player_ids)
         self.current_turn_index = self.start_player_index
-        self.decks.replace(self.discard_pile)
-        self.pile = []
-        self.discard_pile = []
+        self.discard_pile.extend(self.pile)
+        self.winning_pile_index = None
         self.phase = JudgementPhase.BIDDING
         for player_state in self.player_states.values():
             player_state.current_bid = None
             player_state.current_won_tricks = 0
+            player_state.void_suits = 0
+            self.discard_pile.extend(player_state.hand)
+            player_state.hand.clear()
+        self.decks.replace(self.discard_pile)
+        self.pile = []
+        self.discard_pile = []
 
-        self.decks.shuffle()
+        # Every deal starts from a fresh deck so it only depends on the seed and round
+        deal_seed = get_deal_seed(self.seed, self.current_round)
+        self.decks.reset()
+        self.decks.shuffle(Random(deal_seed))
+        self.log(GameLogEntryType.DEAL, data=[self.current_round, deal_seed])
         self.deal()
-
-        await socket_messager.emit_game_state(self)
+        self.update_legal_moves()
 
     def start_trick(self, start_player_index: int = 0) -> None:
         self.start_player_index = start_player_index
         self.current_turn_index = self.start_player_index
         self.discard_pile.extend(self.pile)
         self.pile = []
+        self.winning_pile_index = None
+        self.update_legal_moves()
 
-    async def end_trick(self) -> None:
-        winning_player_index = (
-            self.start_player_index + compute_winning_card(self.pile, self.get_trump())
-        ) % len(self.ordered_player_ids)
+    def end_trick(self) -> None:
+        winning_player_index = self.get_winning_player_index()
+        if winning_player_index is None:
+            raise ValueError("Can't find the winner of an empty pile!")
         winning_player_id = self.ordered_player_ids[winning_player_index]
         self.player_states[winning_player_id].current_won_tricks += 1
+        if self.record_events:
+            self.events.append(
+                JudgementTrickCompletedEvent(
+                    round_index=self.current_round,
+                    trick_index=self.current_trick,
+                    pile=[Card.from_id(card_id) for card_id in self.pile],
+                    winning_player_id=winning_player_id,
+                )
+            )
 
         tricks_left = self.get_num_tricks_for_round() - self.current_trick - 1
         if tricks_left > 0:
             self.current_trick += 1
             self.start_trick(winning_player_index)
         else:
-            await self.end_round()
+            self.end_round()
 
-        await socket_messager.emit_game_state(self)
+    def score_round(self, bid: int | None, won_tricks: int) -> int:
+        if bid != won_tricks:
+            return 0
 
-    async def end_round(self) -> None:
-        for player_state in self.player_states.values():
-            if player_state.current_bid == player_state.current_won_tricks:
-                player_state.score += player_state.current_bid + 10
+        return won_tricks + self.made_bid_bonus
+
+    def end_round(self) -> None:
+        round_result = JudgementRoundResult(
+            round_index=self.current_round,
+            trump_suit=self.get_trump(),
+            bids={},
+            won_tricks={},
+            round_scores={},
+        )
+        for player_id, player_state in self.player_states.items():
+            round_score = self.score_round(
+                player_state.current_bid, player_state.current_won_tricks
+            )
+            player_state.score += round_score
+
+            round_result.bids[player_id] = player_state.current_bid
+            round_result.won_tricks[player_id] = player_state.current_won_tricks
+            round_result.round_scores[player_id] = round_score
 
             player_state.current_bid = None
             player_state.current_won_tricks = 0
+        self.round_results.append(round_result)
 
         if self.current_round < self.settings.num_rounds - 1:
             self.current_round += 1
-            await self.start_round()
+            self.start_round()
         else:
             self.status = GameStatus.COMPLETE
-
-        await socket_messager.emit_game_state(self)
+            self.update_legal_moves()
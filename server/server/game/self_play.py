@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import math
+import os
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from random import Random
+
+from .card import Suit
+from .judgement import TRUMP_ORDER, JudgementGame, JudgementRoundResult
+from .simulation import JudgementPolicy, RandomPolicy, create_headless_game, play_game
+
+logger = logging.getLogger(__name__)
+
+
+class SelfPlayConfig:
+    num_players: int
+    num_decks: int
+    num_rounds: int | None
+    trump_order: Sequence[Suit]
+    made_bid_bonus: int
+    last_duplicate_wins: bool
+    policy_factory: Callable[[Random], JudgementPolicy]
+    keep_results: bool
+
+    def __init__(
+        self,
+        num_players: int = 4,
+        num_decks: int = 1,
+        num_rounds: int | None = None,
+        trump_order: Sequence[Suit] = TRUMP_ORDER,
+        made_bid_bonus: int = 10,
+        last_duplicate_wins: bool = False,
+        policy_factory: Callable[[Random], JudgementPolicy] = RandomPolicy,
+        keep_results: bool = False,
+    ) -> None:
+        self.num_players = num_players
+        self.num_decks = num_decks
+        self.num_rounds = num_rounds
+        self.trump_order = trump_order
+        self.made_bid_bonus = made_bid_bonus
+        self.last_duplicate_wins = last_duplicate_wins
+        self.policy_factory = policy_factory
+        self.keep_results = keep_results
+
+    def create_game(self, rand: Random) -> JudgementGame:
+        game = create_headless_game(
+            self.num_players, self.num_decks, self.num_rounds, rand=rand
+        )
+        game.trump_order = self.trump_order
+        game.made_bid_bonus = self.made_bid_bonus
+        game.last_duplicate_wins = self.last_duplicate_wins
+
+        return game
+
+
+class SelfPlayGameResult:
+    round_results: list[JudgementRoundResult]
+    final_scores: dict[int, int]
+
+    def __init__(
+        self, round_results: list[JudgementRoundResult], final_scores: dict[int, int]
+    ) -> None:
+        self.round_results = round_results
+        self.final_scores = final_scores
+
+
+class SelfPlayStats:
+    num_games: int
+    num_rounds: int
+    num_player_rounds: int
+    num_bids_made: int
+    total_scores: list[int]
+    num_wins: list[int]
+
+    def __init__(self, num_players: int) -> None:
+        self.num_games = 0
+        self.num_rounds = 0
+        self.num_player_rounds = 0
+        self.num_bids_made = 0
+        self.total_scores = [0] * num_players
+        self.num_wins = [0] * num_players
+
+    def add_game(self, game: JudgementGame) -> None:
+        self.num_games += 1
+        self.num_rounds += len(game.round_results)
+
+        for round_result in game.round_results:
+            for player_id, bid in round_result.bids.items():
+                self.num_player_rounds += 1
+                if bid == round_result.won_tricks[player_id]:
+                    self.num_bids_made += 1
+
+        scores = [
+            game.player_states[player_id].score for player_id in game.ordered_player_ids
+        ]
+        best_score = max(scores)
+        for seat, score in enumerate(scores):
+            self.total_scores[seat] += score
+            if score == best_score:
+                self.num_wins[seat] += 1
+
+    def merge(self, other: SelfPlayStats) -> None:
+        self.num_games += other.num_games
+        self.num_rounds += other.num_rounds
+        self.num_player_rounds += other.num_player_rounds
+        self.num_bids_made += other.num_bids_made
+        for seat in range(len(self.total_scores)):
+            self.total_scores[seat] += other.total_scores[seat]
+            self.num_wins[seat] += other.num_wins[seat]
+
+    def get_bid_success_rate(self) -> float:
+        if self.num_player_rounds == 0:
+            return 0
+        return self.num_bids_made / self.num_player_rounds
+
+    def get_mean_scores(self) -> list[float]:
+        if self.num_games == 0:
+            return [0] * len(self.total_scores)
+        return [total_score / self.num_games for total_score in self.total_scores]
+
+
+class SelfPlayReport:
+    stats: SelfPlayStats
+    results: list[SelfPlayGameResult]
+    num_workers: int
+    elapsed_seconds: float
+
+    def __init__(
+        self,
+        stats: SelfPlayStats,
+        results: list[SelfPlayGameResult],
+        num_workers: int,
+        elapsed_seconds: float,
+    ) -> None:
+        self.stats = stats
+        self.results = results
+        self.num_workers = num_workers
+        self.elapsed_seconds = elapsed_seconds
+
+    def get_games_per_second(self) -> float:
+        if self.elapsed_seconds == 0:
+            return math.inf
+        return self.stats.num_games / self.elapsed_seconds
+
+
+# Each task gets its own seeded stream, so results only depend on the seed and the task
+# size, not on how tasks land on workers
+def get_task_rand(seed: int, task_index: int) -> Random:
+    return Random(f"self-play/{seed}/{task_index}")
+
+
+def play_self_play_games(
+    config: SelfPlayConfig, seed: int, task_index: int, num_games: int
+) -> tuple[SelfPlayStats, list[SelfPlayGameResult]]:
+    rand = get_task_rand(seed, task_index)
+    policy = config.policy_factory(rand)
+
+    stats = SelfPlayStats(config.num_players)
+    results: list[SelfPlayGameResult] = []
+    for _ in range(num_games):
+        game = config.create_game(rand)
+        play_game(game, policy)
+
+        stats.add_game(game)
+        if config.keep_results:
+            results.append(
+                SelfPlayGameResult(
+                    game.round_results,
+                    {
+                        player_id: player_state.score
+                        for player_id, player_state in game.player_states.items()
+                    },
+                )
+            )
+
+    return (stats, results)
+
+
+def run_self_play(
+    config: SelfPlayConfig,
+    num_games: int,
+    num_workers: int | None = None,
+    seed: int = 0,
+    games_per_task: int = 250,
+) -> SelfPlayReport:
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+
+    task_sizes = [
+        min(games_per_task, num_games - start)
+        for start in range(0, num_games, games_per_task)
+    ]
+
+    stats = SelfPlayStats(config.num_players)
+    results: list[SelfPlayGameResult] = []
+
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        futures = [
+            executor.submit(play_self_play_games, config, seed, task_index, task_size)
+            for task_index, task_size in enumerate(task_sizes)
+        ]
+        for future in futures:
+            task_stats, task_results = future.result()
+            stats.merge(task_stats)
+            results.extend(task_results)
+    elapsed_seconds = time.perf_counter() - start_time
+
+    return SelfPlayReport(stats, results, num_workers, elapsed_seconds)
+
+
+def parse_trump_order(trump_order: str) -> list[Suit]:
+    return [Suit(suit) for suit in trump_order]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Play Judgement games against itself")
+    parser.add_argument("--games", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--decks", type=int, default=1)
+    parser.add_argument("--rounds", type=int, default=None)
+    parser.add_argument(
+        "--trump_order",
+        type=parse_trump_order,
+        default=TRUMP_ORDER,
+        help="Suits in trump order, e.g. SDCH",
+    )
+    parser.add_argument("--made_bid_bonus", type=int, default=10)
+    parser.add_argument("--last_duplicate_wins", action="store_true")
+    parser.add_argument("--games_per_task", type=int, default=250)
+    args = parser.parse_args()
+
+    config = SelfPlayConfig(
+        num_players=args.players,
+        num_decks=args.decks,
+        num_rounds=args.rounds,
+        trump_order=args.trump_order,
+        made_bid_bonus=args.made_bid_bonus,
+        last_duplicate_wins=args.last_duplicate_wins,
+    )
+    report = run_self_play(
+        config,
+        args.games,
+        num_workers=args.workers,
+        seed=args.seed,
+        games_per_task=args.games_per_task,
+    )
+
+    logger.info(
+        "Played %d games (%d rounds) on %d workers in %.2fs - %.1f games/s",
+        report.stats.num_games,
+        report.stats.num_rounds,
+        report.num_workers,
+        report.elapsed_seconds,
+        report.get_games_per_second(),
+    )
+    logger.info("Bid success rate: %.3f", report.stats.get_bid_success_rate())
+    logger.info(
+        "Mean score by seat: %s",
+        ", ".join(f"{score:.2f}" for score in report.stats.get_mean_scores()),
+    )
+    logger.info("Wins by seat: %s", report.stats.num_wins)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    main()
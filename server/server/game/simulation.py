@@ -0,0 +1,62 @@
+from random import Random
+from typing import Protocol
+
+from server.models.game import GameStatus
+from server.models.judgement import JudgementPhase
+
+from .judgement import JudgementGame
+
+
+class JudgementPolicy(Protocol):
+    def choose_bid(self, game: JudgementGame, player_id: int) -> int: ...
+
+    def choose_card(self, game: JudgementGame, player_id: int) -> int: ...
+
+
+class RandomPolicy:
+    rand: Random
+
+    def __init__(self, rand: Random | None = None) -> None:
+        self.rand = Random() if rand is None else rand
+
+    def choose_bid(self, game: JudgementGame, player_id: int) -> int:
+        return self.rand.randint(0, game.get_num_tricks_for_round())
+
+    def choose_card(self, game: JudgementGame, player_id: int) -> int:
+        return self.rand.choice(game.get_playable_cards(player_id))
+
+
+def create_headless_game(
+    num_players: int,
+    num_decks: int = 1,
+    num_rounds: int | None = None,
+    rand: Random | None = None,
+    game_id: str = "HEADLESS",
+) -> JudgementGame:
+    game = JudgementGame(game_id, rand=rand)
+    game.settings.num_decks = num_decks
+    game.settings.num_rounds = num_decks * 52
+
+    for player_id in range(num_players):
+        game.add_player(player_id)
+
+    if num_rounds is not None:
+        game.settings.num_rounds = min(game.settings.num_rounds, num_rounds)
+
+    return game
+
+
+def play_game(
+    game: JudgementGame, policies: JudgementPolicy | dict[int, JudgementPolicy]
+) -> None:
+    if game.status == GameStatus.NOT_STARTED:
+        game.start_game()
+
+    while game.status == GameStatus.IN_PROGRESS:
+        player_id = game.get_current_player_id()
+        policy = policies[player_id] if isinstance(policies, dict) else policies
+
+        if game.phase == JudgementPhase.BIDDING:
+            game.bid(player_id, policy.choose_bid(game, player_id))
+        else:
+            game.play_card(player_id, policy.choose_card(game, player_id))
@@ -36,4 +36,5 @@ class GameState(CamelModel, ABC):
 
     players: dict[int, GamePlayer]
 
-    full_state_do_not_use: dict[str, Any]
+    # Only set for games running with debug_state enabled
+    full_state_do_not_use: dict[str, Any] | None
@@ -31,6 +31,11 @@ class JudgementActionType(str, Enum):
     PLAY_CARD = "PLAY_CARD"
 
 
+@unique
+class JudgementEventType(str, Enum):
+    TRICK_COMPLETED = "TRICK_COMPLETED"
+
+
 class JudgementAction(CamelModel, ABC):
     _subclasses: ClassVar[dict[str, type]] = {}
     _type_adapter: ClassVar[TypeAdapter]
@@ -94,6 +99,25 @@ class JudgementPlayerState(CamelModel):
     hand: list[Card]
 
 
+# Sent to the whole table as soon as a trick ends, ahead of the state update that has
+# already cleared the pile
+class JudgementTrickCompletedEvent(CamelModel):
+    event_type: Literal[JudgementEventType.TRICK_COMPLETED] = (
+        JudgementEventType.TRICK_COMPLETED
+    )
+    round_index: int
+    trick_index: int
+    pile: list[Card]
+    winning_player_id: int
+
+
+# Only sent to the player whose turn it is
+class JudgementLegalMoves(CamelModel):
+    cards: list[Card]
+    min_bid: int | None = None
+    max_bid: int | None = None
+
+
 class JudgementSettings(CamelModel):
     num_decks: int
     num_rounds: int
@@ -115,7 +139,18 @@ class JudgementGameState(GameState):
     current_trick: int
     start_player_index: int
     current_turn_index: int
+    winning_player_index: int | None
+    player_state: JudgementPlayerState
+    legal_moves: JudgementLegalMoves | None
+
+
+# The parts of JudgementGameState that differ between players, everything else is the same
+# as JudgementSpectatorGameState
+class JudgementPrivateGameState(CamelModel):
+    player_type: Literal[GamePlayerType.PLAYER]
+
     player_state: JudgementPlayerState
+    legal_moves: JudgementLegalMoves | None
 
 
 class JudgementSpectatorGameState(GameState):
@@ -134,3 +169,4 @@ class JudgementSpectatorGameState(GameState):
     current_trick: int
     start_player_index: int
     current_turn_index: int
+    winning_player_index: int | None
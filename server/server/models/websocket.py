@@ -1,11 +1,32 @@
-from typing import Annotated
+from enum import Enum, unique
+from typing import Annotated, Any
 
 from pydantic import Field
 
 from .camel_model import CamelModel
-from .judgement import JudgementGameState, JudgementSpectatorGameState
+from .judgement import (
+    JudgementGameState,
+    JudgementSpectatorGameState,
+    JudgementTrickCompletedEvent,
+)
 
 ConcreteGameState = JudgementGameState | JudgementSpectatorGameState
+ConcreteGameEvent = JudgementTrickCompletedEvent
+
+
+@unique
+class WireFormat(str, Enum):
+    JSON = "JSON"
+    # Sent as binary frames, with each card packed into a single byte extension (see
+    # server.utils.msgpack_encoder) that clients decode back into a Card
+    MSGPACK = "MSGPACK"
+
+
+# Sent as the auth payload when connecting - the wire format applies to every message
+# the server sends to that connection
+class ConnectAuth(CamelModel):
+    player_auth_id: str
+    wire_format: WireFormat = WireFormat.JSON
 
 
 class GameErrorMessage(CamelModel):
@@ -17,4 +38,23 @@ class PlayersMessage(CamelModel):
 
 
 class GameStateMessage(CamelModel):
+    version: int
     state: Annotated[ConcreteGameState, Field(title="Concrete game state")]
+
+
+class GameStateChange(CamelModel):
+    # Keys into the camel-cased game state - an empty path replaces the whole state
+    path: list[str]
+    value: Any
+
+
+# Only applies on top of base_version - clients that are on any other version should
+# emit resync_game_state to get a fresh GameStateMessage
+class GameStateDeltaMessage(CamelModel):
+    base_version: int
+    version: int
+    changes: list[GameStateChange]
+
+
+class GameEventMessage(CamelModel):
+    event: Annotated[ConcreteGameEvent, Field(title="Concrete game event")]
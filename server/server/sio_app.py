@@ -2,5 +2,19 @@ import logging
 
 from socketio import AsyncServer
 
+from server.data import shard_manager
+from server.data.local_pubsub import LocalPubSubManager
+
 logger = logging.getLogger(__name__)
-sio = AsyncServer(logger=logger, async_mode="asgi", cors_allowed_origins=[])
+sio = AsyncServer(
+    logger=logger,
+    async_mode="asgi",
+    cors_allowed_origins=[],
+    # Shards share emits with each other so that a client gets updates for a game no
+    # matter which shard it's connected to
+    client_manager=(
+        LocalPubSubManager(shard_manager.get_pubsub_client(), logger=logger)
+        if shard_manager.is_sharded()
+        else None
+    ),
+)
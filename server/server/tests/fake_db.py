@@ -0,0 +1,175 @@
+from collections.abc import AsyncIterator, Callable, Iterable
+from contextlib import asynccontextmanager
+from typing import Any, ClassVar, Self
+
+import psycopg
+
+Row = tuple[Any, ...]
+
+
+# Stands in for the connection pool in server.data.db with the players table kept in
+# memory. Only knows the queries that player_manager makes, and records every one along
+# with the rows copied in by game_history.
+class FakeDatabase:
+    # player id -> auth id and name
+    players: dict[int, tuple[str, str]]
+    queries: list[str]
+    # COPY statement -> rows copied in by committed transactions
+    copied_rows: dict[str, list[Row]]
+    # Fails this many transactions, as if the database were unavailable, before letting
+    # them commit
+    failing_transactions: int
+
+    def __init__(self) -> None:
+        self.players = {}
+        self.queries = []
+        self.copied_rows = {}
+        self.failing_transactions = 0
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator["FakeConnection"]:
+        yield FakeConnection(self)
+
+    def get_player_id(self, player_auth_id: str) -> int | None:
+        for player_id, (auth_id, _) in self.players.items():
+            if auth_id == player_auth_id:
+                return player_id
+        return None
+
+    def execute(self, query: str, params: tuple[Any, ...]) -> list[Row]:
+        self.queries.append(query)
+        return self.handlers[query](self, *params)
+
+    def _get_by_auth(self, player_auth_id: str) -> list[Row]:
+        player_id = self.get_player_id(player_auth_id)
+        return [] if player_id is None else [(player_id, self.players[player_id][1])]
+
+    def _get(self, player_id: int) -> list[Row]:
+        return (
+            [(player_id, self.players[player_id][1])] if player_id in self.players else []
+        )
+
+    def _get_many(self, player_ids: list[int]) -> list[Row]:
+        return [
+            (player_id, name)
+            for player_id, (_, name) in self.players.items()
+            if player_id in player_ids
+        ]
+
+    def _create(self, player_auth_id: str, name: str) -> list[Row]:
+        player_id = len(self.players) + 1
+        self.players[player_id] = (player_auth_id, name)
+        return [(player_id,)]
+
+    def _set_name(self, name: str, player_id: int) -> list[Row]:
+        if player_id in self.players:
+            self.players[player_id] = (self.players[player_id][0], name)
+        return []
+
+    def _delete_many(self, player_ids: list[int]) -> list[Row]:
+        for player_id in player_ids:
+            self.players.pop(player_id, None)
+        return []
+
+    handlers: ClassVar[dict[str, Callable[..., list[Row]]]] = {
+        "SELECT id, name FROM players WHERE auth_id = %s": _get_by_auth,
+        "SELECT id, name FROM players WHERE id = %s": _get,
+        "SELECT id, name FROM players WHERE id = ANY(%s)": _get_many,
+        "INSERT INTO players(auth_id, name) VALUES(%s, %s) RETURNING id": _create,
+        "UPDATE players SET name = %s WHERE id = %s": _set_name,
+        "DELETE FROM players WHERE id = ANY(%s)": _delete_many,
+    }
+
+
+class FakeConnection:
+    database: FakeDatabase
+    # Rows copied in by the open transaction, which only reach the database on commit
+    pending_rows: dict[str, list[Row]] | None
+
+    def __init__(self, database: FakeDatabase) -> None:
+        self.database = database
+        self.pending_rows = None
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[None]:
+        self.pending_rows = {}
+        try:
+            yield
+            if self.database.failing_transactions > 0:
+                self.database.failing_transactions -= 1
+                raise psycopg.OperationalError("Failed to commit")
+
+            for statement, rows in self.pending_rows.items():
+                self.database.copied_rows.setdefault(statement, []).extend(rows)
+        finally:
+            self.pending_rows = None
+
+    def cursor(self) -> "FakeCursor":
+        return FakeCursor(self)
+
+
+class FakeCopy:
+    rows: list[Row]
+
+    def __init__(self, rows: list[Row]) -> None:
+        self.rows = rows
+
+    async def write_row(self, row: Row) -> None:
+        self.rows.append(row)
+
+
+class FakeCursor:
+    connection: FakeConnection
+    database: FakeDatabase
+    rows: list[Row]
+    # Rows from each statement of an executemany that returned them
+    result_sets: list[list[Row]]
+
+    def __init__(self, connection: FakeConnection) -> None:
+        self.connection = connection
+        self.database = connection.database
+        self.rows = []
+        self.result_sets = []
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        pass
+
+    async def execute(self, query: str, params: tuple[Any, ...] = ()) -> None:
+        self.rows = self.database.execute(query, params)
+
+    # Counts as one query, like the single pipeline that psycopg sends
+    async def executemany(
+        self, query: str, params_seq: Iterable[tuple[Any, ...]], returning: bool = False
+    ) -> None:
+        self.database.queries.append(query)
+        result_sets = [
+            self.database.handlers[query](self.database, *params) for params in params_seq
+        ]
+        self.result_sets = result_sets if returning else []
+
+    async def results(self) -> AsyncIterator["FakeCursor"]:
+        for rows in self.result_sets:
+            self.rows = rows
+            yield self
+
+    # Copies outside of a transaction are committed as soon as they finish
+    @asynccontextmanager
+    async def copy(self, statement: str) -> AsyncIterator[FakeCopy]:
+        self.database.queries.append(statement)
+        rows: list[Row] = []
+        yield FakeCopy(rows)
+
+        pending_rows = self.connection.pending_rows
+        if pending_rows is None:
+            pending_rows = self.database.copied_rows
+        pending_rows.setdefault(statement, []).extend(rows)
+
+    async def fetchone(self) -> Row | None:
+        return self.rows.pop(0) if len(self.rows) > 0 else None
+
+    async def fetchall(self) -> list[Row]:
+        rows, self.rows = self.rows, []
+        return rows
@@ -0,0 +1,82 @@
+import asyncio
+from random import Random
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from server.data import bot_manager, game_actor, game_manager, game_snapshots
+from server.data.game_snapshots import GameSnapshotter
+from server.game.core import GameError
+from server.game.simulation import create_headless_game
+from server.models.game import GameName
+from server.sio_app import sio
+
+
+class TestBotManager(IsolatedAsyncioTestCase):
+    def test_rejoining_one_game_leaves_the_others_to_bots(self) -> None:
+        games = [
+            create_headless_game(2, rand=Random(1), game_id=game_id)
+            for game_id in ["AWAY", "BACK"]
+        ]
+        with patch.object(bot_manager, "schedule_bot_turns"):
+            for game in games:
+                game.start_game()
+                bot_manager.take_over_player(game, 1)
+                self.addCleanup(bot_manager.remove_game, game.game_id)
+
+        bot_manager.release_player(games[1], 1)
+
+        self.assertTrue(bot_manager.is_bot_controlled("AWAY", 1))
+        self.assertFalse(bot_manager.is_bot_controlled("BACK", 1))
+
+    async def test_evicted_games_stay_gone_once_the_bot_decides(self) -> None:
+        snapshotter = GameSnapshotter(MagicMock())
+        decision: asyncio.Future = asyncio.get_running_loop().create_future()
+        with (
+            patch.object(game_manager, "games", {}),
+            patch.object(game_snapshots, "_snapshotter", snapshotter),
+            patch.object(sio, "emit", AsyncMock()),
+            patch.object(
+                asyncio.get_running_loop(), "run_in_executor", return_value=decision
+            ) as run_in_executor,
+        ):
+            game = game_manager.create_game(GameName.JUDGEMENT)
+            self.addCleanup(game_actor.remove_game, game.game_id)
+            await game_manager.join_game(game.game_id, 0)
+            await game_manager.add_bot(game.game_id, 0)
+            await game_manager.start_game(game.game_id)
+            await game_manager.take_over_player(game.game_id, 0)
+            bot_task = bot_manager._bot_tasks[game.game_id]
+            # Let the bot start deciding
+            await asyncio.sleep(0)
+            run_in_executor.assert_called_once()
+
+            game_manager.evict_game(game)
+            await asyncio.sleep(0)
+            self.assertTrue(bot_task.cancelled())
+
+            with self.assertRaises(GameError):
+                await game_actor.submit(game, lambda game: None)
+            self.assertNotIn(game.game_id, game_actor._game_actors)
+            game_snapshots.mark_dirty(game)
+            self.assertDictEqual(snapshotter.dirty_games, {})
+
+    async def test_restored_players_get_time_to_reconnect(self) -> None:
+        game = create_headless_game(3, rand=Random(1), game_id="BACK")
+        game.start_game()
+        self.addCleanup(bot_manager.remove_game, game.game_id)
+
+        with (
+            patch.object(bot_manager, "RESTORED_PLAYER_GRACE_SECONDS", 0.01),
+            patch.object(bot_manager, "schedule_bot_turns"),
+        ):
+            bot_manager.restore_game(game)
+            for player_id in range(3):
+                self.assertFalse(bot_manager.is_bot_controlled(game.game_id, player_id))
+
+            # Player 1 rejoins in time
+            bot_manager.release_player(game, 1)
+            await asyncio.sleep(0.05)
+
+        self.assertTrue(bot_manager.is_bot_controlled(game.game_id, 0))
+        self.assertFalse(bot_manager.is_bot_controlled(game.game_id, 1))
+        self.assertTrue(bot_manager.is_bot_controlled(game.game_id, 2))
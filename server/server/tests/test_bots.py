@@ -0,0 +1,106 @@
+import time
+from random import Random
+from unittest import TestCase
+
+from server.game.bots import (
+    JudgementBotView,
+    MonteCarloPolicy,
+    RolloutGame,
+    choose_card,
+    decide_bot_action,
+    sample_hidden_hands,
+)
+from server.game.card import card_id_to_str, get_card_suit_index
+from server.game.simulation import RandomPolicy, create_headless_game, play_game
+from server.models.game import GameStatus
+from server.models.judgement import JudgementBidHandsAction, JudgementPlayCardAction
+
+
+class TestBots(TestCase):
+    def test_sample_hidden_hands(self) -> None:
+        game = create_headless_game(4, num_decks=2, rand=Random(1))
+        game.start_game()
+        for player_id in [0, 1, 2, 3]:
+            game.bid(player_id, 1)
+        game.play_card(0, game.get_playable_cards(0)[0])
+
+        view = JudgementBotView(game, 1)
+        view.void_suits[2] = 0b0011
+        hands = sample_hidden_hands(view, Random(2))
+
+        self.assertListEqual(hands[1], view.hand)
+        for player_id, hand in hands.items():
+            self.assertEqual(len(hand), len(game.player_states[player_id].hand))
+        self.assertFalse(any(get_card_suit_index(card) < 2 for card in hands[2]))
+
+        sampled_cards = [card for hand in hands.values() for card in hand]
+        self.assertEqual(len(set(sampled_cards)), len(sampled_cards))
+        self.assertTrue(set(sampled_cards).isdisjoint(game.pile))
+
+    def test_rollout_games_are_independent_copies(self) -> None:
+        game = create_headless_game(3, num_rounds=5, rand=Random(3))
+        game.start_game()
+        for player_id in [0, 1, 2]:
+            game.bid(player_id, 2)
+
+        view = JudgementBotView(game, 0)
+        rollout_game = RolloutGame.from_view(view, sample_hidden_hands(view, Random(4)))
+        rollout_copy = rollout_game.copy()
+        rollout_copy.play_card(0, rollout_copy.get_playable_cards(0)[0])
+
+        self.assertEqual(len(rollout_game.pile), 0)
+        self.assertEqual(len(rollout_game.player_states[0].hand), 5)
+        self.assertEqual(len(rollout_copy.pile), 1)
+        self.assertEqual(len(rollout_copy.player_states[0].hand), 4)
+
+    def test_rollout_games_support_shared_game_methods(self) -> None:
+        game = create_headless_game(3, num_rounds=5, rand=Random(3))
+        game.start_game()
+        for player_id in [0, 1, 2]:
+            game.bid(player_id, 2)
+
+        view = JudgementBotView(game, 0)
+        rollout_game = RolloutGame.from_view(view, sample_hidden_hands(view, Random(4)))
+        card = rollout_game.get_playable_cards(0)[0]
+        rollout_game.apply_input(0, JudgementPlayCardAction(card=card_id_to_str(card)))
+
+        self.assertEqual(rollout_game.state_version, 1)
+        self.assertIsNone(rollout_game.get_debug_state())
+        self.assertListEqual(rollout_game.drain_log_entries(), [])
+
+    def test_bot_plays_legal_cards_within_its_time_budget(self) -> None:
+        game = create_headless_game(4, rand=Random(6))
+        game.start_game()
+        for player_id in [0, 1, 2, 3]:
+            game.bid(player_id, 3)
+        game.play_card(0, game.get_playable_cards(0)[0])
+
+        view = JudgementBotView(game, 1)
+        start_time = time.perf_counter()
+        card = choose_card(view, Random(7), time_budget=0.05)
+
+        self.assertLess(time.perf_counter() - start_time, 0.5)
+        self.assertIn(card, game.get_playable_cards(1))
+
+    def test_decide_bot_action(self) -> None:
+        game = create_headless_game(3, num_rounds=4, rand=Random(8))
+        game.start_game()
+
+        bid_action = decide_bot_action(JudgementBotView(game, 0), 9, time_budget=0.01)
+        self.assertIsInstance(bid_action, JudgementBidHandsAction)
+        game.process_input(0, bid_action)
+        game.bid(1, 0)
+        game.bid(2, 0)
+
+        play_action = decide_bot_action(JudgementBotView(game, 0), 10, time_budget=0.01)
+        self.assertIsInstance(play_action, JudgementPlayCardAction)
+        game.process_input(0, play_action)
+        self.assertEqual(len(game.pile), 1)
+
+    def test_bots_can_play_full_games(self) -> None:
+        game = create_headless_game(4, num_decks=2, num_rounds=4, rand=Random(11))
+        bot = MonteCarloPolicy(Random(12), time_budget=1, max_rollouts=4)
+        play_game(game, {0: bot, 1: RandomPolicy(Random(13)), 2: bot, 3: bot})
+
+        self.assertEqual(game.status, GameStatus.COMPLETE)
+        self.assertEqual(len(game.round_results), 4)
@@ -2,7 +2,17 @@ from unittest import TestCase
 
 from pydantic import ValidationError
 
-from server.game.card import Card, Suit
+from server.game.card import (
+    Card,
+    Suit,
+    card_id_to_str,
+    compare_card_ranks,
+    encode_card,
+    get_card_deck_index,
+    get_card_face,
+    get_card_rank,
+    get_card_suit,
+)
 
 
 class TestCards(TestCase):
@@ -31,6 +41,46 @@ class TestCards(TestCase):
         eight_of_hearts = Card(suit=Suit.HEARTS, rank=8)
         self.assertEqual(str(eight_of_hearts), "H8")
 
+    def test_converting_card_to_and_from_id(self) -> None:
+        for card_string in ["DA", "D2", "SK", "H8", "CQ", "C10"]:
+            card = Card.from_str(card_string)
+            card_id = card.to_id()
+            self.assertEqual(Card.from_id(card_id), card)
+            self.assertEqual(card_id_to_str(card_id), card_string)
+            self.assertEqual(get_card_suit(card_id), card.suit)
+            self.assertEqual(get_card_rank(card_id), card.rank)
+
+        self.assertEqual(encode_card(Suit.DIAMONDS, 1), 0)
+        self.assertEqual(encode_card(Suit.CLUBS, 13), 51)
+        self.assertEqual(len({Card.from_id(card_id) for card_id in range(52)}), 52)
+
+    def test_card_ids_with_deck_index(self) -> None:
+        first_copy = encode_card(Suit.HEARTS, 6)
+        second_copy = encode_card(Suit.HEARTS, 6, deck_index=2)
+
+        self.assertNotEqual(first_copy, second_copy)
+        self.assertEqual(get_card_face(first_copy), get_card_face(second_copy))
+        self.assertEqual(get_card_deck_index(first_copy), 0)
+        self.assertEqual(get_card_deck_index(second_copy), 2)
+        self.assertEqual(card_id_to_str(second_copy), "H6")
+        self.assertIs(Card.from_id(first_copy), Card.from_id(second_copy))
+
+    def test_comparing_card_id_ranks(self) -> None:
+        self.assertGreater(
+            compare_card_ranks(encode_card(Suit.SPADES, 1), encode_card(Suit.SPADES, 13)),
+            0,
+        )
+        self.assertLess(
+            compare_card_ranks(encode_card(Suit.SPADES, 2), encode_card(Suit.HEARTS, 3)),
+            0,
+        )
+        self.assertEqual(
+            compare_card_ranks(
+                encode_card(Suit.SPADES, 9), encode_card(Suit.HEARTS, 9, deck_index=1)
+            ),
+            0,
+        )
+
     def test_fails_to_create_invalid_card(self) -> None:
         self.assertRaisesRegex(ValueError, "Invalid string", Card.from_str, "S")
         self.assertRaisesRegex(ValueError, "not a valid Suit", Card.from_str, "Z5")
@@ -5,8 +5,12 @@ from random import Random
 from typing import Counter as CounterType
 from unittest import TestCase
 
-from server.game.card import Card, Suit
-from server.game.decks import Decks
+from server.game.card import Card, Suit, card_id_to_str, get_card_face
+from server.game.decks import Decks, deal_from_seed, get_deal_seed, shuffle_batch
+
+
+def get_drawn_cards(deck: Decks) -> list[int]:
+    return [card for card, count in enumerate(deck._drawn_card_counts) if count > 0]
 
 
 class TestDecks(TestCase):
@@ -15,31 +19,32 @@ class TestDecks(TestCase):
 
         self.assertEqual(deck.num_decks, 1)
         self.assertEqual(len(deck.cards), 52)
-        self.assertEqual(len(set(deck.cards)), 52)
+        self.assertEqual(len(set(map(get_card_face, deck.cards))), 52)
 
     def test_create_multiple_decks(self) -> None:
         deck = Decks(num_decks=4)
 
         self.assertEqual(deck.num_decks, 4)
         self.assertEqual(len(deck.cards), 208)
-        self.assertEqual(len(set(deck.cards)), 52)
+        self.assertEqual(len(set(deck.cards)), 208)
+        self.assertEqual(len(set(map(get_card_face, deck.cards))), 52)
 
     def test_draw_from_initialized_deck(self) -> None:
         deck = Decks()
 
-        self.assertListEqual([str(card) for card in deck.draw()], ["DA"])
-        self.assertListEqual([str(card) for card in deck.draw()], ["D2"])
+        self.assertListEqual([card_id_to_str(card) for card in deck.draw()], ["DA"])
+        self.assertListEqual([card_id_to_str(card) for card in deck.draw()], ["D2"])
         self.assertListEqual(
-            [str(card) for card in deck.draw(4)], ["D3", "D4", "D5", "D6"]
+            [card_id_to_str(card) for card in deck.draw(4)], ["D3", "D4", "D5", "D6"]
         )
         self.assertListEqual(
-            [str(card) for card in deck.draw(8)],
+            [card_id_to_str(card) for card in deck.draw(8)],
             ["D7", "D8", "D9", "D10", "DJ", "DQ", "DK", "SA"],
         )
         self.assertEqual(len(deck.cards), 38)
         self.assertEqual(len(set(deck.cards)), 38)
         self.assertCountEqual(
-            deck._drawn_card_counts.elements(),
+            map(card_id_to_str, get_drawn_cards(deck)),
             [
                 "DA",
                 "D2",
@@ -63,19 +68,19 @@ class TestDecks(TestCase):
         deck = Decks()
         deck.shuffle(rand=rand)
 
-        self.assertListEqual([str(card) for card in deck.draw()], ["S10"])
-        self.assertListEqual([str(card) for card in deck.draw()], ["D2"])
+        self.assertListEqual([card_id_to_str(card) for card in deck.draw()], ["S10"])
+        self.assertListEqual([card_id_to_str(card) for card in deck.draw()], ["D2"])
         self.assertListEqual(
-            [str(card) for card in deck.draw(4)], ["DQ", "H4", "SJ", "C3"]
+            [card_id_to_str(card) for card in deck.draw(4)], ["DQ", "H4", "SJ", "C3"]
         )
         self.assertListEqual(
-            [str(card) for card in deck.draw(8)],
+            [card_id_to_str(card) for card in deck.draw(8)],
             ["C9", "S8", "H7", "C4", "D3", "CQ", "S4", "SQ"],
         )
         self.assertEqual(len(deck.cards), 38)
         self.assertEqual(len(set(deck.cards)), 38)
         self.assertCountEqual(
-            deck._drawn_card_counts.elements(),
+            map(card_id_to_str, get_drawn_cards(deck)),
             [
                 "S10",
                 "D2",
@@ -99,19 +104,19 @@ class TestDecks(TestCase):
         deck = Decks(4)
         deck.shuffle(rand=rand)
 
-        self.assertListEqual([str(card) for card in deck.draw()], ["H6"])
-        self.assertListEqual([str(card) for card in deck.draw()], ["D3"])
+        self.assertListEqual([card_id_to_str(card) for card in deck.draw()], ["H6"])
+        self.assertListEqual([card_id_to_str(card) for card in deck.draw()], ["D3"])
         self.assertListEqual(
-            [str(card) for card in deck.draw(4)], ["C4", "H4", "C9", "SA"]
+            [card_id_to_str(card) for card in deck.draw(4)], ["C4", "H4", "C9", "SA"]
         )
         self.assertListEqual(
-            [str(card) for card in deck.draw(8)],
+            [card_id_to_str(card) for card in deck.draw(8)],
             ["S4", "CQ", "D4", "HK", "D8", "H10", "C7", "H6"],
         )
         self.assertEqual(len(deck.cards), 194)
-        self.assertEqual(len(set(deck.cards)), 52)
+        self.assertEqual(len(set(map(get_card_face, deck.cards))), 52)
         self.assertCountEqual(
-            deck._drawn_card_counts.elements(),
+            map(card_id_to_str, get_drawn_cards(deck)),
             [
                 "H6",
                 "D3",
@@ -137,7 +142,7 @@ class TestDecks(TestCase):
 
         drawn_cards = deck.draw(14)
         self.assertListEqual(
-            [str(card) for card in drawn_cards],
+            [card_id_to_str(card) for card in drawn_cards],
             [
                 "H6",
                 "D3",
@@ -157,9 +162,9 @@ class TestDecks(TestCase):
         )
 
         self.assertEqual(len(deck.cards), 194)
-        self.assertEqual(len(set(deck.cards)), 52)
+        self.assertEqual(len(set(map(get_card_face, deck.cards))), 52)
         self.assertCountEqual(
-            deck._drawn_card_counts.elements(),
+            map(card_id_to_str, get_drawn_cards(deck)),
             [
                 "H6",
                 "D3",
@@ -180,11 +185,14 @@ class TestDecks(TestCase):
 
         deck.replace(drawn_cards)
         self.assertEqual(len(deck.cards), 208)
-        self.assertEqual(len(set(deck.cards)), 52)
-        self.assertCountEqual(deck._drawn_card_counts.elements(), [])
+        self.assertEqual(len(set(map(get_card_face, deck.cards))), 52)
+        self.assertCountEqual(map(card_id_to_str, get_drawn_cards(deck)), [])
         self.assertListEqual(
-            [str(card) for card in itertools.islice(deck.cards, 0, len(drawn_cards))],
-            [str(card) for card in drawn_cards],
+            [
+                card_id_to_str(card)
+                for card in itertools.islice(deck.cards, 0, len(drawn_cards))
+            ],
+            [card_id_to_str(card) for card in drawn_cards],
         )
 
     def test_replacing_to_bottom_of_multiple_shuffled_decks(self) -> None:
@@ -194,7 +202,7 @@ class TestDecks(TestCase):
 
         drawn_cards = deck.draw(14)
         self.assertListEqual(
-            [str(card) for card in drawn_cards],
+            [card_id_to_str(card) for card in drawn_cards],
             [
                 "H6",
                 "D3",
@@ -213,21 +221,21 @@ class TestDecks(TestCase):
             ],
         )
         self.assertEqual(len(deck.cards), 194)
-        self.assertEqual(len(set(deck.cards)), 52)
+        self.assertEqual(len(set(map(get_card_face, deck.cards))), 52)
 
         deck.replace_bottom(drawn_cards)
 
         self.assertEqual(len(deck.cards), 208)
-        self.assertEqual(len(set(deck.cards)), 52)
-        self.assertCountEqual(deck._drawn_card_counts.elements(), [])
+        self.assertEqual(len(set(map(get_card_face, deck.cards))), 52)
+        self.assertCountEqual(map(card_id_to_str, get_drawn_cards(deck)), [])
         self.assertListEqual(
             [
-                str(card)
+                card_id_to_str(card)
                 for card in itertools.islice(
                     deck.cards, len(deck.cards) - len(drawn_cards), len(deck.cards)
                 )
             ],
-            [str(card) for card in drawn_cards],
+            [card_id_to_str(card) for card in drawn_cards],
         )
 
     def test_replace_onto_deck(self) -> None:
@@ -235,21 +243,24 @@ class TestDecks(TestCase):
 
         drawn_cards = deck.draw(5)
         self.assertListEqual(
-            [str(card) for card in drawn_cards], ["DA", "D2", "D3", "D4", "D5"]
+            [card_id_to_str(card) for card in drawn_cards], ["DA", "D2", "D3", "D4", "D5"]
         )
         self.assertEqual(len(deck.cards), 47)
         self.assertEqual(len(set(deck.cards)), 47)
         self.assertCountEqual(
-            deck._drawn_card_counts.elements(), ["DA", "D2", "D3", "D4", "D5"]
+            map(card_id_to_str, get_drawn_cards(deck)), ["DA", "D2", "D3", "D4", "D5"]
         )
 
         deck.replace(drawn_cards)
         self.assertEqual(len(deck.cards), 52)
-        self.assertEqual(len(set(deck.cards)), 52)
-        self.assertCountEqual(deck._drawn_card_counts.elements(), [])
+        self.assertEqual(len(set(map(get_card_face, deck.cards))), 52)
+        self.assertCountEqual(map(card_id_to_str, get_drawn_cards(deck)), [])
         self.assertListEqual(
-            [str(card) for card in itertools.islice(deck.cards, 0, len(drawn_cards))],
-            [str(card) for card in drawn_cards],
+            [
+                card_id_to_str(card)
+                for card in itertools.islice(deck.cards, 0, len(drawn_cards))
+            ],
+            [card_id_to_str(card) for card in drawn_cards],
         )
 
     def test_replace_to_bottom_of_deck(self) -> None:
@@ -257,39 +268,92 @@ class TestDecks(TestCase):
 
         drawn_cards = deck.draw(5)
         self.assertListEqual(
-            [str(card) for card in drawn_cards], ["DA", "D2", "D3", "D4", "D5"]
+            [card_id_to_str(card) for card in drawn_cards], ["DA", "D2", "D3", "D4", "D5"]
         )
         self.assertEqual(len(deck.cards), 47)
         self.assertEqual(len(set(deck.cards)), 47)
         self.assertCountEqual(
-            deck._drawn_card_counts.elements(), ["DA", "D2", "D3", "D4", "D5"]
+            map(card_id_to_str, get_drawn_cards(deck)), ["DA", "D2", "D3", "D4", "D5"]
         )
 
         deck.replace_bottom(drawn_cards)
         self.assertEqual(len(deck.cards), 52)
-        self.assertEqual(len(set(deck.cards)), 52)
-        self.assertCountEqual(deck._drawn_card_counts.elements(), [])
+        self.assertEqual(len(set(map(get_card_face, deck.cards))), 52)
+        self.assertCountEqual(map(card_id_to_str, get_drawn_cards(deck)), [])
         self.assertListEqual(
             [
-                str(card)
+                card_id_to_str(card)
                 for card in itertools.islice(
                     deck.cards, len(deck.cards) - len(drawn_cards), len(deck.cards)
                 )
             ],
-            [str(card) for card in drawn_cards],
+            [card_id_to_str(card) for card in drawn_cards],
+        )
+
+    def test_deal_hands(self) -> None:
+        deck = Decks()
+        deck.shuffle(rand=Random(9999))
+
+        hands = deck.deal(3, 2)
+        self.assertListEqual(
+            [[card_id_to_str(card) for card in hand] for hand in hands],
+            [["S10", "D2"], ["DQ", "H4"], ["SJ", "C3"]],
+        )
+        self.assertEqual(len(deck.cards), 46)
+        self.assertEqual(len(get_drawn_cards(deck)), 6)
+        self.assertRaisesRegex(ValueError, "Not enough cards", deck.deal, 5, 10)
+
+    def test_reset(self) -> None:
+        deck = Decks(2)
+        deck.shuffle(rand=Random(1))
+        deck.reset()
+        self.assertListEqual(list(deck.cards), list(range(104)))
+
+        deck.draw(3)
+        self.assertRaisesRegex(ValueError, "while cards are drawn", deck.reset)
+
+    def test_deal_seeds(self) -> None:
+        self.assertEqual(get_deal_seed(1234, 0), get_deal_seed(1234, 0))
+        self.assertEqual(
+            len(
+                {
+                    get_deal_seed(game_seed, round_index)
+                    for game_seed in range(10)
+                    for round_index in range(10)
+                }
+            ),
+            100,
+        )
+
+    def test_deal_from_seed(self) -> None:
+        deck = Decks(2)
+        deck.shuffle(rand=Random(get_deal_seed(42, 3)))
+
+        self.assertListEqual(
+            deal_from_seed(2, get_deal_seed(42, 3), 4, 5), deck.deal(4, 5)
         )
 
+    def test_shuffle_batch(self) -> None:
+        seeds = [get_deal_seed(7, round_index) for round_index in range(20)]
+        decks = shuffle_batch(2, seeds)
+
+        self.assertEqual(len(decks), 20)
+        for seed, cards in zip(seeds, decks, strict=True):
+            deck = Decks(2)
+            deck.shuffle(rand=Random(seed))
+            self.assertListEqual(cards, list(deck.cards))
+
     def test_shuffle(self) -> None:
         deck = Decks()
         deck.shuffle()
         self.assertEqual(len(deck.cards), 52)
-        self.assertEqual(len(set(deck.cards)), 52)
+        self.assertEqual(len(set(map(get_card_face, deck.cards))), 52)
 
     def test_shuffle_multiple_decks(self) -> None:
         deck = Decks(4)
         deck.shuffle()
         self.assertEqual(len(deck.cards), 208)
-        self.assertEqual(len(set(deck.cards)), 52)
+        self.assertEqual(len(set(map(get_card_face, deck.cards))), 52)
 
     def test_shuffle_evenness(self) -> None:
         probability: CounterType[str] = Counter()
@@ -298,7 +362,10 @@ class TestDecks(TestCase):
             deck = Decks()
             deck.shuffle()
             probability.update(
-                [f"{str(card)}-{index}" for index, card in enumerate(deck.cards)]
+                [
+                    f"{card_id_to_str(card)}-{index}"
+                    for index, card in enumerate(deck.cards)
+                ]
             )
 
         avg_value = repetitions / 52
@@ -322,13 +389,13 @@ class TestDecks(TestCase):
             ValueError,
             "the following cards do not belong in this deck.*[SA]",
             deck.replace,
-            [Card.from_str("SA")],
+            [Card.from_str("SA").to_id()],
         )
         self.assertRaisesRegex(
             ValueError,
             "the following cards do not belong in this deck.*[SA]",
             deck.replace_bottom,
-            [Card.from_str("SA")],
+            [Card.from_str("SA").to_id()],
         )
 
         drawn_cards = deck.draw(3)
@@ -354,13 +421,13 @@ class TestDecks(TestCase):
             ValueError,
             "the following cards do not belong in this deck.*[SA]",
             deck.replace,
-            [Card.from_str("SA")],
+            [Card.from_str("SA").to_id()],
         )
         self.assertRaisesRegex(
             ValueError,
             "the following cards do not belong in this deck.*[SA]",
             deck.replace_bottom,
-            [Card.from_str("SA")],
+            [Card.from_str("SA").to_id()],
         )
 
         drawn_cards = deck.draw(3)
@@ -378,3 +445,25 @@ class TestDecks(TestCase):
             deck.replace_bottom,
             drawn_cards,
         )
+
+    def test_rejected_replacement_leaves_deck_unchanged(self) -> None:
+        deck = Decks()
+        drawn_cards = deck.draw(3)
+
+        self.assertRaisesRegex(
+            ValueError,
+            r"do not belong in this deck: \[D2, C2\]",
+            deck.replace,
+            [
+                drawn_cards[0],
+                drawn_cards[1],
+                drawn_cards[1],
+                Card.from_str("C2").to_id(52),
+            ],
+        )
+        self.assertEqual(len(deck.cards), 49)
+        self.assertCountEqual(get_drawn_cards(deck), drawn_cards)
+
+        deck.replace(drawn_cards)
+        self.assertEqual(len(deck.cards), 52)
+        self.assertListEqual(get_drawn_cards(deck), [])
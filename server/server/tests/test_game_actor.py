@@ -0,0 +1,101 @@
+import asyncio
+import json
+from random import Random
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, patch
+
+from server.data import game_actor, game_history, socket_messager
+from server.data.game_actor import GameActor
+from server.game.core import Game, GameError
+from server.game.simulation import RandomPolicy, create_headless_game, play_game
+from server.models.judgement import JudgementBidHandsAction
+from server.sio_app import sio
+from server.utils import metrics
+
+
+class TestGameActor(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.game = create_headless_game(2, num_rounds=1, rand=Random(1))
+        self.game.game_id = "ACTOR"
+        self.game.start_game()
+        game_actor.add_game(self.game)
+
+        emit_patcher = patch.object(sio, "emit", new_callable=AsyncMock)
+        self.emit = emit_patcher.start()
+        self.addCleanup(emit_patcher.stop)
+        self.addCleanup(game_actor.remove_game, self.game.game_id)
+        self.addCleanup(socket_messager.forget_game, self.game.game_id)
+        self.addCleanup(metrics.reset)
+
+    def bid(self, player_id: int, num_hands: int) -> "asyncio.Future[None]":
+        return game_actor.get_game_actor(self.game).submit(
+            lambda game: game.apply_input(
+                player_id, JudgementBidHandsAction(num_hands=num_hands)
+            )
+        )
+
+    async def test_actions_are_batched_in_order(self) -> None:
+        await game_actor.submit(self.game, lambda game: None)
+        self.emit.reset_mock()
+
+        # The second bid is only legal once the first one has been applied
+        await asyncio.gather(self.bid(0, 1), self.bid(1, 0))
+
+        self.assertListEqual(
+            [self.game.player_states[player_id].current_bid for player_id in (0, 1)],
+            [1, 0],
+        )
+        # One delta per player and one spectator broadcast for the whole batch
+        self.assertEqual(len(self.emit.await_args_list), 3)
+        self.assertEqual(metrics.summaries["game_mailbox_batch_size"].last, 2)
+
+    async def test_errors_go_back_to_the_sender(self) -> None:
+        with self.assertRaises(GameError):
+            await self.bid(1, 0)
+
+        await self.bid(0, 1)
+        self.assertEqual(self.game.player_states[0].current_bid, 1)
+
+    async def test_full_mailboxes_reject_actions(self) -> None:
+        actor = GameActor(self.game, mailbox_size=2)
+        self.addCleanup(actor.stop)
+
+        def get_version(game: Game) -> int:
+            return game.state_version
+
+        futures = [actor.submit(get_version), actor.submit(get_version)]
+        with self.assertRaises(GameError):
+            actor.submit(get_version)
+        self.assertEqual(metrics.summaries["game_mailbox_rejections"].count, 1)
+        self.assertEqual(metrics.summaries["game_mailbox_depth"].max, 2)
+
+        await asyncio.gather(*futures)
+        await actor.submit(get_version)
+
+    async def test_completed_games_are_recorded_once(self) -> None:
+        with patch.object(game_history, "record_game") as record:
+            await game_actor.submit(self.game, lambda game: None)
+            record.assert_not_called()
+
+            await game_actor.submit(
+                self.game, lambda _: play_game(self.game, RandomPolicy(Random(1)))
+            )
+            await game_actor.submit(self.game, lambda game: None)
+            record.assert_called_once_with(self.game)
+
+    async def test_snapshots_are_built_after_earlier_changes_are_sent(self) -> None:
+        await game_actor.submit(self.game, lambda game: None)
+        snapshot_future = asyncio.ensure_future(
+            game_actor.submit_after_flush(
+                self.game,
+                lambda game: socket_messager.get_game_state_snapshot_message(game, 0),
+            )
+        )
+        await asyncio.gather(self.bid(0, 1), snapshot_future)
+
+        snapshot_message = snapshot_future.result()
+        assert snapshot_message is not None
+        # Taken after the bid's update went out, so it's the base of the next delta
+        self.assertEqual(
+            json.loads(snapshot_message.json_payload)["version"], self.game.state_version
+        )
@@ -0,0 +1,119 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from server.data import game_manager, game_snapshots
+from server.data.game_evictor import GameEvictor
+from server.game.core import Game
+from server.game.judgement import JudgementGame
+from server.models.game import GameStatus
+from server.utils import metrics
+
+
+class FakeClock:
+    now: float
+
+    def __init__(self) -> None:
+        self.now = 0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestGameEvictor(TestCase):
+    def setUp(self) -> None:
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+        self.clock = FakeClock()
+        self.games: dict[str, Game] = {}
+        self.evicted_games: list[str] = []
+
+        def evict_game(game: Game) -> None:
+            self.evicted_games.append(game.game_id)
+            del self.games[game.game_id]
+
+        self.evictor = GameEvictor(
+            self.games.get,
+            evict_game,
+            ttl_seconds={
+                GameStatus.NOT_STARTED: 100,
+                GameStatus.IN_PROGRESS: 300,
+                GameStatus.COMPLETE: 50,
+            },
+            sweep_interval_seconds=10,
+            clock=self.clock,
+        )
+
+    def create_game(self, game_id: str) -> JudgementGame:
+        game = JudgementGame(game_id)
+        self.games[game_id] = game
+        self.evictor.touch(game)
+        return game
+
+    def sweep_until(self, now: float) -> None:
+        while self.clock.now < now:
+            self.clock.now += 10
+            self.evictor.sweep()
+
+    def test_evicts_games_idle_for_their_status_ttl(self) -> None:
+        self.create_game("IDLE")
+        started_game = self.create_game("PLAY")
+        started_game.add_player(0)
+        started_game.start_game()
+        self.evictor.touch(started_game)
+
+        self.sweep_until(90)
+        self.assertListEqual(self.evicted_games, [])
+        self.sweep_until(110)
+        self.assertListEqual(self.evicted_games, ["IDLE"])
+        self.sweep_until(310)
+        self.assertListEqual(self.evicted_games, ["IDLE", "PLAY"])
+        self.assertEqual(metrics.summaries["games_evicted_not_started"].count, 1)
+
+    def test_touching_a_game_holds_off_its_eviction(self) -> None:
+        game = self.create_game("IDLE")
+        self.sweep_until(80)
+        self.evictor.touch(game)
+
+        self.sweep_until(170)
+        self.assertListEqual(self.evicted_games, [])
+        self.sweep_until(190)
+        self.assertListEqual(self.evicted_games, ["IDLE"])
+
+    def test_finished_games_are_evicted_sooner(self) -> None:
+        game = self.create_game("DONE")
+        game.status = GameStatus.COMPLETE
+        self.evictor.touch(game)
+
+        self.sweep_until(50)
+        self.assertListEqual(self.evicted_games, ["DONE"])
+
+    def test_forgotten_games_are_left_alone(self) -> None:
+        self.create_game("GONE")
+        self.evictor.forget("GONE")
+
+        self.sweep_until(200)
+        self.assertListEqual(self.evicted_games, [])
+
+    def test_sets_game_gauges(self) -> None:
+        self.create_game("IDLE")
+        game = self.create_game("DONE")
+        game.status = GameStatus.COMPLETE
+
+        self.evictor.set_gauges(list(self.games.values()))
+        self.assertEqual(metrics.gauges["games_not_started"], 1)
+        self.assertEqual(metrics.gauges["games_in_progress"], 0)
+        self.assertEqual(metrics.gauges["games_complete"], 1)
+        self.assertGreater(metrics.gauges["process_resident_bytes"], 0)
+
+    def test_archives_evicted_finished_games(self) -> None:
+        game = JudgementGame("DONE")
+        game.status = GameStatus.COMPLETE
+        with (
+            patch.object(game_manager, "games", {"DONE": game}),
+            patch.object(game_manager, "ARCHIVE_EVICTED_GAMES", True),
+            patch.object(game_snapshots, "archive_game") as archive_game,
+        ):
+            game_manager.evict_game(game)
+            self.assertDictEqual(game_manager.games, {})
+        archive_game.assert_called_once_with(game)
@@ -0,0 +1,141 @@
+import asyncio
+from random import Random
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import psycopg
+
+from server.data import db, game_history
+from server.data.game_history import GameHistoryWriter, build_game_record
+from server.game.judgement import JudgementGame
+from server.game.simulation import RandomPolicy, create_headless_game, play_game
+from server.tests.fake_db import FakeDatabase
+from server.utils import metrics
+
+
+def create_completed_game(seed: int) -> JudgementGame:
+    game = create_headless_game(3, num_rounds=2, rand=Random(seed))
+    play_game(game, RandomPolicy(Random(seed)))
+    return game
+
+
+class TestGameHistory(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.database = FakeDatabase()
+        pool_patcher = patch.object(db, "_pool", self.database)
+        pool_patcher.start()
+        self.addCleanup(pool_patcher.stop)
+        self.addCleanup(metrics.reset)
+
+    def test_builds_rows_for_every_seat_and_round(self) -> None:
+        game = create_completed_game(1)
+        game_record = build_game_record(game)
+
+        self.assertEqual(game_record.game_row[1], game.game_id)
+        self.assertEqual(game_record.game_row[3], game.seed)
+        self.assertListEqual(
+            [
+                (seat, player_id, score)
+                for _, seat, player_id, score in game_record.player_rows
+            ],
+            [
+                (seat, player_id, game.player_states[player_id].score)
+                for seat, player_id in enumerate(game.ordered_player_ids)
+            ],
+        )
+        self.assertEqual(len(game_record.round_rows), 2 * 3)
+        # Every row points at the same game
+        self.assertSetEqual(
+            {row[0] for row in game_record.player_rows + game_record.round_rows},
+            {game_record.game_row[0]},
+        )
+
+    async def test_writes_games_together(self) -> None:
+        writer = GameHistoryWriter()
+        for seed in range(3):
+            writer.record(build_game_record(create_completed_game(seed)))
+        await writer.stop(1)
+
+        # One COPY per table for all three games
+        self.assertListEqual(
+            self.database.queries,
+            [
+                game_history.GAMES_COPY,
+                game_history.GAME_PLAYERS_COPY,
+                game_history.GAME_ROUNDS_COPY,
+            ],
+        )
+        self.assertEqual(len(self.database.copied_rows[game_history.GAMES_COPY]), 3)
+        self.assertEqual(
+            len(self.database.copied_rows[game_history.GAME_PLAYERS_COPY]), 9
+        )
+        self.assertEqual(
+            len(self.database.copied_rows[game_history.GAME_ROUNDS_COPY]), 18
+        )
+        self.assertEqual(metrics.summaries["game_history_batch_size"].last, 3)
+
+    async def test_retries_failed_writes(self) -> None:
+        self.database.failing_transactions = 2
+        writer = GameHistoryWriter(min_retry_seconds=0.01)
+        with self.assertLogs(game_history.logger, "ERROR"):
+            writer.record(build_game_record(create_completed_game(1)))
+            await writer.stop(1)
+
+        self.assertEqual(len(self.database.copied_rows[game_history.GAMES_COPY]), 1)
+        self.assertEqual(metrics.summaries["game_history_write_failures"].count, 2)
+
+    async def test_drops_games_that_can_never_be_written(self) -> None:
+        writer = GameHistoryWriter(min_retry_seconds=0.01)
+        game_records = [
+            build_game_record(create_completed_game(seed)) for seed in range(2)
+        ]
+
+        with (
+            patch.object(
+                game_history,
+                "write_game_records",
+                side_effect=[psycopg.DataError("Bad row"), None],
+            ) as write_game_records,
+            self.assertLogs(game_history.logger, "ERROR") as logs,
+        ):
+            writer.record(game_records[0])
+            await asyncio.sleep(0)
+            writer.record(game_records[1])
+            await writer.stop(1)
+
+        # The bad batch isn't retried, and doesn't hold up the next one
+        self.assertEqual(write_game_records.call_count, 2)
+        self.assertEqual(metrics.summaries["game_history_dropped_games"].count, 1)
+        self.assertIn(game_records[0].game_row[1], logs.output[0])
+
+    async def test_gives_up_once_out_of_attempts(self) -> None:
+        self.database.failing_transactions = 2
+        writer = GameHistoryWriter(min_retry_seconds=0.01, max_attempts=2)
+        with self.assertLogs(game_history.logger, "ERROR"):
+            writer.record(build_game_record(create_completed_game(1)))
+            writer.record(build_game_record(create_completed_game(2)))
+            await writer.stop(1)
+
+        # Both games went in the one batch
+        self.assertEqual(metrics.summaries["game_history_write_failures"].count, 2)
+        self.assertEqual(metrics.summaries["game_history_dropped_games"].last, 2)
+        self.assertNotIn(game_history.GAMES_COPY, self.database.copied_rows)
+
+    async def test_drops_games_once_the_queue_is_full(self) -> None:
+        self.database.failing_transactions = 1
+        writer = GameHistoryWriter(queue_size=1, min_retry_seconds=0.1)
+        game_records = [
+            build_game_record(create_completed_game(seed)) for seed in range(3)
+        ]
+
+        with self.assertLogs(game_history.logger, "ERROR"):
+            writer.record(game_records[0])
+            # Let the writer take the first game and start failing to write it
+            await asyncio.sleep(0)
+            writer.record(game_records[1])
+            # Returns right away instead of waiting for room
+            writer.record(game_records[2])
+            await writer.stop(1)
+
+        self.assertEqual(len(self.database.copied_rows[game_history.GAMES_COPY]), 2)
+        self.assertEqual(metrics.summaries["game_history_queue_full"].count, 1)
@@ -0,0 +1,134 @@
+import tempfile
+from random import Random
+from unittest import IsolatedAsyncioTestCase
+
+import msgpack
+
+from server.data import game_log
+from server.data.game_log import GameLogWriter, get_log_path, read_game_log, replay_game
+from server.game.card import card_id_to_str
+from server.game.core import GameLogEntryType
+from server.game.judgement import JudgementGame
+from server.game.simulation import RandomPolicy
+from server.models.game import GameStatus
+from server.models.judgement import (
+    JudgementAction,
+    JudgementBidHandsAction,
+    JudgementPhase,
+    JudgementPlayCardAction,
+)
+
+
+def take_action(game: JudgementGame, policy: RandomPolicy) -> None:
+    player_id = game.get_current_player_id()
+    if game.phase == JudgementPhase.BIDDING:
+        action: JudgementAction = JudgementBidHandsAction(
+            num_hands=policy.choose_bid(game, player_id)
+        )
+    else:
+        action = JudgementPlayCardAction(
+            card=card_id_to_str(policy.choose_card(game, player_id))
+        )
+    game.apply_input(player_id, action)
+
+
+# What a crash part way through writing an entry leaves behind
+def append_partial_entry(path: str) -> None:
+    with open(path, "ab") as log_file:
+        log_file.write(msgpack.packb([100, 3, 0, {"actionType": "BID_HANDS"}])[:-3])
+
+
+def create_logged_game() -> JudgementGame:
+    game = JudgementGame("LOG", seed=1234)
+    game.record_log = True
+    for player_id in range(4):
+        game.add_player(player_id)
+    game.remove_player(3)
+    game.process_raw_input(
+        0, {"actionType": "UPDATE_SETTINGS", "numDecks": None, "numRounds": 3}
+    )
+    game.start_game()
+    return game
+
+
+class TestGameLog(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.log_dir = directory.name
+
+        self.game = create_logged_game()
+        self.writer = GameLogWriter(self.log_dir)
+        self.path = get_log_path(self.log_dir, self.game.game_id, self.game.seed)
+
+    def append_log_entries(self) -> None:
+        self.writer.append(self.game, self.game.drain_log_entries())
+
+    async def test_replays_games_to_any_version(self) -> None:
+        self.append_log_entries()
+        # The first writes create the log, later ones append to it
+        await self.writer.flush()
+
+        policy = RandomPolicy(Random(1))
+        states_by_version = {}
+        while self.game.status == GameStatus.IN_PROGRESS:
+            take_action(self.game, policy)
+            states_by_version[self.game.state_version] = self.game.build_game_states(
+                {0, 1, 2}
+            )
+            self.append_log_entries()
+        await self.writer.flush()
+
+        game_log = read_game_log(self.path)
+        self.assertEqual(
+            [log_entry.entry_type for log_entry in game_log.entries].count(
+                GameLogEntryType.DEAL
+            ),
+            3,
+        )
+        for state_version in (min(states_by_version), 20, max(states_by_version)):
+            replayed_game = replay_game(game_log, state_version)
+            self.assertEqual(replayed_game.state_version, state_version)
+            self.assertEqual(
+                replayed_game.build_game_states({0, 1, 2}),
+                states_by_version[state_version],
+            )
+
+    async def test_rejects_logs_that_replay_differently(self) -> None:
+        self.append_log_entries()
+        await self.writer.flush()
+
+        game_log = read_game_log(self.path)
+        game_log.seed += 1
+        with self.assertRaisesRegex(ValueError, "dealt differently"):
+            replay_game(game_log)
+
+    async def test_drops_partial_entries_and_lost_versions(self) -> None:
+        policy = RandomPolicy(Random(1))
+        self.append_log_entries()
+        await self.writer.flush()
+        snapshot_version = self.game.state_version
+
+        for _ in range(3):
+            take_action(self.game, policy)
+        self.append_log_entries()
+        await self.writer.flush()
+        append_partial_entry(self.path)
+
+        # A restarted server picks the game back up from before the last few actions
+        restored_game = replay_game(read_game_log(self.path), snapshot_version)
+        restored_game.record_log = True
+        restarted_writer = GameLogWriter(self.log_dir)
+        policy = RandomPolicy(Random(2))
+        for _ in range(2):
+            take_action(restored_game, policy)
+        restarted_writer.append(restored_game, restored_game.drain_log_entries())
+        with self.assertLogs(game_log.logger, "WARNING"):
+            await restarted_writer.flush()
+
+        rewritten_log = read_game_log(self.path)
+        self.assertEqual(rewritten_log.entries[-1].state_version, snapshot_version + 2)
+        self.assertEqual(
+            replay_game(rewritten_log).build_public_game_state(),
+            restored_game.build_public_game_state(),
+        )
@@ -0,0 +1,207 @@
+import asyncio
+import functools
+import os
+import tempfile
+import threading
+from random import Random
+from typing import Any
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from server.data import bot_manager, game_actor, game_manager, game_snapshots
+from server.data.game_snapshots import (
+    GameSnapshotStore,
+    GameSnapshotter,
+    decode_game,
+    encode_game,
+    load_games,
+)
+from server.game.card import card_id_to_str
+from server.game.judgement import JudgementGame
+from server.game.simulation import RandomPolicy, create_headless_game, play_game
+from server.models.game import GameStatus
+from server.models.judgement import (
+    JudgementAction,
+    JudgementBidHandsAction,
+    JudgementPhase,
+    JudgementPlayCardAction,
+)
+
+
+def take_actions(game: JudgementGame, policy: RandomPolicy, num_actions: int) -> None:
+    for _ in range(num_actions):
+        if game.status != GameStatus.IN_PROGRESS:
+            return
+
+        player_id = game.get_current_player_id()
+        if game.phase == JudgementPhase.BIDDING:
+            action: JudgementAction = JudgementBidHandsAction(
+                num_hands=policy.choose_bid(game, player_id)
+            )
+        else:
+            action = JudgementPlayCardAction(
+                card=card_id_to_str(policy.choose_card(game, player_id))
+            )
+        game.apply_input(player_id, action)
+
+
+def create_game_in_progress(game_id: str, num_actions: int) -> JudgementGame:
+    game = create_headless_game(3, num_rounds=3, rand=Random(1), game_id=game_id)
+    game.start_game()
+    take_actions(game, RandomPolicy(Random(1)), num_actions)
+    return game
+
+
+class TestGameSnapshots(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "games.sqlite3")
+
+        self.store = GameSnapshotStore(self.path)
+        self.addCleanup(self.store.close)
+
+    def test_restored_games_play_on_identically(self) -> None:
+        game = create_game_in_progress("SNAP", 5)
+        restored_game = decode_game(encode_game(game))
+        self.assertIsInstance(restored_game, JudgementGame)
+        assert isinstance(restored_game, JudgementGame)
+
+        self.assertEqual(restored_game.state_version, game.state_version)
+        self.assertEqual(
+            restored_game.build_public_game_state(), game.build_public_game_state()
+        )
+
+        play_game(game, RandomPolicy(Random(2)))
+        play_game(restored_game, RandomPolicy(Random(2)))
+        self.assertListEqual(
+            [restored_game.player_states[player_id].score for player_id in range(3)],
+            [game.player_states[player_id].score for player_id in range(3)],
+        )
+
+    async def test_writes_the_latest_state_of_each_game_once(self) -> None:
+        snapshotter = GameSnapshotter(self.store)
+        game = create_game_in_progress("SNAP", 1)
+        other_game = create_game_in_progress("OTHER", 1)
+        for _ in range(3):
+            take_actions(game, RandomPolicy(Random(1)), 1)
+            snapshotter.mark_dirty(game)
+        snapshotter.mark_dirty(other_game)
+
+        with patch.object(self.store, "write", wraps=self.store.write) as write:
+            await snapshotter.flush()
+            # Nothing changed since the last write
+            snapshotter.mark_dirty(game)
+            await snapshotter.flush()
+        write.assert_called_once()
+
+        restored_games = {game.game_id: game for game in await load_games(self.store)}
+        self.assertSetEqual(set(restored_games), {"SNAP", "OTHER"})
+        self.assertEqual(restored_games["SNAP"].state_version, game.state_version)
+
+    async def test_deletes_finished_and_forgotten_games(self) -> None:
+        snapshotter = GameSnapshotter(self.store)
+        game = create_game_in_progress("SNAP", 1)
+        other_game = create_game_in_progress("OTHER", 1)
+        snapshotter.mark_dirty(game)
+        snapshotter.mark_dirty(other_game)
+        await snapshotter.flush()
+
+        take_actions(game, RandomPolicy(Random(1)), 100)
+        self.assertEqual(game.status, GameStatus.COMPLETE)
+        snapshotter.mark_dirty(game)
+        snapshotter.forget_game(other_game.game_id)
+        await snapshotter.flush()
+
+        self.assertListEqual(await load_games(self.store), [])
+
+    async def test_archives_games_alongside_their_snapshots(self) -> None:
+        snapshotter = GameSnapshotter(self.store)
+        game = create_game_in_progress("SNAP", 100)
+        snapshotter.archive_game(game)
+        snapshotter.forget_game(game.game_id)
+        await snapshotter.flush()
+        snapshotter.archive_game(game)
+        await snapshotter.flush()
+
+        archived_games = [
+            decode_game(snapshot) for snapshot in self.store.load_archived("SNAP")
+        ]
+        self.assertEqual(len(archived_games), 2)
+        self.assertEqual(archived_games[0].status, GameStatus.COMPLETE)
+        self.assertEqual(archived_games[0].state_version, game.state_version)
+        self.assertListEqual(await load_games(self.store), [])
+
+    async def test_cancelled_flushes_keep_their_games_dirty(self) -> None:
+        snapshotter = GameSnapshotter(self.store)
+        for game_id in ("SNAP", "OTHER"):
+            snapshotter.mark_dirty(create_game_in_progress(game_id, 1))
+
+        with patch.object(game_snapshots, "SNAPSHOT_ENCODE_BATCH_SIZE", 1):
+            flush = asyncio.create_task(snapshotter.flush())
+            # Stops between encoding the two games
+            await asyncio.sleep(0)
+            flush.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await flush
+        self.assertSetEqual(set(snapshotter.dirty_games), {"SNAP", "OTHER"})
+
+        await snapshotter.flush()
+        restored_games = await load_games(self.store)
+        self.assertSetEqual({game.game_id for game in restored_games}, {"SNAP", "OTHER"})
+
+    async def test_stopping_waits_for_the_write_under_way(self) -> None:
+        snapshotter = GameSnapshotter(self.store)
+        snapshotter.mark_dirty(create_game_in_progress("SNAP", 1))
+
+        writing = threading.Event()
+        resume_writing = threading.Event()
+        write = self.store.write
+
+        # Only the first write is held up
+        def blocking_write(*args: Any) -> int:
+            if not writing.is_set():
+                writing.set()
+                resume_writing.wait(5)
+            return write(*args)
+
+        with patch.object(self.store, "write", side_effect=blocking_write):
+            flush = asyncio.create_task(snapshotter.flush())
+            await asyncio.to_thread(writing.wait, 5)
+            flush.cancel()
+            snapshotter.mark_dirty(create_game_in_progress("OTHER", 1))
+
+            stop = asyncio.create_task(snapshotter.stop())
+            await asyncio.sleep(0.01)
+            self.assertFalse(stop.done())
+            resume_writing.set()
+            await stop
+        with self.assertRaises(asyncio.CancelledError):
+            await flush
+
+        restored_games = await load_games(self.store)
+        self.assertSetEqual({game.game_id for game in restored_games}, {"SNAP", "OTHER"})
+
+    async def test_restores_games_into_play(self) -> None:
+        snapshotter = GameSnapshotter(self.store)
+        game = create_headless_game(2, game_id="SNAP")
+        game.add_player(-5)
+        snapshotter.mark_dirty(game)
+        await snapshotter.stop()
+
+        start = functools.partial(game_snapshots.start, self.path)
+        with (
+            patch.object(game_snapshots, "start", start),
+            patch.object(game_manager, "games", {}),
+        ):
+            await game_manager.restore_games()
+            restored_game = game_manager.get_game("SNAP")
+        self.addAsyncCleanup(game_snapshots.stop)
+        self.addCleanup(bot_manager.remove_game, "SNAP")
+        self.addCleanup(game_actor.remove_game, "SNAP")
+
+        self.assertListEqual(list(restored_game.players), [0, 1, -5])
+        self.assertTrue(bot_manager.is_bot_controlled("SNAP", -5))
+        self.assertFalse(bot_manager.is_bot_controlled("SNAP", 0))
+        # New bots are numbered past the restored ones
+        self.assertLess(bot_manager.add_bot(restored_game, 0), -5)
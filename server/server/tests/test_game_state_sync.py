@@ -0,0 +1,202 @@
+import json
+from random import Random
+from typing import Any
+from unittest import TestCase
+
+import msgpack
+
+from server.data.game_state_sync import GameStateSync, SpectatorFeed
+from server.data.wire_message import WireMessage
+from server.game.card import Card
+from server.game.simulation import RandomPolicy, create_headless_game
+from server.models.game import GamePlayerType, GameStatus
+from server.models.judgement import JudgementPhase
+from server.models.websocket import GameStateDeltaMessage, GameStateMessage, WireFormat
+from server.utils.msgpack_encoder import CARD_EXT_CODE
+from server.utils.state_diff import apply_changes
+
+
+def decode_card_ext(code: int, data: bytes) -> Any:
+    assert code == CARD_EXT_CODE
+    return Card.from_id(data[0]).model_dump(mode="json")
+
+
+class FakeClient:
+    wire_format: WireFormat
+    version: int | None
+    state: Any
+
+    def __init__(self, wire_format: WireFormat = WireFormat.JSON) -> None:
+        self.wire_format = wire_format
+        self.version = None
+        self.state = None
+
+    def receive(self, message: WireMessage) -> None:
+        payload = message.get_payload(self.wire_format)
+        if isinstance(payload, bytes):
+            data = msgpack.unpackb(payload, ext_hook=decode_card_ext)
+        else:
+            data = json.loads(payload)
+
+        if message.event == "game_state":
+            GameStateMessage.model_validate(data)
+            self.version = data["version"]
+            self.state = data["state"]
+        else:
+            delta = GameStateDeltaMessage.model_validate(data)
+            if delta.base_version != self.version:
+                raise AssertionError(
+                    f"Delta based on {delta.base_version} applied to {self.version}"
+                )
+            self.state = apply_changes(
+                self.state, [(change.path, change.value) for change in delta.changes]
+            )
+            self.version = delta.version
+
+
+class TestGameStateSync(TestCase):
+    def test_clients_follow_a_game(self) -> None:
+        game = create_headless_game(4, num_decks=2, num_rounds=3, rand=Random(1))
+        game.add_player(10, GamePlayerType.SPECTATOR)
+        game.add_player(11, GamePlayerType.SPECTATOR)
+        policy = RandomPolicy(Random(2))
+        game.start_game()
+
+        game_state_sync = GameStateSync()
+        clients = {
+            player_id: FakeClient(
+                WireFormat.MSGPACK if player_id in (1, 11) else WireFormat.JSON
+            )
+            for player_id in game.players
+        }
+        late_client = FakeClient(WireFormat.MSGPACK)
+
+        num_updates = 0
+        while game.status == GameStatus.IN_PROGRESS:
+            game_state_update = game_state_sync.update(game)
+            for player_id, client in clients.items():
+                if player_id >= 10:
+                    message = game_state_update.spectator_message
+                else:
+                    message = game_state_update.player_messages.get(player_id)
+                if message is not None:
+                    client.receive(message)
+
+            expected_states = game.build_game_states(set(game.players))
+            for player_id, client in clients.items():
+                self.assertDictEqual(
+                    client.state,
+                    expected_states[player_id].model_dump(mode="json", by_alias=True),
+                )
+
+            if num_updates == 5:
+                message = game_state_sync.get_snapshot_message(2)
+                assert message is not None
+                late_client.receive(message)
+            elif num_updates > 5:
+                message = game_state_update.player_messages.get(2)
+                if message is not None:
+                    late_client.receive(message)
+                self.assertDictEqual(late_client.state, clients[2].state)
+
+            player_id = game.get_current_player_id()
+            if game.phase == JudgementPhase.BIDDING:
+                game.bid(player_id, policy.choose_bid(game, player_id))
+            else:
+                game.play_card(player_id, policy.choose_card(game, player_id))
+            game.state_version += 1
+            num_updates += 1
+
+    def test_spectators_share_one_payload(self) -> None:
+        game = create_headless_game(3, num_rounds=2, rand=Random(3))
+        game.add_player(10, GamePlayerType.SPECTATOR)
+        game.start_game()
+
+        game_state_sync = GameStateSync()
+        first_update = game_state_sync.update(game)
+        self.assertIsNotNone(first_update.spectator_message)
+        self.assertIsNone(game_state_sync.get_snapshot_message(10))
+
+        game.bid(0, 1)
+        game.state_version += 1
+        update = game_state_sync.update(game)
+        assert update.spectator_message is not None
+        self.assertEqual(update.spectator_message.event, "game_state_delta")
+        self.assertNotIn("playerState", update.spectator_message.json_payload)
+
+    def test_private_only_changes_skip_other_recipients(self) -> None:
+        game = create_headless_game(3, num_rounds=4, rand=Random(4))
+        game.add_player(10, GamePlayerType.SPECTATOR)
+        game.start_game()
+
+        game_state_sync = GameStateSync()
+        game_state_sync.update(game)
+
+        game.player_states[1].hand.move(0, 2)
+        game.state_version += 1
+        update = game_state_sync.update(game)
+
+        self.assertIsNone(update.spectator_message)
+        self.assertListEqual(list(update.player_messages), [1])
+
+    def test_spectator_feed_delays_and_merges_frames(self) -> None:
+        game = create_headless_game(4, num_rounds=3, rand=Random(5))
+        game.add_player(10, GamePlayerType.SPECTATOR)
+        policy = RandomPolicy(Random(6))
+        game.start_game()
+
+        game_state_sync = GameStateSync()
+        spectator_feed = SpectatorFeed(delay=10, min_frame_interval=3)
+        client = FakeClient()
+        spectator_states: dict[int, dict] = {}
+
+        now = 0
+        num_frames = 0
+        while game.status == GameStatus.IN_PROGRESS:
+            game_state_update = game_state_sync.update(game)
+            spectator_states[game_state_update.public_version] = (
+                game_state_update.public_state
+            )
+            spectator_feed.add(now, game_state_update, [])
+
+            frame = spectator_feed.pop_frame(now)
+            if now < 10:
+                self.assertIsNone(frame)
+            if frame is not None:
+                assert frame.message is not None
+                client.receive(frame.message)
+                num_frames += 1
+
+                assert client.version is not None
+                self.assertLessEqual(client.version, game.state_version)
+                self.assertDictEqual(client.state, spectator_states[client.version])
+
+                next_frame_time = spectator_feed.get_next_frame_time()
+                assert next_frame_time is not None
+                self.assertGreaterEqual(next_frame_time, now + 3)
+
+            player_id = game.get_current_player_id()
+            if game.phase == JudgementPhase.BIDDING:
+                game.bid(player_id, policy.choose_bid(game, player_id))
+            else:
+                game.play_card(player_id, policy.choose_card(game, player_id))
+            game.state_version += 1
+            now += 1
+
+        self.assertGreater(num_frames, 1)
+        self.assertLess(num_frames, now / 2)
+
+        late_client = FakeClient()
+        message = spectator_feed.get_snapshot_message()
+        assert message is not None
+        late_client.receive(message)
+        self.assertDictEqual(late_client.state, client.state)
+
+    def test_msgpack_payloads_pack_cards(self) -> None:
+        game = create_headless_game(4, num_decks=2, num_rounds=3, rand=Random(7))
+        game.start_game()
+
+        snapshot_message = GameStateSync().update(game).player_messages[0]
+        msgpack_payload = snapshot_message.get_payload(WireFormat.MSGPACK)
+        self.assertIs(snapshot_message.get_payload(WireFormat.MSGPACK), msgpack_payload)
+        self.assertLess(len(msgpack_payload), len(snapshot_message.json_payload))
@@ -0,0 +1,135 @@
+from unittest import TestCase
+
+from server.game.card import (
+    NUM_CARDS_IN_DECK,
+    SUIT_INDICES,
+    Suit,
+    card_id_to_str,
+    encode_card,
+)
+from server.game.hand import Hand
+
+
+class TestHand(TestCase):
+    def test_create_a_hand(self) -> None:
+        hand = Hand([encode_card(Suit.SPADES, 1), encode_card(Suit.HEARTS, 8)])
+
+        self.assertEqual(len(hand), 2)
+        self.assertListEqual([card_id_to_str(card) for card in hand], ["SA", "H8"])
+        self.assertTrue(hand.has_card(encode_card(Suit.SPADES, 1)))
+        self.assertTrue(hand.has_card(encode_card(Suit.HEARTS, 8)))
+        self.assertFalse(hand.has_card(encode_card(Suit.HEARTS, 9)))
+
+        self.assertTrue(hand.has_suit(SUIT_INDICES[Suit.SPADES]))
+        self.assertTrue(hand.has_suit(SUIT_INDICES[Suit.HEARTS]))
+        self.assertFalse(hand.has_suit(SUIT_INDICES[Suit.CLUBS]))
+        self.assertFalse(hand.has_suit(SUIT_INDICES[Suit.DIAMONDS]))
+        self.assertEqual(hand.get_suit_mask(SUIT_INDICES[Suit.HEARTS]), 1 << 7)
+
+    def test_remove_a_card(self) -> None:
+        hand = Hand(
+            [
+                encode_card(Suit.SPADES, 1),
+                encode_card(Suit.HEARTS, 8),
+                encode_card(Suit.SPADES, 4),
+            ]
+        )
+
+        self.assertEqual(
+            hand.remove(encode_card(Suit.SPADES, 1)), encode_card(Suit.SPADES, 1)
+        )
+        self.assertListEqual([card_id_to_str(card) for card in hand], ["H8", "S4"])
+        self.assertFalse(hand.has_card(encode_card(Suit.SPADES, 1)))
+        self.assertTrue(hand.has_suit(SUIT_INDICES[Suit.SPADES]))
+
+        hand.remove(encode_card(Suit.SPADES, 4))
+        self.assertFalse(hand.has_suit(SUIT_INDICES[Suit.SPADES]))
+
+        self.assertRaisesRegex(
+            ValueError,
+            "Card is not in hand: S4",
+            hand.remove,
+            encode_card(Suit.SPADES, 4),
+        )
+
+    def test_remove_duplicate_cards_from_multiple_decks(self) -> None:
+        first_copy = encode_card(Suit.CLUBS, 12)
+        second_copy = encode_card(Suit.CLUBS, 12, deck_index=1)
+        hand = Hand([first_copy, second_copy])
+
+        self.assertTrue(hand.has_card(first_copy))
+        self.assertTrue(hand.has_card(second_copy))
+
+        removed_cards = [hand.remove(first_copy)]
+        self.assertTrue(hand.has_card(first_copy))
+        self.assertTrue(hand.has_suit(SUIT_INDICES[Suit.CLUBS]))
+
+        removed_cards.append(hand.remove(first_copy))
+        self.assertFalse(hand.has_card(first_copy))
+        self.assertFalse(hand.has_suit(SUIT_INDICES[Suit.CLUBS]))
+        self.assertCountEqual(removed_cards, [first_copy, second_copy])
+        self.assertEqual(len(hand), 0)
+
+    def test_move_cards(self) -> None:
+        hand = Hand(range(4))
+
+        hand.move(0, 3)
+        self.assertListEqual(hand.cards, [1, 2, 3, 0])
+        hand.move(3, 1)
+        self.assertListEqual(hand.cards, [1, 0, 2, 3])
+        hand.move(0, 1)
+        self.assertListEqual(hand.cards, [0, 1, 2, 3])
+
+    def test_move_cards_next_to_the_last_position(self) -> None:
+        hand = Hand(range(4))
+
+        # Lands at to_index like the client's own reorder, rather than at the end
+        hand.move(0, 2)
+        self.assertListEqual(hand.cards, [1, 2, 0, 3])
+        hand.move(1, 3)
+        self.assertListEqual(hand.cards, [1, 0, 3, 2])
+
+    def test_clear(self) -> None:
+        hand = Hand(range(13))
+        hand.clear()
+
+        self.assertEqual(len(hand), 0)
+        self.assertFalse(hand.has_card(0))
+        self.assertFalse(hand.has_suit(0))
+
+    def test_copy(self) -> None:
+        hand = Hand([encode_card(Suit.SPADES, 1), encode_card(Suit.HEARTS, 8)])
+        hand_copy = hand.copy()
+
+        hand_copy.remove(encode_card(Suit.SPADES, 1))
+        hand_copy.add(encode_card(Suit.CLUBS, 2))
+
+        self.assertListEqual([card_id_to_str(card) for card in hand], ["SA", "H8"])
+        self.assertTrue(hand.has_card(encode_card(Suit.SPADES, 1)))
+        self.assertFalse(hand.has_suit(SUIT_INDICES[Suit.CLUBS]))
+        self.assertListEqual([card_id_to_str(card) for card in hand_copy], ["H8", "C2"])
+        self.assertFalse(hand_copy.has_suit(SUIT_INDICES[Suit.SPADES]))
+
+    def test_order_survives_removals(self) -> None:
+        hand = Hand(range(8))
+        for card_id in (2, 5, 0, 7, 3):
+            hand.remove(card_id)
+            hand_copy = hand.copy()
+            self.assertListEqual(list(hand_copy), list(hand))
+
+        self.assertEqual(len(hand), 3)
+        self.assertListEqual(list(hand), [1, 4, 6])
+        hand.add(9)
+        hand.move(3, 0)
+        self.assertListEqual(hand.cards, [9, 1, 4, 6])
+        self.assertEqual(hand.remove(4), 4)
+        self.assertListEqual(hand.cards, [9, 1, 6])
+
+    def test_holds_hundreds_of_copies_of_a_card(self) -> None:
+        hand = Hand(range(0, NUM_CARDS_IN_DECK * 300, NUM_CARDS_IN_DECK))
+
+        for _ in range(299):
+            hand.remove(0)
+        self.assertTrue(hand.has_card(0))
+        hand.remove(0)
+        self.assertFalse(hand.has_card(0))
@@ -1,12 +1,14 @@
+from random import Random
 from unittest import TestCase
 
-from server.game.card import Card, Suit
-from server.game.judgement import compute_winning_card
+from server.game.card import NUM_CARDS_IN_DECK, SUIT_INDICES, Card, Suit
+from server.game.judgement import JudgementGame, beats_winning_card, compute_winning_card
+from server.models.judgement import JudgementBidHandsAction
 
 
 class TestJudgement(TestCase):
     def test_cannot_compute_winner_of_empty_pile(self) -> None:
-        pile: list[Card] = []
+        pile: list[int] = []
         self.assertRaisesRegex(
             ValueError,
             "Can't find the winner of an empty pile",
@@ -17,180 +19,254 @@ class TestJudgement(TestCase):
 
     def test_computing_winning_card_from_single_card(self) -> None:
         self.assertEqual(
-            compute_winning_card([Card(suit=Suit.SPADES, rank=1)], Suit.SPADES), 0
+            compute_winning_card([Card(suit=Suit.SPADES, rank=1).to_id()], Suit.SPADES), 0
         )
         self.assertEqual(
-            compute_winning_card([Card(suit=Suit.HEARTS, rank=1)], Suit.SPADES), 0
+            compute_winning_card([Card(suit=Suit.HEARTS, rank=1).to_id()], Suit.SPADES), 0
         )
 
     def test_computing_winning_card_from_high_card(self) -> None:
         pile = [
-            Card(suit=Suit.SPADES, rank=4),
-            Card(suit=Suit.SPADES, rank=6),
-            Card(suit=Suit.SPADES, rank=5),
+            Card(suit=Suit.SPADES, rank=4).to_id(),
+            Card(suit=Suit.SPADES, rank=6).to_id(),
+            Card(suit=Suit.SPADES, rank=5).to_id(),
         ]
         self.assertEqual(compute_winning_card(pile, Suit.SPADES), 1)
 
         pile = [
-            Card(suit=Suit.SPADES, rank=4),
-            Card(suit=Suit.SPADES, rank=6),
-            Card(suit=Suit.SPADES, rank=1),
+            Card(suit=Suit.SPADES, rank=4).to_id(),
+            Card(suit=Suit.SPADES, rank=6).to_id(),
+            Card(suit=Suit.SPADES, rank=1).to_id(),
         ]
         self.assertEqual(compute_winning_card(pile, Suit.SPADES), 2)
 
         pile = [
-            Card(suit=Suit.HEARTS, rank=4),
-            Card(suit=Suit.HEARTS, rank=6),
-            Card(suit=Suit.HEARTS, rank=5),
+            Card(suit=Suit.HEARTS, rank=4).to_id(),
+            Card(suit=Suit.HEARTS, rank=6).to_id(),
+            Card(suit=Suit.HEARTS, rank=5).to_id(),
         ]
         self.assertEqual(compute_winning_card(pile, Suit.SPADES), 1)
 
         pile = [
-            Card(suit=Suit.HEARTS, rank=4),
-            Card(suit=Suit.HEARTS, rank=6),
-            Card(suit=Suit.HEARTS, rank=1),
+            Card(suit=Suit.HEARTS, rank=4).to_id(),
+            Card(suit=Suit.HEARTS, rank=6).to_id(),
+            Card(suit=Suit.HEARTS, rank=1).to_id(),
         ]
         self.assertEqual(compute_winning_card(pile, Suit.SPADES), 2)
 
     def test_computing_winning_card_from_high_card_ignoring_non_trick_suits(self) -> None:
         pile = [
-            Card(suit=Suit.SPADES, rank=4),
-            Card(suit=Suit.HEARTS, rank=6),
-            Card(suit=Suit.SPADES, rank=5),
+            Card(suit=Suit.SPADES, rank=4).to_id(),
+            Card(suit=Suit.HEARTS, rank=6).to_id(),
+            Card(suit=Suit.SPADES, rank=5).to_id(),
         ]
         self.assertEqual(compute_winning_card(pile, Suit.SPADES), 2)
 
         pile = [
-            Card(suit=Suit.SPADES, rank=4),
-            Card(suit=Suit.HEARTS, rank=6),
-            Card(suit=Suit.SPADES, rank=1),
+            Card(suit=Suit.SPADES, rank=4).to_id(),
+            Card(suit=Suit.HEARTS, rank=6).to_id(),
+            Card(suit=Suit.SPADES, rank=1).to_id(),
         ]
         self.assertEqual(compute_winning_card(pile, Suit.SPADES), 2)
 
         pile = [
-            Card(suit=Suit.HEARTS, rank=4),
-            Card(suit=Suit.CLUBS, rank=6),
-            Card(suit=Suit.HEARTS, rank=5),
+            Card(suit=Suit.HEARTS, rank=4).to_id(),
+            Card(suit=Suit.CLUBS, rank=6).to_id(),
+            Card(suit=Suit.HEARTS, rank=5).to_id(),
         ]
         self.assertEqual(compute_winning_card(pile, Suit.SPADES), 2)
 
         pile = [
-            Card(suit=Suit.HEARTS, rank=4),
-            Card(suit=Suit.CLUBS, rank=6),
-            Card(suit=Suit.HEARTS, rank=1),
+            Card(suit=Suit.HEARTS, rank=4).to_id(),
+            Card(suit=Suit.CLUBS, rank=6).to_id(),
+            Card(suit=Suit.HEARTS, rank=1).to_id(),
         ]
         self.assertEqual(compute_winning_card(pile, Suit.SPADES), 2)
 
     def test_computing_winning_card_from_trump(self) -> None:
         pile = [
-            Card(suit=Suit.HEARTS, rank=4),
-            Card(suit=Suit.SPADES, rank=6),
-            Card(suit=Suit.HEARTS, rank=5),
+            Card(suit=Suit.HEARTS, rank=4).to_id(),
+            Card(suit=Suit.SPADES, rank=6).to_id(),
+            Card(suit=Suit.HEARTS, rank=5).to_id(),
         ]
         self.assertEqual(compute_winning_card(pile, Suit.SPADES), 1)
 
         pile = [
-            Card(suit=Suit.HEARTS, rank=4),
-            Card(suit=Suit.SPADES, rank=6),
-            Card(suit=Suit.HEARTS, rank=1),
+            Card(suit=Suit.HEARTS, rank=4).to_id(),
+            Card(suit=Suit.SPADES, rank=6).to_id(),
+            Card(suit=Suit.HEARTS, rank=1).to_id(),
         ]
         self.assertEqual(compute_winning_card(pile, Suit.SPADES), 1)
 
     def test_computing_winning_card_from_trump_ignoring_non_trick_suits(self) -> None:
         pile = [
-            Card(suit=Suit.HEARTS, rank=4),
-            Card(suit=Suit.CLUBS, rank=6),
-            Card(suit=Suit.HEARTS, rank=5),
-            Card(suit=Suit.SPADES, rank=2),
+            Card(suit=Suit.HEARTS, rank=4).to_id(),
+            Card(suit=Suit.CLUBS, rank=6).to_id(),
+            Card(suit=Suit.HEARTS, rank=5).to_id(),
+            Card(suit=Suit.SPADES, rank=2).to_id(),
         ]
         self.assertEqual(compute_winning_card(pile, Suit.SPADES), 3)
 
         pile = [
-            Card(suit=Suit.HEARTS, rank=4),
-            Card(suit=Suit.CLUBS, rank=6),
-            Card(suit=Suit.HEARTS, rank=1),
-            Card(suit=Suit.SPADES, rank=2),
+            Card(suit=Suit.HEARTS, rank=4).to_id(),
+            Card(suit=Suit.CLUBS, rank=6).to_id(),
+            Card(suit=Suit.HEARTS, rank=1).to_id(),
+            Card(suit=Suit.SPADES, rank=2).to_id(),
         ]
         self.assertEqual(compute_winning_card(pile, Suit.SPADES), 3)
 
     def test_computing_winning_card_with_first_duplicate_wins(self) -> None:
         pile = [
-            Card(suit=Suit.SPADES, rank=4),
-            Card(suit=Suit.SPADES, rank=6),
-            Card(suit=Suit.SPADES, rank=5),
-            Card(suit=Suit.SPADES, rank=6),
+            Card(suit=Suit.SPADES, rank=4).to_id(),
+            Card(suit=Suit.SPADES, rank=6).to_id(),
+            Card(suit=Suit.SPADES, rank=5).to_id(),
+            Card(suit=Suit.SPADES, rank=6).to_id(),
         ]
         self.assertEqual(compute_winning_card(pile, Suit.SPADES, False), 1)
 
         pile = [
-            Card(suit=Suit.SPADES, rank=4),
-            Card(suit=Suit.SPADES, rank=6),
-            Card(suit=Suit.SPADES, rank=1),
-            Card(suit=Suit.SPADES, rank=1),
+            Card(suit=Suit.SPADES, rank=4).to_id(),
+            Card(suit=Suit.SPADES, rank=6).to_id(),
+            Card(suit=Suit.SPADES, rank=1).to_id(),
+            Card(suit=Suit.SPADES, rank=1).to_id(),
         ]
         self.assertEqual(compute_winning_card(pile, Suit.SPADES, False), 2)
 
         pile = [
-            Card(suit=Suit.HEARTS, rank=4),
-            Card(suit=Suit.HEARTS, rank=6),
-            Card(suit=Suit.HEARTS, rank=5),
-            Card(suit=Suit.HEARTS, rank=6),
+            Card(suit=Suit.HEARTS, rank=4).to_id(),
+            Card(suit=Suit.HEARTS, rank=6).to_id(),
+            Card(suit=Suit.HEARTS, rank=5).to_id(),
+            Card(suit=Suit.HEARTS, rank=6).to_id(),
         ]
         self.assertEqual(compute_winning_card(pile, Suit.SPADES, False), 1)
 
         pile = [
-            Card(suit=Suit.HEARTS, rank=4),
-            Card(suit=Suit.HEARTS, rank=6),
-            Card(suit=Suit.HEARTS, rank=1),
-            Card(suit=Suit.HEARTS, rank=1),
+            Card(suit=Suit.HEARTS, rank=4).to_id(),
+            Card(suit=Suit.HEARTS, rank=6).to_id(),
+            Card(suit=Suit.HEARTS, rank=1).to_id(),
+            Card(suit=Suit.HEARTS, rank=1).to_id(),
         ]
         self.assertEqual(compute_winning_card(pile, Suit.SPADES, False), 2)
 
     def test_computing_winning_card_with_last_duplicate_wins(self) -> None:
         pile = [
-            Card(suit=Suit.SPADES, rank=4),
-            Card(suit=Suit.SPADES, rank=6),
-            Card(suit=Suit.SPADES, rank=5),
-            Card(suit=Suit.SPADES, rank=6),
+            Card(suit=Suit.SPADES, rank=4).to_id(),
+            Card(suit=Suit.SPADES, rank=6).to_id(),
+            Card(suit=Suit.SPADES, rank=5).to_id(),
+            Card(suit=Suit.SPADES, rank=6).to_id(),
         ]
         self.assertEqual(compute_winning_card(pile, Suit.SPADES, True), 3)
 
         pile = [
-            Card(suit=Suit.SPADES, rank=4),
-            Card(suit=Suit.SPADES, rank=6),
-            Card(suit=Suit.SPADES, rank=1),
-            Card(suit=Suit.SPADES, rank=1),
+            Card(suit=Suit.SPADES, rank=4).to_id(),
+            Card(suit=Suit.SPADES, rank=6).to_id(),
+            Card(suit=Suit.SPADES, rank=1).to_id(),
+            Card(suit=Suit.SPADES, rank=1).to_id(),
         ]
         self.assertEqual(compute_winning_card(pile, Suit.SPADES, True), 3)
 
         pile = [
-            Card(suit=Suit.HEARTS, rank=4),
-            Card(suit=Suit.HEARTS, rank=6),
-            Card(suit=Suit.HEARTS, rank=5),
-            Card(suit=Suit.HEARTS, rank=6),
+            Card(suit=Suit.HEARTS, rank=4).to_id(),
+            Card(suit=Suit.HEARTS, rank=6).to_id(),
+            Card(suit=Suit.HEARTS, rank=5).to_id(),
+            Card(suit=Suit.HEARTS, rank=6).to_id(),
         ]
         self.assertEqual(compute_winning_card(pile, Suit.SPADES, True), 3)
 
         pile = [
-            Card(suit=Suit.HEARTS, rank=4),
-            Card(suit=Suit.HEARTS, rank=6),
-            Card(suit=Suit.HEARTS, rank=1),
-            Card(suit=Suit.HEARTS, rank=1),
+            Card(suit=Suit.HEARTS, rank=4).to_id(),
+            Card(suit=Suit.HEARTS, rank=6).to_id(),
+            Card(suit=Suit.HEARTS, rank=1).to_id(),
+            Card(suit=Suit.HEARTS, rank=1).to_id(),
         ]
         self.assertEqual(compute_winning_card(pile, Suit.SPADES, True), 3)
 
         pile = [
-            Card(suit=Suit.HEARTS, rank=4),
-            Card(suit=Suit.SPADES, rank=6),
-            Card(suit=Suit.HEARTS, rank=5),
-            Card(suit=Suit.SPADES, rank=6),
+            Card(suit=Suit.HEARTS, rank=4).to_id(),
+            Card(suit=Suit.SPADES, rank=6).to_id(),
+            Card(suit=Suit.HEARTS, rank=5).to_id(),
+            Card(suit=Suit.SPADES, rank=6).to_id(),
         ]
         self.assertEqual(compute_winning_card(pile, Suit.SPADES, True), 3)
 
         pile = [
-            Card(suit=Suit.HEARTS, rank=4),
-            Card(suit=Suit.SPADES, rank=6),
-            Card(suit=Suit.HEARTS, rank=1),
-            Card(suit=Suit.SPADES, rank=6),
+            Card(suit=Suit.HEARTS, rank=4).to_id(),
+            Card(suit=Suit.SPADES, rank=6).to_id(),
+            Card(suit=Suit.HEARTS, rank=1).to_id(),
+            Card(suit=Suit.SPADES, rank=6).to_id(),
         ]
         self.assertEqual(compute_winning_card(pile, Suit.SPADES, True), 3)
+
+    def test_beating_the_winning_card(self) -> None:
+        spades = SUIT_INDICES[Suit.SPADES]
+        hearts = SUIT_INDICES[Suit.HEARTS]
+        heart_four = Card(suit=Suit.HEARTS, rank=4).to_id()
+
+        self.assertTrue(
+            beats_winning_card(
+                Card(suit=Suit.HEARTS, rank=1).to_id(), heart_four, hearts, spades
+            )
+        )
+        self.assertTrue(
+            beats_winning_card(
+                Card(suit=Suit.SPADES, rank=2).to_id(), heart_four, hearts, spades
+            )
+        )
+        self.assertFalse(
+            beats_winning_card(
+                Card(suit=Suit.CLUBS, rank=1).to_id(), heart_four, hearts, spades
+            )
+        )
+        self.assertFalse(
+            beats_winning_card(
+                Card(suit=Suit.HEARTS, rank=3).to_id(), heart_four, hearts, spades
+            )
+        )
+
+        duplicate_heart_four = Card(suit=Suit.HEARTS, rank=4).to_id(deck_index=1)
+        self.assertFalse(
+            beats_winning_card(duplicate_heart_four, heart_four, hearts, spades, False)
+        )
+        self.assertTrue(
+            beats_winning_card(duplicate_heart_four, heart_four, hearts, spades, True)
+        )
+
+    def test_tracking_winning_card_incrementally(self) -> None:
+        rand = Random(1234)
+        for _ in range(500):
+            pile = rand.sample(range(2 * NUM_CARDS_IN_DECK), rand.randint(1, 8))
+            trump_suit = rand.choice(list(Suit))
+            last_duplicate_wins = rand.random() < 0.5
+
+            winning_index = 0
+            for index in range(1, len(pile)):
+                if beats_winning_card(
+                    pile[index],
+                    pile[winning_index],
+                    SUIT_INDICES[Card.from_id(pile[0]).suit],
+                    SUIT_INDICES[trump_suit],
+                    last_duplicate_wins,
+                ):
+                    winning_index = index
+
+            self.assertEqual(
+                winning_index, compute_winning_card(pile, trump_suit, last_duplicate_wins)
+            )
+
+    def test_debug_state_is_opt_in(self) -> None:
+        game = JudgementGame("DEBUG", rand=Random(1))
+        game.add_player(1)
+        game.add_player(2)
+        game.start_game()
+
+        self.assertIsNone(game.build_game_states({1})[1].full_state_do_not_use)
+
+        game.debug_state = True
+        debug_state = game.get_debug_state()
+        self.assertIsNotNone(debug_state)
+        self.assertIs(game.get_debug_state(), debug_state)
+        self.assertNotIn("_debug_state_dump", debug_state or {})
+
+        game.apply_input(1, JudgementBidHandsAction(num_hands=0))
+        self.assertIsNot(game.get_debug_state(), debug_state)
+        self.assertEqual(game.state_version, 4)
@@ -0,0 +1,56 @@
+import asyncio
+import os
+import stat
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from server.data.local_pubsub import (
+    LocalPubSubBroker,
+    LocalPubSubClient,
+    LocalPubSubManager,
+)
+
+
+class TestLocalPubSub(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "pubsub.sock")
+
+        server = await LocalPubSubBroker(self.path).start()
+        self.addAsyncCleanup(server.wait_closed)
+        self.addCleanup(server.close)
+
+    async def create_client(self) -> LocalPubSubClient:
+        client = LocalPubSubClient(self.path)
+        self.addAsyncCleanup(client.close)
+        return client
+
+    def test_only_this_user_can_connect(self) -> None:
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+
+    async def test_messages_go_to_every_subscriber_of_the_channel(self) -> None:
+        publisher = await self.create_client()
+        subscriber = await self.create_client()
+        publisher_queue = await publisher.subscribe("a")
+        subscriber_queue = await subscriber.subscribe("a")
+        other_queue = await subscriber.subscribe("b")
+
+        await publisher.publish("a", {"data": b"\x01\x02"})
+
+        self.assertEqual(await subscriber_queue.get(), {"data": b"\x01\x02"})
+        self.assertEqual(await publisher_queue.get(), {"data": b"\x01\x02"})
+        self.assertTrue(other_queue.empty())
+
+    async def test_manager_emits_reach_other_processes(self) -> None:
+        sender = LocalPubSubManager(await self.create_client())
+        receiver = LocalPubSubManager(await self.create_client())
+        await receiver.client.subscribe(receiver.channel)
+        messages = receiver._listen()  # pylint: disable=protected-access
+        receiving = asyncio.ensure_future(anext(messages))
+        self.addCleanup(receiving.cancel)
+
+        message = {"method": "emit", "event": "game_state", "room": "game/ABCD/players"}
+        await sender._publish(message)  # pylint: disable=protected-access
+
+        self.assertEqual(await asyncio.wait_for(receiving, 1), message)
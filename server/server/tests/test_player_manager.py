@@ -0,0 +1,103 @@
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from fastapi import Response
+
+from server.api.dependencies import get_or_create_player
+from server.data import db, player_manager
+from server.tests.fake_db import FakeDatabase
+
+
+class TestPlayerManager(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.database = FakeDatabase()
+        pool_patcher = patch.object(db, "_pool", self.database)
+        pool_patcher.start()
+        self.addCleanup(pool_patcher.stop)
+        self.addCleanup(player_manager.clear_cache)
+
+    async def test_creates_and_gets_players(self) -> None:
+        player, player_auth_id = await player_manager.create_player("Alice")
+
+        self.assertEqual(
+            (await player_manager.get_player(player.player_id)).name, "Alice"
+        )
+        self.assertEqual(
+            (await player_manager.get_player_by_auth(player_auth_id)).player_id,
+            player.player_id,
+        )
+
+    async def test_fails_to_get_unknown_players(self) -> None:
+        with self.assertRaises(ValueError):
+            await player_manager.get_player(1)
+        with self.assertRaises(ValueError):
+            await player_manager.get_player_by_auth("unknown")
+
+    async def test_gets_and_renames_players(self) -> None:
+        alice, _ = await player_manager.create_player("Alice")
+        bob, _ = await player_manager.create_player("Bob")
+        await player_manager.set_player_name(bob.player_id, "Robert")
+
+        players = await player_manager.get_players([alice.player_id, bob.player_id, 3])
+        self.assertDictEqual(
+            {player_id: player.name for player_id, player in players.items()},
+            {alice.player_id: "Alice", bob.player_id: "Robert"},
+        )
+
+    async def test_caches_lookups_until_renamed(self) -> None:
+        player, player_auth_id = await player_manager.create_player("Alice")
+        self.database.queries.clear()
+
+        for _ in range(3):
+            await player_manager.get_player(player.player_id)
+            await player_manager.get_player_by_auth(player_auth_id)
+        self.assertListEqual(self.database.queries, [])
+
+        await player_manager.set_player_name(player.player_id, "Alicia")
+        self.assertEqual(
+            (await player_manager.get_player_by_auth(player_auth_id)).name, "Alicia"
+        )
+        self.assertEqual(len(self.database.queries), 2)
+
+    async def test_bulk_lookups_take_one_query(self) -> None:
+        created = await player_manager.create_players(["Alice", "Bob", "Carol"])
+        self.assertListEqual(
+            [player.name for player, _ in created], ["Alice", "Bob", "Carol"]
+        )
+        self.assertEqual(len(self.database.queries), 1)
+
+        player_manager.clear_cache()
+        await player_manager.get_player(created[0][0].player_id)
+        self.database.queries.clear()
+
+        player_ids = [player.player_id for player, _ in created]
+        players = await player_manager.get_players(player_ids)
+        self.assertListEqual(sorted(players.keys()), player_ids)
+        # Only the players that weren't cached are looked up
+        self.assertEqual(len(self.database.queries), 1)
+
+        await player_manager.get_players(player_ids)
+        self.assertEqual(len(self.database.queries), 1)
+
+    async def test_returning_players_are_fetched_in_one_query(self) -> None:
+        player, player_auth_id = await player_manager.create_player("Alice")
+        player_manager.clear_cache()
+        self.database.queries.clear()
+
+        response = Response()
+        returning_player = await get_or_create_player(response, (player_auth_id, None))
+
+        self.assertEqual(returning_player.player_id, player.player_id)
+        self.assertEqual(len(self.database.queries), 1)
+
+
+class TestPool(IsolatedAsyncioTestCase):
+    async def test_pool_is_sized_and_checked(self) -> None:
+        self.addAsyncCleanup(db.close_pool)
+
+        pool = db.get_pool()
+        self.assertIs(db.get_pool(), pool)
+        self.assertEqual(pool.min_size, db.DB_POOL_MIN_SIZE)
+        self.assertEqual(pool.max_size, db.DB_POOL_MAX_SIZE)
+        # Not opened until the app starts up
+        self.assertTrue(pool.closed)
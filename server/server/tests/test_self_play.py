@@ -0,0 +1,70 @@
+from unittest import TestCase
+
+from server.game.card import Suit
+from server.game.self_play import SelfPlayConfig, play_self_play_games, run_self_play
+
+
+class TestSelfPlay(TestCase):
+    def test_play_games_in_a_task(self) -> None:
+        config = SelfPlayConfig(num_players=3, num_rounds=4, keep_results=True)
+        stats, results = play_self_play_games(config, seed=1, task_index=0, num_games=5)
+
+        self.assertEqual(stats.num_games, 5)
+        self.assertEqual(stats.num_rounds, 20)
+        self.assertEqual(stats.num_player_rounds, 60)
+        self.assertGreaterEqual(sum(stats.num_wins), 5)
+        self.assertEqual(len(results), 5)
+
+        for result in results:
+            self.assertEqual(len(result.round_results), 4)
+            self.assertEqual(
+                sum(result.final_scores.values()),
+                sum(
+                    sum(round_result.round_scores.values())
+                    for round_result in result.round_results
+                ),
+            )
+            for round_result in result.round_results:
+                self.assertEqual(
+                    sum(round_result.won_tricks.values()), 4 - round_result.round_index
+                )
+                self.assertNotIn(None, round_result.bids.values())
+
+    def test_rule_variants_are_applied(self) -> None:
+        config = SelfPlayConfig(
+            num_players=4,
+            num_rounds=3,
+            trump_order=[Suit.HEARTS],
+            made_bid_bonus=0,
+            keep_results=True,
+        )
+        _, results = play_self_play_games(config, seed=2, task_index=0, num_games=3)
+
+        for result in results:
+            for round_result in result.round_results:
+                self.assertEqual(round_result.trump_suit, Suit.HEARTS)
+                for player_id, round_score in round_result.round_scores.items():
+                    if round_score > 0:
+                        self.assertEqual(round_score, round_result.won_tricks[player_id])
+
+    def test_results_do_not_depend_on_the_number_of_workers(self) -> None:
+        config = SelfPlayConfig(num_players=4, num_rounds=5)
+
+        single_worker_report = run_self_play(
+            config, num_games=12, num_workers=1, seed=3, games_per_task=4
+        )
+        multiple_worker_report = run_self_play(
+            config, num_games=12, num_workers=2, seed=3, games_per_task=4
+        )
+
+        self.assertEqual(single_worker_report.stats.num_games, 12)
+        self.assertEqual(multiple_worker_report.stats.num_games, 12)
+        self.assertListEqual(
+            single_worker_report.stats.total_scores,
+            multiple_worker_report.stats.total_scores,
+        )
+        self.assertEqual(
+            single_worker_report.stats.num_bids_made,
+            multiple_worker_report.stats.num_bids_made,
+        )
+        self.assertGreater(multiple_worker_report.get_games_per_second(), 0)
@@ -0,0 +1,99 @@
+import os
+import socket
+import tempfile
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import patch
+
+from server.data import game_manager, shard_manager
+from server.data.local_pubsub import LocalPubSubBroker, LocalPubSubClient
+from server.data.shard_manager import ShardRelay
+from server.game.core import GameError
+from server.models.game import GameName
+
+
+def find_game_id(shard_index: int, shard_count: int) -> str:
+    game_id = game_manager.generate_id()
+    while shard_manager.get_shard_for_game(game_id, shard_count) != shard_index:
+        game_id = game_manager.generate_id()
+    return game_id
+
+
+class TestShardRelay(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = path = os.path.join(directory.name, "pubsub.sock")
+
+        server = await LocalPubSubBroker(path).start()
+        self.addAsyncCleanup(server.wait_closed)
+        self.addCleanup(server.close)
+
+        # Each shard registers the same function, which says which shard ran it
+        self.relays: list[ShardRelay] = []
+        for shard_index in range(2):
+            client = LocalPubSubClient(path)
+            self.addAsyncCleanup(client.close)
+            relay = ShardRelay(shard_index, 2, client)
+            self.addCleanup(relay.stop)
+
+            async def whoami(
+                game_id: str, message: str, shard_index: int = shard_index
+            ) -> str:
+                if message == "fail":
+                    raise GameError(f"{game_id} failed on shard {shard_index}")
+                return f"{message} from shard {shard_index}"
+
+            relay.register(whoami, "whoami")
+            await relay.start()
+            self.relays.append(relay)
+
+    async def test_calls_run_on_the_owning_shard(self) -> None:
+        for shard_index in range(2):
+            game_id = find_game_id(shard_index, 2)
+            for relay in self.relays:
+                self.assertEqual(
+                    await relay.call("whoami", game_id, "hi"),
+                    f"hi from shard {shard_index}",
+                )
+
+    async def test_errors_are_relayed_back(self) -> None:
+        game_id = find_game_id(1, 2)
+        with self.assertRaisesRegex(GameError, f"{game_id} failed on shard 1"):
+            await self.relays[0].call("whoami", game_id, "fail")
+
+    async def test_unanswered_calls_fail_as_game_errors(self) -> None:
+        self.relays[1].stop()
+        with (
+            patch.object(shard_manager, "SHARD_CALL_TIMEOUT_SECONDS", 0.01),
+            self.assertRaisesRegex(GameError, "isn't responding"),
+        ):
+            await self.relays[0].call("whoami", find_game_id(1, 2), "hi")
+
+    async def test_broken_relay_sockets_fail_as_game_errors(self) -> None:
+        relay = ShardRelay(0, 2, LocalPubSubClient(f"{self.path}.missing"))
+        self.addCleanup(relay.stop)
+        with self.assertRaisesRegex(GameError, "isn't responding"):
+            await relay.call("whoami", find_game_id(1, 2), "hi")
+
+    def test_only_stale_sockets_are_removed(self) -> None:
+        self.assertRaisesRegex(
+            RuntimeError, "already at", shard_manager.remove_stale_socket, self.path
+        )
+
+        stale_path = f"{self.path}.stale"
+        with socket.socket(socket.AF_UNIX) as stale_socket:
+            stale_socket.bind(stale_path)
+        shard_manager.remove_stale_socket(stale_path)
+        self.assertFalse(os.path.exists(stale_path))
+
+
+class TestGameSharding(TestCase):
+    def test_shards_are_stable(self) -> None:
+        self.assertEqual(shard_manager.get_shard_for_game("ABCD", 4), 1)
+        self.assertEqual(shard_manager.get_shard_for_game("ABCD", 1), 0)
+
+    def test_games_are_created_on_their_own_shard(self) -> None:
+        for _ in range(10):
+            game = game_manager.create_game(GameName.JUDGEMENT)
+            self.addCleanup(game_manager.delete_game, game.game_id)
+            self.assertTrue(shard_manager.is_local_game(game.game_id))
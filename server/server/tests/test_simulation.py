@@ -0,0 +1,203 @@
+from random import Random
+from unittest import TestCase
+
+from server.game.card import Card, get_card_face, get_card_suit_index
+from server.game.core import GameError
+from server.game.decks import deal_from_seed, get_deal_seed
+from server.game.simulation import RandomPolicy, create_headless_game, play_game
+from server.models.game import GameStatus
+from server.models.judgement import (
+    JudgementGameState,
+    JudgementLegalMoves,
+    JudgementPhase,
+)
+
+
+class TestSimulation(TestCase):
+    def test_create_headless_game(self) -> None:
+        game = create_headless_game(4, num_rounds=5)
+
+        self.assertEqual(game.status, GameStatus.NOT_STARTED)
+        self.assertListEqual(game.ordered_player_ids, [0, 1, 2, 3])
+        self.assertEqual(game.settings.num_rounds, 5)
+
+        game = create_headless_game(5, num_decks=2)
+        self.assertEqual(game.settings.num_rounds, 20)
+
+    def test_play_a_full_game(self) -> None:
+        game = create_headless_game(4, rand=Random(42))
+        play_game(game, RandomPolicy(Random(42)))
+
+        self.assertEqual(game.status, GameStatus.COMPLETE)
+        self.assertEqual(game.current_round, 12)
+        for player_state in game.player_states.values():
+            self.assertEqual(len(player_state.hand), 0)
+            self.assertGreaterEqual(player_state.score, 0)
+
+    def test_playing_is_reproducible(self) -> None:
+        scores = []
+        for _ in range(2):
+            game = create_headless_game(3, num_decks=2, num_rounds=6, rand=Random(7))
+            play_game(game, RandomPolicy(Random(8)))
+            scores.append([game.player_states[player_id].score for player_id in range(3)])
+
+        self.assertListEqual(scores[0], scores[1])
+
+    def test_deals_can_be_regenerated_from_the_game_seed(self) -> None:
+        game = create_headless_game(3, num_decks=2, num_rounds=6, rand=Random(9))
+        game.start_game()
+        game.end_round()
+
+        self.assertListEqual(
+            deal_from_seed(2, get_deal_seed(game.seed, 1), 3, 5),
+            [game.player_states[player_id].hand.cards for player_id in range(3)],
+        )
+
+    def test_every_player_bids_before_playing(self) -> None:
+        game = create_headless_game(3, num_rounds=3, rand=Random(1))
+        game.start_game()
+        game.end_round()
+
+        self.assertEqual(game.current_round, 1)
+        self.assertEqual(game.current_turn_index, 1)
+        for player_id in [1, 2, 0]:
+            self.assertEqual(game.phase, JudgementPhase.BIDDING)
+            game.bid(player_id, 0)
+
+        self.assertEqual(game.phase, JudgementPhase.PLAYING)
+        self.assertEqual(game.current_turn_index, 1)
+
+    def test_playing_out_of_turn_or_suit_is_rejected(self) -> None:
+        game = create_headless_game(2, num_rounds=13, rand=Random(3))
+        game.start_game()
+        game.bid(0, 1)
+
+        self.assertRaisesRegex(GameError, "not your turn", game.bid, 0, 1)
+        game.bid(1, 1)
+
+        self.assertRaisesRegex(
+            GameError,
+            "not your turn",
+            game.play_card,
+            1,
+            game.player_states[1].hand.cards[0],
+        )
+        self.assertRaisesRegex(
+            GameError,
+            "Missing card from hand",
+            game.play_card,
+            0,
+            game.player_states[1].hand.cards[0],
+        )
+
+        led_card = game.player_states[0].hand.cards[0]
+        game.play_card(0, led_card)
+
+        # The deal for this seed leaves player 1 holding the led suit and others
+        hand = game.player_states[1].hand
+        led_suit_index = get_card_suit_index(led_card)
+        off_suit_cards = [
+            card for card in hand if get_card_suit_index(card) != led_suit_index
+        ]
+        self.assertTrue(hand.has_suit(led_suit_index))
+        self.assertGreater(len(off_suit_cards), 0)
+
+        self.assertRaisesRegex(
+            GameError,
+            "Cannot play non-matching suit",
+            game.play_card,
+            1,
+            off_suit_cards[0],
+        )
+
+        playable_cards = game.get_playable_cards(1)
+        self.assertGreater(len(playable_cards), 0)
+        game.play_card(1, playable_cards[0])
+
+        self.assertEqual(game.current_trick, 1)
+        self.assertEqual(
+            sum(
+                player_state.current_won_tricks
+                for player_state in game.player_states.values()
+            ),
+            1,
+        )
+
+    def test_all_cards_return_to_the_deck_each_round(self) -> None:
+        game = create_headless_game(4, rand=Random(5))
+        policy = RandomPolicy(Random(5))
+        game.start_game()
+
+        while game.status == GameStatus.IN_PROGRESS:
+            current_round = game.current_round
+            player_id = game.get_current_player_id()
+            if game.phase == JudgementPhase.BIDDING:
+                game.bid(player_id, policy.choose_bid(game, player_id))
+            else:
+                game.play_card(player_id, policy.choose_card(game, player_id))
+
+            if (
+                game.status == GameStatus.IN_PROGRESS
+                and game.current_round != current_round
+            ):
+                cards_in_hands = sum(
+                    len(player_state.hand) for player_state in game.player_states.values()
+                )
+                self.assertEqual(len(game.decks.cards) + cards_in_hands, 52)
+                self.assertEqual(
+                    len({Card.from_id(card) for card in game.decks.cards}),
+                    len(game.decks.cards),
+                )
+
+    def test_legal_moves_follow_the_turn(self) -> None:
+        game = create_headless_game(3, num_rounds=4, rand=Random(4))
+        game.start_game()
+
+        self.assertListEqual(game.legal_cards, [])
+        self.assertEqual(game.legal_bids, range(5))
+        self.assertRaisesRegex(GameError, "Invalid bid: 5", game.bid, 0, 5)
+        self.assertRaisesRegex(GameError, "Invalid bid: -1", game.bid, 0, -1)
+        for player_id in [0, 1, 2]:
+            game.bid(player_id, 1)
+
+        self.assertEqual(game.legal_bids, range(0))
+        while game.status == GameStatus.IN_PROGRESS and game.current_round == 0:
+            player_id = game.get_current_player_id()
+            self.assertCountEqual(
+                game.legal_cards, game.compute_playable_cards(player_id)
+            )
+            game.play_card(player_id, game.legal_cards[-1])
+
+    def test_playable_cards_are_not_the_cached_legal_moves(self) -> None:
+        game = create_headless_game(3, num_rounds=4, rand=Random(4))
+        game.start_game()
+        for player_id in [0, 1, 2]:
+            game.bid(player_id, 1)
+
+        legal_cards = game.legal_cards.copy()
+        game.get_playable_cards(game.get_current_player_id()).clear()
+        self.assertListEqual(game.legal_cards, legal_cards)
+
+    def test_legal_moves_are_only_sent_to_the_current_player(self) -> None:
+        game = create_headless_game(3, num_decks=2, num_rounds=4, rand=Random(5))
+        game.start_game()
+
+        def get_legal_moves(player_id: int) -> JudgementLegalMoves | None:
+            game_state = game.build_game_states({player_id})[player_id]
+            assert isinstance(game_state, JudgementGameState)
+            return game_state.legal_moves
+
+        self.assertIsNone(get_legal_moves(1))
+        self.assertEqual(
+            get_legal_moves(0), JudgementLegalMoves(cards=[], min_bid=0, max_bid=4)
+        )
+
+        for player_id in [0, 1, 2]:
+            game.bid(player_id, 1)
+        legal_moves = get_legal_moves(0)
+        assert legal_moves is not None
+        self.assertIsNone(legal_moves.min_bid)
+        self.assertCountEqual(
+            [card.to_id() for card in legal_moves.cards],
+            {get_card_face(card) for card in game.player_states[0].hand},
+        )
@@ -0,0 +1,113 @@
+import asyncio
+import json
+from random import Random
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, patch
+
+import msgpack
+
+from server.data import connection_manager, socket_messager
+from server.game.simulation import create_headless_game
+from server.sio_app import sio
+from server.utils import metrics
+
+
+class TestSocketMessager(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.game = create_headless_game(2, num_rounds=1, rand=Random(1))
+        self.game.game_id = "MESSAGER"
+        self.game.record_events = True
+        self.game.start_game()
+
+        emit_patcher = patch.object(sio, "emit", new_callable=AsyncMock)
+        self.emit = emit_patcher.start()
+        self.addCleanup(emit_patcher.stop)
+        self.addCleanup(socket_messager.forget_game, self.game.game_id)
+        self.addCleanup(metrics.reset)
+
+    def get_emits(self) -> list[tuple[str, dict, str]]:
+        return [
+            (call.args[0], json.loads(call.args[1]), call.kwargs["to"])
+            for call in self.emit.await_args_list
+        ]
+
+    async def test_trick_events_are_sent_before_the_state(self) -> None:
+        await socket_messager.flush_game_state(self.game)
+        self.emit.reset_mock()
+
+        self.game.bid(0, 1)
+        self.game.bid(1, 0)
+        for _ in range(2):
+            player_id = self.game.get_current_player_id()
+            self.game.play_card(player_id, self.game.get_playable_cards(player_id)[0])
+        await socket_messager.flush_game_state(self.game)
+
+        emits = self.get_emits()
+        event, payload, room_id = emits[0]
+        self.assertEqual(event, "game_event")
+        self.assertEqual(room_id, "game/MESSAGER/players")
+        self.assertEqual(payload["event"]["eventType"], "TRICK_COMPLETED")
+        self.assertEqual(len(payload["event"]["pile"]), 2)
+        self.assertListEqual(self.game.events, [])
+
+        spectator_emits = [
+            emit for emit in emits if emit[2] == "game/MESSAGER/spectators"
+        ]
+        self.assertListEqual(
+            [event for event, _, _ in spectator_emits], ["game_event", "game_state_delta"]
+        )
+
+    async def test_slow_recipients_do_not_hold_up_the_table(self) -> None:
+        async def emit(event: str, payload: str, to: str) -> None:
+            if to == "game/MESSAGER/0":
+                await asyncio.sleep(1)
+
+        self.emit.side_effect = emit
+        with patch.object(socket_messager, "FAN_OUT_TIMEOUT_SECONDS", 0.05):
+            await socket_messager.flush_game_state(self.game)
+
+        self.assertEqual(len(self.emit.await_args_list), 3)
+        self.assertEqual(metrics.summaries["emit_fan_out_timeouts"].count, 1)
+        self.assertLess(metrics.summaries["emit_fan_out_seconds"].last, 0.5)
+
+    async def test_spectators_are_sent_delayed_frames(self) -> None:
+        with (
+            patch.object(socket_messager, "SPECTATOR_DELAY_SECONDS", 0.05),
+            patch.object(socket_messager, "SPECTATOR_MAX_UPDATES_PER_SECOND", 10),
+        ):
+            await socket_messager.flush_game_state(self.game)
+            self.game.bid(0, 1)
+            self.game.state_version += 1
+            await socket_messager.flush_game_state(self.game)
+
+        def get_spectator_emits() -> list[tuple[str, dict, str]]:
+            return [
+                emit for emit in self.get_emits() if emit[2] == "game/MESSAGER/spectators"
+            ]
+
+        self.assertListEqual(get_spectator_emits(), [])
+        self.assertEqual(len(self.get_emits()), 4)
+
+        await socket_messager._spectator_frame_tasks[self.game.game_id]
+        spectator_emits = get_spectator_emits()
+        self.assertLessEqual(len(spectator_emits), 2)
+        self.assertEqual(spectator_emits[0][0], "game_state")
+        self.assertEqual(spectator_emits[-1][1]["version"], self.game.state_version)
+
+    async def test_msgpack_rooms_get_binary_payloads(self) -> None:
+        def room_has_clients(room_id: str) -> bool:
+            return room_id == "game/MESSAGER/1:msgpack"
+
+        with patch.object(connection_manager, "room_has_clients", room_has_clients):
+            await socket_messager.flush_game_state(self.game)
+
+        payloads = {call.kwargs["to"]: call.args[1] for call in self.emit.await_args_list}
+        self.assertIsInstance(payloads["game/MESSAGER/1"], str)
+        self.assertIsInstance(payloads["game/MESSAGER/1:msgpack"], bytes)
+        self.assertNotIn("game/MESSAGER/0:msgpack", payloads)
+        self.assertEqual(
+            msgpack.unpackb(
+                payloads["game/MESSAGER/1:msgpack"], ext_hook=lambda code, data: data[0]
+            )["version"],
+            json.loads(payloads["game/MESSAGER/1"])["version"],
+        )
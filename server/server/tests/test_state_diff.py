@@ -0,0 +1,68 @@
+import copy
+from random import Random
+from unittest import TestCase
+
+from server.game.simulation import RandomPolicy, create_headless_game
+from server.models.game import GameStatus
+from server.models.judgement import JudgementPhase
+from server.utils.state_diff import apply_changes, diff_states
+
+
+class TestStateDiff(TestCase):
+    def test_diff_identical_states(self) -> None:
+        state = {"a": 1, "b": {"c": [1, 2]}}
+        self.assertListEqual(diff_states(state, copy.deepcopy(state)), [])
+
+    def test_diff_nested_values(self) -> None:
+        old = {"a": 1, "b": {"c": [1, 2], "d": None}, "e": "x"}
+        new = {"a": 1, "b": {"c": [1, 2, 3], "d": 4}, "e": "x"}
+
+        self.assertListEqual(
+            diff_states(old, new), [(["b", "c"], [1, 2, 3]), (["b", "d"], 4)]
+        )
+
+    def test_diff_replaces_objects_with_different_keys(self) -> None:
+        old = {"players": {"1": "a"}}
+        new = {"players": {"1": "a", "2": "b"}}
+        self.assertListEqual(diff_states(old, new), [(["players"], {"1": "a", "2": "b"})])
+
+        self.assertListEqual(diff_states({"a": 1}, {"b": 1}), [([], {"b": 1})])
+
+    def test_diff_distinguishes_types(self) -> None:
+        self.assertListEqual(diff_states({"a": 1}, {"a": True}), [(["a"], True)])
+
+    def test_apply_changes(self) -> None:
+        old = {"a": 1, "b": {"c": [1, 2], "d": None}}
+        new = {"a": 2, "b": {"c": [], "d": {"e": 1}}}
+
+        self.assertDictEqual(
+            apply_changes(copy.deepcopy(old), diff_states(old, new)), new
+        )
+        self.assertDictEqual(apply_changes(old, [([], new)]), new)
+
+    def test_replaying_deltas_of_a_game(self) -> None:
+        game = create_headless_game(4, num_decks=2, num_rounds=3, rand=Random(1))
+        policy = RandomPolicy(Random(2))
+        game.start_game()
+
+        def dump_state(player_id: int) -> dict:
+            return game.build_game_states({player_id})[player_id].model_dump(
+                mode="json", by_alias=True
+            )
+
+        client_state = dump_state(2)
+        sent_state = copy.deepcopy(client_state)
+        while game.status == GameStatus.IN_PROGRESS:
+            player_id = game.get_current_player_id()
+            if game.phase == JudgementPhase.BIDDING:
+                game.bid(player_id, policy.choose_bid(game, player_id))
+            else:
+                game.play_card(player_id, policy.choose_card(game, player_id))
+
+            state = dump_state(2)
+            changes = diff_states(sent_state, state)
+            self.assertNotIn("settings", [path[0] for path, _ in changes])
+
+            client_state = apply_changes(client_state, copy.deepcopy(changes))
+            sent_state = state
+            self.assertDictEqual(client_state, state)
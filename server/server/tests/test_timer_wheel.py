@@ -0,0 +1,61 @@
+from unittest import TestCase
+
+from server.utils.timer_wheel import TimerWheel
+
+
+class FakeClock:
+    now: float
+
+    def __init__(self) -> None:
+        self.now = 0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestTimerWheel(TestCase):
+    def test_collects_keys_once_they_are_due(self) -> None:
+        clock = FakeClock()
+        wheel: TimerWheel[str] = TimerWheel(10, 6, clock)
+        wheel.schedule("a", 15)
+        wheel.schedule("b", 35)
+
+        self.assertSetEqual(wheel.collect(), set())
+        clock.now = 19
+        self.assertSetEqual(wheel.collect(), {"a"})
+        self.assertSetEqual(wheel.collect(), set())
+        clock.now = 40
+        self.assertSetEqual(wheel.collect(), {"b"})
+        self.assertEqual(len(wheel), 0)
+
+    def test_past_deadlines_are_due_next(self) -> None:
+        clock = FakeClock()
+        clock.now = 100
+        wheel: TimerWheel[str] = TimerWheel(10, 6, clock)
+        wheel.collect()
+        wheel.schedule("a", 50)
+
+        self.assertSetEqual(wheel.collect(), set())
+        clock.now = 110
+        self.assertSetEqual(wheel.collect(), {"a"})
+
+    def test_far_deadlines_wrap_around(self) -> None:
+        clock = FakeClock()
+        wheel: TimerWheel[str] = TimerWheel(10, 6, clock)
+        wheel.schedule("a", 75)
+
+        # Comes up a revolution early, to be checked and scheduled again
+        clock.now = 15
+        self.assertSetEqual(wheel.collect(), {"a"})
+        wheel.schedule("a", 75)
+        clock.now = 70
+        self.assertSetEqual(wheel.collect(), {"a"})
+
+    def test_collects_every_slot_after_a_long_gap(self) -> None:
+        clock = FakeClock()
+        wheel: TimerWheel[str] = TimerWheel(10, 6, clock)
+        for i in range(6):
+            wheel.schedule(str(i), i * 10)
+
+        clock.now = 1000
+        self.assertSetEqual(wheel.collect(), {str(i) for i in range(6)})
@@ -0,0 +1,48 @@
+from unittest import TestCase
+
+from server.utils.ttl_cache import TTLCache
+
+
+class FakeClock:
+    now: float
+
+    def __init__(self) -> None:
+        self.now = 0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestTTLCache(TestCase):
+    def test_gets_put_values(self) -> None:
+        cache: TTLCache[str, int] = TTLCache(2, 10)
+        cache.put("a", 1)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.pop("a"), 1)
+        self.assertIsNone(cache.get("a"))
+
+    def test_evicts_least_recently_used(self) -> None:
+        cache: TTLCache[str, int] = TTLCache(2, 10)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_expires_entries(self) -> None:
+        clock = FakeClock()
+        cache: TTLCache[str, int] = TTLCache(2, 10, clock)
+        cache.put("a", 1)
+        clock.now = 5
+        cache.put("b", 2)
+
+        clock.now = 10
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), 2)
+        self.assertEqual(len(cache), 1)
@@ -0,0 +1,40 @@
+from random import Random
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, patch
+
+from server.api.websocket import handle_join_game
+from server.data import (
+    bot_manager,
+    connection_manager,
+    game_actor,
+    game_manager,
+    socket_messager,
+)
+from server.game.simulation import create_headless_game
+from server.models.game import GamePlayerType
+
+
+class TestWebsocket(IsolatedAsyncioTestCase):
+    async def test_rejoining_players_keep_their_seats(self) -> None:
+        game = create_headless_game(3, rand=Random(1), game_id="JOIN")
+        game.start_game()
+        with patch.object(bot_manager, "schedule_bot_turns"):
+            bot_manager.take_over_player(game, 1)
+        self.addCleanup(bot_manager.remove_game, game.game_id)
+        game_actor.add_game(game)
+        self.addCleanup(game_actor.remove_game, game.game_id)
+
+        with (
+            patch.object(game_manager, "games", {game.game_id: game}),
+            patch.object(connection_manager, "connect_client_to_game", AsyncMock()),
+            patch.object(
+                connection_manager, "get_player_id_for_client", AsyncMock(return_value=1)
+            ),
+            patch.object(connection_manager, "get_wire_format_for_client", AsyncMock()),
+            patch.object(socket_messager, "emit_to_client", AsyncMock()),
+        ):
+            await handle_join_game.__wrapped__("client", game.game_id)
+
+        self.assertEqual(game.players[1].player_type, GamePlayerType.PLAYER)
+        self.assertListEqual(game.ordered_player_ids, [0, 1, 2])
+        self.assertFalse(bot_manager.is_bot_controlled(game.game_id, 1))
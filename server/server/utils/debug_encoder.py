@@ -1,6 +1,6 @@
 import inspect
 import json
-from typing import Any, Iterable
+from typing import Any, Container, Iterable
 
 from server.models.camel_model import CamelModel
 
@@ -23,5 +23,6 @@ class DebugEncoder(json.JSONEncoder):
         return vars(o)
 
 
-def dump_class(obj: Any) -> dict[str, Any]:
-    return json.loads(json.dumps(vars(obj), cls=DebugEncoder))
+def dump_class(obj: Any, exclude: Container[str] = ()) -> dict[str, Any]:
+    fields = {key: value for key, value in vars(obj).items() if key not in exclude}
+    return json.loads(json.dumps(fields, cls=DebugEncoder))
@@ -0,0 +1,70 @@
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+
+class Summary:
+    count: int
+    total: float
+    max: float
+    last: float
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.last = 0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.last = value
+
+    def get_mean(self) -> float:
+        return self.total / self.count if self.count > 0 else 0
+
+    def to_dict(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.get_mean(),
+            "max": self.max,
+            "last": self.last,
+        }
+
+
+# In-process metrics for the single server process, read through /metrics
+summaries: dict[str, Summary] = {}
+gauges: dict[str, float] = {}
+
+
+def observe(name: str, value: float) -> None:
+    summary = summaries.get(name)
+    if summary is None:
+        summary = summaries[name] = Summary()
+    summary.observe(value)
+
+
+@contextmanager
+def time_block(name: str) -> Iterator[None]:
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start_time)
+
+
+def set_gauge(name: str, value: float) -> None:
+    gauges[name] = value
+
+
+def get_metrics() -> dict[str, object]:
+    return {
+        "summaries": {name: summary.to_dict() for name, summary in summaries.items()},
+        "gauges": dict(gauges),
+    }
+
+
+def reset() -> None:
+    summaries.clear()
+    gauges.clear()
@@ -0,0 +1,35 @@
+from typing import Any
+
+import msgpack
+
+from server.game.card import Suit, encode_card
+
+# Cards are the bulk of most game states, so rather than a {"suit", "rank"} map each one
+# is packed as an extension holding its one byte card face
+CARD_EXT_CODE = 1
+CARD_KEYS = {"suit", "rank"}
+
+_card_exts: dict[tuple[str, int], msgpack.ExtType] = {
+    (suit.value, rank): msgpack.ExtType(CARD_EXT_CODE, bytes([encode_card(suit, rank)]))
+    for suit in Suit
+    for rank in range(1, 14)
+}
+
+
+def _compact_cards(value: Any) -> Any:
+    if isinstance(value, dict):
+        if value.keys() == CARD_KEYS:
+            card_ext = _card_exts.get((value["suit"], value["rank"]))
+            if card_ext is not None:
+                return card_ext
+
+        return {key: _compact_cards(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_compact_cards(item) for item in value]
+
+    return value
+
+
+# Takes JSON-like data, i.e. what model_dump(mode="json") produces
+def pack(data: Any) -> bytes:
+    return msgpack.packb(_compact_cards(data))
@@ -0,0 +1,34 @@
+from typing import Any
+
+StateChange = tuple[list[str], Any]
+
+
+# Diffs two JSON-like states into the smallest set of (path, value) assignments that turns
+# old into new. Objects with the same keys are diffed key by key, everything else is
+# replaced wholesale.
+def diff_states(old: Any, new: Any) -> list[StateChange]:
+    changes: list[StateChange] = []
+    _diff_values(old, new, [], changes)
+    return changes
+
+
+def _diff_values(old: Any, new: Any, path: list[str], changes: list[StateChange]) -> None:
+    if isinstance(old, dict) and isinstance(new, dict) and old.keys() == new.keys():
+        for key, value in new.items():
+            _diff_values(old[key], value, [*path, key], changes)
+    elif old != new or type(old) is not type(new):
+        changes.append((path, new))
+
+
+def apply_changes(state: Any, changes: list[StateChange]) -> Any:
+    for path, value in changes:
+        if len(path) == 0:
+            state = value
+            continue
+
+        target = state
+        for key in path[:-1]:
+            target = target[key]
+        target[path[-1]] = value
+
+    return state
@@ -0,0 +1,53 @@
+import math
+import time
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+KT = TypeVar("KT")
+
+
+# Buckets keys by the tick that their deadline falls in, over num_slots ticks of
+# tick_seconds each, so that scheduling a key and collecting the keys that are due are
+# both cheap however many keys there are. Deadlines past the end of the wheel wrap around
+# and come up early, so whatever collects keys should check that they're really due and
+# schedule them again if not. A key can be scheduled more than once.
+class TimerWheel(Generic[KT]):
+    tick_seconds: float
+    _clock: Callable[[], float]
+    _slots: list[set[KT]]
+    # The first tick whose slot hasn't been collected yet
+    _next_tick: int
+
+    def __init__(
+        self,
+        tick_seconds: float,
+        num_slots: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.tick_seconds = tick_seconds
+        self._clock = clock
+        self._slots = [set() for _ in range(num_slots)]
+        self._next_tick = math.floor(clock() / tick_seconds)
+
+    def __len__(self) -> int:
+        return sum(len(slot) for slot in self._slots)
+
+    # Deadlines that have already passed are due the next time keys are collected
+    def schedule(self, key: KT, deadline: float) -> None:
+        tick = max(math.floor(deadline / self.tick_seconds), self._next_tick)
+        self._slots[tick % len(self._slots)].add(key)
+
+    # Takes out the keys in every slot up to and including the current tick's
+    def collect(self) -> set[KT]:
+        now_tick = math.floor(self._clock() / self.tick_seconds)
+        # Every slot is covered once the wheel has gone all the way around
+        last_tick = min(now_tick, self._next_tick + len(self._slots) - 1)
+
+        keys: set[KT] = set()
+        for tick in range(self._next_tick, last_tick + 1):
+            slot = self._slots[tick % len(self._slots)]
+            keys |= slot
+            slot.clear()
+
+        self._next_tick = max(self._next_tick, now_tick + 1)
+        return keys
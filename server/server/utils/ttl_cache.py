@@ -0,0 +1,60 @@
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+KT = TypeVar("KT")
+VT = TypeVar("VT")
+
+
+# Holds at most max_size entries, evicting the least recently used one to make room, and
+# forgets any entry that was put more than ttl_seconds ago
+class TTLCache(Generic[KT, VT]):
+    max_size: int
+    ttl_seconds: float
+    _clock: Callable[[], float]
+    # key -> when the entry expires and its value, least recently used first
+    _entries: OrderedDict[KT, tuple[float, VT]]
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: KT) -> VT | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expiry, value = entry
+        if expiry <= self._clock():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: KT, value: VT) -> None:
+        if self.max_size <= 0:
+            return
+
+        self._entries[key] = (self._clock() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: KT) -> VT | None:
+        entry = self._entries.pop(key, None)
+        return None if entry is None else entry[1]
+
+    def clear(self) -> None:
+        self._entries.clear()